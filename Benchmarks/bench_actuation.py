@@ -0,0 +1,134 @@
+"""Comandos aos atuadores: uma conexão por comando contra o canal persistente com DeviceAck.
+
+Sobe um FleetHost com --actuators atuadores neste processo e envia --commands
+comandos de três formas:
+
+- raw: uma conexão TCP por comando, como o gateway Go (sem confirmação: mede só o envio);
+- framed: canal persistente, um comando por vez, esperando o DeviceAck;
+- pipelined: canal persistente com até --window comandos em voo.
+
+Também confere o DeviceAck de valores fora da forma canônica (" 2", "2.0", " ON "):
+applied deve dizer se o simulador aceitou o valor, não se o texto bate com o estado.
+
+    python Benchmarks/bench_actuation.py --actuators 100 --commands 5000 --window 64
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+
+import benchutil
+from messages import messages_pb2 as messages
+from ActuatorChannel import ActuatorChannel
+from AsyncDevice import AsyncSimulatedActuator
+from FleetHost import FleetHost
+from Payloads import apply_command
+from ACLogic.CarACLogic import CarACLogic
+from HeadlightLogic.CarHeadlightLogic import CarHeadlightLogic
+
+MULTICAST_ADDR = "224.0.0.1"
+
+# (simulador, valor do comando, estado esperado; None se o valor deve ser rejeitado)
+ACK_CASES = [
+    (CarACLogic, "2", "2"),
+    (CarACLogic, " 2", "2"),
+    (CarACLogic, "2.0", "2"),
+    (CarACLogic, "2.5", None),
+    (CarACLogic, "4", None),
+    (CarHeadlightLogic, "on", "on"),
+    (CarHeadlightLogic, " ON ", "on"),
+    (CarHeadlightLogic, "dim", None),
+]
+
+
+def commands(args):
+    # Alterna on/off em cada atuador para que todo comando mude o estado
+    values = itertools.cycle(["on", "off"])
+    ids = itertools.cycle([f"HL-{i}" for i in range(args.actuators)])
+    return [(next(ids), next(values)) for _ in range(args.commands)]
+
+
+async def raw(args, latencies):
+    for device_id, value in commands(args):
+        start = time.perf_counter()
+        _, writer = await asyncio.open_connection("127.0.0.1", args.port)
+        writer.write(messages.DeviceResponse(device_id=device_id, response=value).SerializeToString())
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+        latencies.append(time.perf_counter() - start)
+
+
+async def framed(args, latencies, window):
+    channel = await ActuatorChannel.open("127.0.0.1", args.port)
+    slots = asyncio.Semaphore(window)
+
+    async def send(device_id, value):
+        async with slots:
+            start = time.perf_counter()
+            ack = await channel.send(device_id, value)
+            if not ack.applied:
+                raise RuntimeError(f"{device_id}: {ack.error}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(send(device_id, value) for device_id, value in commands(args)))
+    channel.close()
+    await asyncio.sleep(0.05)  # Deixa o host ver o fim da conexão antes de encerrar
+
+
+def check_acks():
+    results = []
+    for logic, value, expected in ACK_CASES:
+        ack = apply_command(logic(), messages.DeviceResponse(device_id="ACK-1", response=value))
+        results.append({
+            "mode": f"ack/{logic.__name__}/{value!r}",
+            "state": ack.state,
+            "applied": ack.applied,
+            "ok": ack.applied == (expected is not None) and (expected is None or ack.state == expected),
+        })
+    return results
+
+
+async def run(args):
+    host = FleetHost(MULTICAST_ADDR, args.multicast_port, args.port, discovery_window=0)
+    for i in range(args.actuators):
+        host.add_device(AsyncSimulatedActuator(f"HL-{i}", MULTICAST_ADDR, args.multicast_port, args.port,
+                                               CarHeadlightLogic(), periodicity=3600))
+    await host.start()
+    results = []
+    for mode, send in (
+        ("raw", lambda latencies: raw(args, latencies)),
+        ("framed", lambda latencies: framed(args, latencies, 1)),
+        (f"pipelined/window={args.window}", lambda latencies: framed(args, latencies, args.window)),
+    ):
+        latencies = []
+        start = time.perf_counter()
+        await send(latencies)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "mode": mode,
+            "commands": len(latencies),
+            "commands_per_s": round(len(latencies) / elapsed),
+            "p50_ms": round(benchutil.percentile(latencies, 50) * 1e3, 3),
+            "p99_ms": round(benchutil.percentile(latencies, 99) * 1e3, 3),
+        })
+    await host.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actuators", type=int, default=100)
+    parser.add_argument("--commands", type=int, default=5000)
+    parser.add_argument("--window", type=int, default=64, help="Comandos em voo no modo pipelined")
+    parser.add_argument("--port", type=int, default=19700)
+    parser.add_argument("--multicast-port", type=int, default=19699)
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    logging.disable(logging.WARNING)  # Os valores inválidos de ACK_CASES geram avisos esperados
+    benchutil.report(results + check_acks())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Geração de leituras: get_data (uma string por chamada) contra get_batch e as lógicas de frota.
+
+Para cada tipo mede o custo por leitura de três caminhos, com --devices dispositivos
+e --readings leituras por dispositivo:
+
+- scalar: get_data() de cada CarACLogic/CarHeadlightLogic/CarLogic, como hoje;
+- batch: get_batch(--readings) de cada dispositivo;
+- fleet: get_batch(--readings) de uma única CarACFleetLogic/CarHeadlightFleetLogic/CarFleetLogic.
+
+Também confere que a mesma semente gera os mesmos bytes, que dois lotes seguidos
+equivalem a um lote do dobro do tamanho e que o get_batch do CarLogic devolve os
+mesmos pontos que get_data.
+
+    python Benchmarks/bench_batch.py --devices 1000 --readings 100
+"""
+import argparse
+import hashlib
+import random
+import time
+
+import numpy as np
+
+import benchutil
+from ACLogic.CarACLogic import CarACFleetLogic, CarACLogic
+from CarLocLogic.CarLogic import CarFleetLogic, CarLogic
+from CarLocLogic.Trajectory import Trajectory
+from HeadlightLogic.CarHeadlightLogic import CarHeadlightFleetLogic, CarHeadlightLogic
+
+
+def arrays(batch):
+    # O AC devolve (estados, temperaturas); farol e localização, um único array
+    return batch if isinstance(batch, tuple) else (batch,)
+
+
+def digest(batch):
+    hasher = hashlib.sha256()
+    for array in arrays(batch):
+        hasher.update(np.ascontiguousarray(array).tobytes())
+    return hasher.hexdigest()
+
+
+def per_reading_us(func, readings):
+    start = time.perf_counter()
+    func()
+    return round((time.perf_counter() - start) / readings * 1e6, 4)
+
+
+def factories(trajectory, devices):
+    """(tipo, lógica de um dispositivo, lógica da frota), todas a partir de um random.Random."""
+    phases = np.arange(devices) * 7 % trajectory.length
+    return [
+        ("ac", lambda rng: CarACLogic(rng=rng), lambda rng: CarACFleetLogic(devices, rng=rng)),
+        ("headlight", lambda rng: CarHeadlightLogic(rng=rng), lambda rng: CarHeadlightFleetLogic(devices, rng=rng)),
+        ("location", lambda rng: CarLogic(trajectory=trajectory), lambda rng: CarFleetLogic(trajectory, devices, phases=phases)),
+    ]
+
+
+def checks(kind, single, fleet, seed):
+    result = {
+        "same_seed_same_bytes": digest(single(random.Random(seed)).get_batch(64)) ==
+                                digest(single(random.Random(seed)).get_batch(64)),
+    }
+    whole, halves = fleet(random.Random(seed)), fleet(random.Random(seed))
+    first, second = arrays(halves.get_batch(32)), arrays(halves.get_batch(32))
+    split = tuple(np.concatenate(parts) for parts in zip(first, second))
+    result["split_batches_match"] = digest(whole.get_batch(64)) == digest(split)
+    if kind == "location":
+        scalar, batch = single(None), single(None)
+        points = [scalar.current_position() for _ in range(64)]
+        result["batch_matches_get_data"] = bool(np.array_equal(np.array(points), batch.get_batch(64)))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--readings", type=int, default=100, help="Leituras por dispositivo")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    trajectory = Trajectory.from_csv(benchutil.COORDINATES_CSV)
+    total = args.devices * args.readings
+    results = []
+    for kind, single, fleet in factories(trajectory, args.devices):
+        rng = random.Random(args.seed)
+        logics = [single(rng) for _ in range(args.devices)]
+
+        def scalar():
+            for logic in logics:
+                for _ in range(args.readings):
+                    logic.get_data()
+
+        def batch():
+            for logic in logics:
+                logic.get_batch(args.readings)
+
+        fleet_logic = fleet(random.Random(args.seed))
+        result = {
+            "type": kind,
+            "scalar_us": per_reading_us(scalar, total),
+            "batch_us": per_reading_us(batch, total),
+            "fleet_us": per_reading_us(lambda: fleet_logic.get_batch(args.readings), total),
+        }
+        result["fleet_speedup"] = round(result["scalar_us"] / max(result["fleet_us"], 1e-4))
+        result.update(checks(kind, single, fleet, args.seed))
+        results.append(result)
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
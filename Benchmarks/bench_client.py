@@ -0,0 +1,104 @@
+"""Requisições/s e latência do GatewayClient: sem pool, com pool e com pipelining.
+
+Sobe o gateway em Python num subprocesso, com dispositivos já registrados, e envia
+GET_DEVICE_STATE pelos três caminhos do cliente.
+
+    python Benchmarks/bench_client.py --requests 5000 --depth 16
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+import benchutil
+from messages import messages_pb2 as messages
+
+DEVICES = 1000
+
+
+def serve(args):
+    import asyncio
+    from Gateway import Gateway
+
+    async def main():
+        # Porta multicast própria: a descoberta do benchmark não atinge dispositivos reais
+        gateway = Gateway(multicast_port=args.port + 1, udp_port=0, tcp_port=args.port, advertise_ip="127.0.0.1")
+        for i in range(DEVICES):
+            gateway.registry.register(f"AC-{i}", "127.0.0.1", 0, 1)
+            gateway.registry.update_state(f"AC-{i}", "AC|2|25.0")
+        await gateway.start()
+        print("ready", flush=True)
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+def get(i):
+    return messages.ClientMessage(request=f"GET_DEVICE_STATE|AC-{i % DEVICES}")
+
+
+def run_sequential(client, count):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(count):
+        t0 = time.perf_counter()
+        client.request(get(i))
+        latencies.append(time.perf_counter() - t0)
+    return time.perf_counter() - start, latencies
+
+
+def run_pipelined(client, count, depth):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, count, depth):
+        t0 = time.perf_counter()
+        batch = [get(j) for j in range(i, min(count, i + depth))]
+        client.request_many(batch)
+        # Cada requisição do lote espera pela resposta de todo o lote
+        latencies.extend([time.perf_counter() - t0] * len(batch))
+    return time.perf_counter() - start, latencies
+
+
+def summarize(name, elapsed, latencies):
+    return {
+        "client": name,
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / elapsed),
+        "p50_ms": round(benchutil.percentile(latencies, 50) * 1e3, 3),
+        "p99_ms": round(benchutil.percentile(latencies, 99) * 1e3, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--depth", type=int, default=16, help="Requisições em voo por conexão no pipelining")
+    parser.add_argument("--port", type=int, default=19891)
+    parser.add_argument("--serve", action="store_true")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    from Client import GatewayClient
+
+    server = subprocess.Popen([sys.executable, __file__, "--serve", "--port", str(args.port)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        server.stdout.readline()
+        unpooled = GatewayClient("127.0.0.1", args.port)
+        pooled = GatewayClient("127.0.0.1", args.port, framed=True, pool_size=1)
+        results = [
+            summarize("unpooled", *run_sequential(unpooled, args.requests)),
+            summarize("pooled", *run_sequential(pooled, args.requests)),
+            summarize(f"pooled+pipelined(depth={args.depth})", *run_pipelined(pooled, args.requests, args.depth)),
+        ]
+        pooled.close()
+    finally:
+        server.terminate()
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
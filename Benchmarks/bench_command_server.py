@@ -0,0 +1,122 @@
+"""Servidor de comandos do atuador com threads: uma thread por conexão contra o CommandServer (selector).
+
+Abre --connections conexões enquadradas de gateways (ActuatorChannel, todas num
+event loop) contra um SimulatedActuator e envia --commands comandos em cada uma,
+um de cada vez, esperando o DeviceAck. Mede comandos/s, latência e as threads do
+processo durante a carga.
+
+    python Benchmarks/bench_command_server.py --connections 200 --commands 50
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+import benchutil
+from messages import messages_pb2 as messages
+from ActuatorChannel import ActuatorChannel
+from Framing import PREFACE, FrameBuffer, encode_frame
+from SimulatedActuator import SimulatedActuator
+from HeadlightLogic.CarHeadlightLogic import CarHeadlightLogic
+
+
+class ThreadPerConnectionServer:
+    """Como o servidor anterior: accept() bloqueante e uma thread com recv() por conexão."""
+
+    def __init__(self, port, apply):
+        self.apply = apply
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(("127.0.0.1", port))
+        self.listener.listen(128)
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+
+    def accept_loop(self):
+        while True:
+            try:
+                sock, addr = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.handle, args=(sock, addr), daemon=True).start()
+
+    def handle(self, sock, addr):
+        frames = FrameBuffer()
+        data = b""
+        while len(data) < len(PREFACE):
+            data += sock.recv(1024)
+        data = data[len(PREFACE):]
+        while True:
+            frames.feed(data)
+            acks = [encode_frame(self.apply(messages.DeviceResponse.FromString(frame), addr)) for frame in frames.frames()]
+            if acks:
+                sock.sendall(b"".join(acks))
+            data = sock.recv(65536)
+            if not data:
+                break
+        sock.close()
+
+    def stop(self):
+        # shutdown() tira o accept() bloqueado da espera e libera a porta
+        self.listener.shutdown(socket.SHUT_RDWR)
+        self.listener.close()
+
+
+async def load(args, port):
+    channels = [await ActuatorChannel.open("127.0.0.1", port) for _ in range(args.connections)]
+    latencies = []
+    peak_threads = 0
+
+    async def gateway(channel):
+        nonlocal peak_threads
+        for i in range(args.commands):
+            start = time.perf_counter()
+            ack = await channel.send("HL-1", "on" if i % 2 else "off")
+            latencies.append(time.perf_counter() - start)
+            if not ack.applied:
+                raise RuntimeError(ack.error)
+            peak_threads = max(peak_threads, threading.active_count())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(gateway(channel) for channel in channels))
+    elapsed = time.perf_counter() - start
+    for channel in channels:
+        channel.close()
+    return latencies, elapsed, peak_threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--commands", type=int, default=50, help="Comandos por conexão")
+    parser.add_argument("--port", type=int, default=19710)
+    args = parser.parse_args()
+
+    real_stdout = benchutil.silence_stdout()
+    actuator = SimulatedActuator("HL-1", "224.0.0.1", 19711, args.port, CarHeadlightLogic())
+    results = []
+    for mode in ("thread_per_connection", "selector"):
+        if mode == "selector":
+            server = actuator.command_server
+            server.start()
+            time.sleep(0.2)
+        else:
+            server = ThreadPerConnectionServer(args.port, actuator.apply_device_response)
+        latencies, elapsed, peak_threads = asyncio.run(load(args, args.port))
+        server.stop()
+        time.sleep(0.2)
+        results.append({
+            "mode": mode,
+            "connections": args.connections,
+            "commands": len(latencies),
+            "commands_per_s": round(len(latencies) / elapsed),
+            "p50_ms": round(benchutil.percentile(latencies, 50) * 1e3, 3),
+            "p99_ms": round(benchutil.percentile(latencies, 99) * 1e3, 3),
+            "threads": peak_threads,
+        })
+    benchutil.restore_stdout(real_stdout)
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
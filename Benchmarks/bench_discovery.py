@@ -0,0 +1,126 @@
+"""Perda de respostas de descoberta com muitos dispositivos, com e sem atraso aleatório.
+
+Sobe a frota (Fleet/main.py) em --processes subprocessos e, para cada janela de
+resposta, faz o papel do gateway: envia um DISCOVERY_REQUEST de um broker novo e ouve
+o grupo multicast por --listen segundos, como o listenForResponses do gateway Go.
+A perda é a fração dos dispositivos cuja resposta não chegou dentro dessa janela.
+
+    python Benchmarks/bench_discovery.py --devices 2000 --processes 4 --windows 0,1.5
+"""
+import argparse
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import benchutil
+from messages import messages_pb2 as messages
+
+FLEET_MAIN = benchutil.ROOT + "/Fleet/main.py"
+MULTICAST_ADDR = "224.0.0.1"
+
+
+def start_fleet(args, window):
+    processes = []
+    per_process = args.devices // args.processes
+    for p in range(args.processes):
+        process = subprocess.Popen([
+            sys.executable, FLEET_MAIN,
+            "--ac", "0", "--headlight", "0", "--carloc", str(per_process),
+            "--id-offset", str(p * per_process),
+            "--port", str(args.multicast_port + 1 + p),
+            "--multicast-port", str(args.multicast_port),
+            # Telemetria praticamente parada: só a descoberta interessa aqui
+            "--periodicity", "3600",
+            "--discovery-window", str(window),
+            "--log-level", "INFO",
+        ], stdout=subprocess.PIPE, text=True)
+        # Espera o host subir e descarta o resto dos logs
+        for line in process.stdout:
+            if "FleetHost running" in line:
+                break
+        threading.Thread(target=process.stdout.read, daemon=True).start()
+        processes.append(process)
+    return processes, per_process * args.processes
+
+
+def listener(args):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if args.rcvbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, args.rcvbuf)
+    sock.bind(("", args.multicast_port))
+    mreq = socket.inet_aton(MULTICAST_ADDR) + socket.inet_aton("0.0.0.0")
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    return sock
+
+
+def discovery_round(args, sock, broker_port):
+    request = messages.DiscoverMessage(request="DISCOVERY_REQUEST", ip="127.0.0.1", port=broker_port)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sender.sendto(request.SerializeToString(), (MULTICAST_ADDR, args.multicast_port))
+    start = time.perf_counter()
+    seen, arrivals = set(), []
+    while True:
+        remaining = args.listen - (time.perf_counter() - start)
+        if remaining <= 0:
+            break
+        sock.settimeout(remaining)
+        try:
+            data = sock.recv(65535)
+        except socket.timeout:
+            break
+        response = messages.DiscoverResponse()
+        try:
+            response.ParseFromString(data)
+        except Exception:
+            continue
+        if response.device_id and response.device_id != "DISCOVERY_REQUEST":
+            seen.add(response.device_id)
+            arrivals.append(time.perf_counter() - start)
+    sender.close()
+    return seen, arrivals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--windows", default="0,1.5", help="Janelas de resposta a comparar (s), separadas por vírgula")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--listen", type=float, default=2.0, help="Tempo que o gateway ouve as respostas (s)")
+    parser.add_argument("--rcvbuf", type=int, default=0, help="SO_RCVBUF do gateway (0 = padrão do sistema)")
+    parser.add_argument("--multicast-port", type=int, default=19799)
+    args = parser.parse_args()
+
+    results = []
+    for window in (float(w) for w in args.windows.split(",")):
+        processes, devices = start_fleet(args, window)
+        sock = listener(args)
+        try:
+            for r in range(args.rounds):
+                # Um broker novo a cada rodada, para que todos os dispositivos respondam de novo
+                seen, arrivals = discovery_round(args, sock, 20000 + r)
+                results.append({
+                    "window_s": window,
+                    "round": r,
+                    "devices": devices,
+                    "responses": len(seen),
+                    "loss": round(1 - len(seen) / devices, 4),
+                    "p50_arrival_ms": round(benchutil.percentile(arrivals, 50) * 1e3, 1),
+                    "last_arrival_ms": round(max(arrivals, default=0) * 1e3, 1),
+                })
+                # Espera as respostas atrasadas desta rodada antes da próxima
+                time.sleep(max(window, 0.5))
+        finally:
+            sock.close()
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Histórico de telemetria no gateway: TelemetryStore (NumPy) contra uma lista de tuplas por dispositivo.
+
+Ingere --samples leituras de --devices dispositivos (AC e localização, tipadas) e
+mede o custo por amostra da ingestão e de cada consulta (últimas N, intervalo,
+min/max/média e médias por janela), além da memória ocupada pelo histórico. Por fim
+confere o orçamento de memória: --budget-devices dispositivos novos em um
+TelemetryStore de --budget bytes precisam caber nele, descartando os mais antigos.
+
+    python Benchmarks/bench_history.py --devices 200 --samples 1000
+"""
+import argparse
+import random
+import sys
+from collections import deque
+
+import benchutil
+from messages import messages_pb2 as messages
+from TelemetryStore import TelemetryStore, message_values
+
+
+class ListHistory:
+    """Referência: um deque de (timestamp, valores) por dispositivo, consultado amostra a amostra."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.devices = {}
+
+    def add(self, device_id, message, timestamp):
+        _, values = message_values(message)
+        history = self.devices.get(device_id)
+        if history is None:
+            history = self.devices[device_id] = deque(maxlen=self.capacity)
+        history.append((timestamp, values))
+
+    def last(self, device_id, n):
+        return list(self.devices[device_id])[-n:]
+
+    def range(self, device_id, t0, t1):
+        return [sample for sample in self.devices[device_id] if t0 <= sample[0] <= t1]
+
+    def stats(self, device_id, t0, t1):
+        samples = self.range(device_id, t0, t1)
+        columns = list(zip(*(values for _, values in samples)))
+        return [(min(column), max(column), sum(column) / len(column)) for column in columns]
+
+    def downsample(self, device_id, t0, t1, bucket):
+        buckets = {}
+        for timestamp, values in self.range(device_id, t0, t1):
+            buckets.setdefault(int((timestamp - t0) // bucket), []).append(values)
+        return {index: [sum(column) / len(column) for column in zip(*rows)] for index, rows in sorted(buckets.items())}
+
+    def nbytes(self):
+        total = 0
+        for history in self.devices.values():
+            total += sys.getsizeof(history)
+            for sample in history:
+                total += sys.getsizeof(sample) + sys.getsizeof(sample[1]) + sum(sys.getsizeof(v) for v in sample[1])
+        return total
+
+
+def readings(args):
+    rng = random.Random(args.seed)
+    for t in range(args.samples):
+        for d in range(args.devices):
+            message = messages.DeviceMessage(device_id=f"D-{d}")
+            if d % 2:
+                message.ac.state = rng.randint(0, 3)
+                message.ac.temperature = rng.uniform(18, 30)
+            else:
+                message.location.lon = -38.5 + rng.uniform(0, 0.01)
+                message.location.lat = -3.7 + rng.uniform(0, 0.01)
+            yield message.device_id, message, 1000.0 + t
+
+
+def budget_check(args):
+    store = TelemetryStore(capacity=args.samples, memory_budget=args.budget)
+    for d in range(args.budget_devices):
+        store.append(f"D-{d}", 1000.0, "ac", (1.0, 25.0))
+    return {
+        "store": "numpy/budget",
+        "devices_added": args.budget_devices,
+        "budget_bytes": args.budget,
+        "history_bytes": store.nbytes,
+        "within_budget": store.nbytes <= args.budget,
+        "devices_kept": len(store),
+        "devices_evicted": store.devices_evicted,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=1000, help="Amostras por dispositivo")
+    parser.add_argument("--repeat", type=int, default=200, help="Repetições de cada consulta")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--budget", type=int, default=100_000, help="Orçamento (bytes) da verificação de descarte")
+    parser.add_argument("--budget-devices", type=int, default=5000)
+    args = parser.parse_args()
+
+    data = list(readings(args))
+    t0, t1 = 1000.0 + args.samples * 0.25, 1000.0 + args.samples * 0.75
+    bucket = args.samples / 50
+    results = []
+    for name, store in (("list", ListHistory(args.samples)),
+                        ("numpy", TelemetryStore(capacity=args.samples, memory_budget=1 << 40))):
+        def ingest():
+            for device_id, message, timestamp in data:
+                store.add(device_id, message, timestamp)
+
+        ingest_us = benchutil.timeit(ingest, 1) / len(data)
+        device_id = "D-1"
+        result = {"store": name, "ingest_us": round(ingest_us, 3)}
+        for query, call in (
+            ("last_100_us", lambda: store.last(device_id, 100)),
+            ("range_us", lambda: store.range(device_id, t0, t1)),
+            ("stats_us", lambda: store.stats(device_id, t0, t1)),
+            ("downsample_us", lambda: store.downsample(device_id, t0, t1, bucket)),
+        ):
+            result[query] = round(benchutil.timeit(call, args.repeat), 1)
+        result["history_mb"] = round((store.nbytes() if name == "list" else store.nbytes) / 1e6, 2)
+        results.append(result)
+    results.append(budget_check(args))
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
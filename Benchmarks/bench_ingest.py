@@ -0,0 +1,113 @@
+"""Ingestão de telemetria no gateway: event loop único contra N workers com SO_REUSEPORT.
+
+Processos emissores enviam DeviceMessage (texto e tipados) de --devices dispositivos
+já registrados, o mais rápido possível, a partir de --sources portas de origem cada
+(o kernel distribui os pacotes entre os workers pelo endereço de origem). Para cada
+valor de --workers mede os pacotes/s que o gateway realmente ingeriu e a fração perdida.
+0 workers é o gateway atual, com a telemetria no próprio event loop.
+
+    python Benchmarks/bench_ingest.py --workers 0,1,2,4 --senders 2 --duration 5
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+
+import benchutil
+from messages import messages_pb2 as messages
+from loadtest import LoopThread
+
+# Os emissores saem de um processo que já tem a thread do event loop do gateway
+_context = multiprocessing.get_context("forkserver")
+
+
+def datagrams(args):
+    payloads = []
+    for i in range(args.devices):
+        message = messages.DeviceMessage(device_id=f"DEV-{i}", timestamp=time.time())
+        if i % 3 == 0:
+            message.ac.state = 1
+            message.ac.temperature = 22.5
+        elif i % 3 == 1:
+            message.data = "Headlight|on"
+        else:
+            message.location.lon = -38.5 + i * 1e-6
+            message.location.lat = -3.7
+        payloads.append(message.SerializeToString())
+    return payloads
+
+
+def send(port, payloads, sources, duration, sent):
+    socks = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(sources)]
+    count = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        # Um lote de envios entre as consultas ao relógio
+        for i, data in enumerate(payloads):
+            try:
+                socks[i % sources].sendto(data, ("127.0.0.1", port))
+                count += 1
+            except OSError:
+                pass
+    for sock in socks:
+        sock.close()
+    sent.value = count
+
+
+def measure(args, workers, payloads):
+    from Gateway import Gateway
+
+    gateway = Gateway(multicast_port=args.multicast_port, udp_port=args.port, tcp_port=0,
+                      advertise_ip="127.0.0.1", discovery_interval=3600, ingest_workers=workers)
+    for i in range(args.devices):
+        gateway.registry.register(f"DEV-{i}", "127.0.0.1", 1, i % 3 and 1)
+    loop = LoopThread("gateway")
+    loop.call(gateway.start())
+    time.sleep(0.5)
+
+    counters = [_context.Value("q", 0) for _ in range(args.senders)]
+    senders = [_context.Process(target=send, args=(gateway.udp_port, payloads, args.sources, args.duration, sent))
+               for sent in counters]
+    start = time.perf_counter()
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    # O que ficou nos buffers e nas tabelas dos workers ainda entra na contagem
+    time.sleep(0.5)
+    loop.call(gateway.stop())
+    elapsed = time.perf_counter() - start
+    sent = sum(counter.value for counter in counters)
+    received = gateway.datagrams_received
+    return {
+        "workers": workers,
+        "cpus": os.cpu_count(),
+        "packets_sent": sent,
+        "packets_received": received,
+        "packets_per_s": round(received / elapsed),
+        "loss": round(1 - received / sent, 4) if sent else 0.0,
+        "unknown_readings": gateway.unknown_readings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="0,1,2,4", help="Quantidades de workers a comparar (0 = event loop)")
+    parser.add_argument("--senders", type=int, default=2, help="Processos emissores")
+    parser.add_argument("--sources", type=int, default=64, help="Portas de origem por emissor")
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=19990)
+    parser.add_argument("--multicast-port", type=int, default=19989)
+    args = parser.parse_args()
+
+    real_stdout = benchutil.silence_stdout()
+    payloads = datagrams(args)
+    results = [measure(args, int(workers), payloads) for workers in args.workers.split(",")]
+    benchutil.restore_stdout(real_stdout)
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Bytes por ponto do stream de localização: texto, Location tipada e LocationDelta.
+
+Percorre a rota de coordinates.csv (ida e volta, como o CarLogic) e, para cada
+formato, mede o tamanho médio do payload, do DeviceMessage inteiro e o erro máximo
+da posição decodificada. Com --loss, descarta leituras ao acaso e mede quantas das
+recebidas o gateway ainda consegue decodificar.
+
+    python Benchmarks/bench_location.py --keyframes 1,5,10,30 --loss 0.05
+"""
+import argparse
+import random
+
+import benchutil
+from messages import messages_pb2 as messages
+from LocationCodec import LocationDecoder, LocationEncoder
+from CarLocLogic.Trajectory import Trajectory
+
+DEVICE_ID = "CL-1"
+
+
+def route(args):
+    trajectory = Trajectory.from_csv(benchutil.COORDINATES_CSV, cache=False)
+    return [trajectory.point_at(i) for i in range(2 * trajectory.length * args.laps)]
+
+
+def location_message(lon, lat):
+    message = messages.DeviceMessage(device_id=DEVICE_ID)
+    message.location.lon = lon
+    message.location.lat = lat
+    return message
+
+
+def measure(name, points, encode, decode, args):
+    payload_bytes = message_bytes = received = decoded = 0
+    max_error = 0.0
+    rng = random.Random(args.seed)
+    for lon, lat in points:
+        message = encode(lon, lat)
+        data = message.SerializeToString()
+        message_bytes += len(data)
+        payload_bytes += message.ByteSize() - messages.DeviceMessage(device_id=DEVICE_ID).ByteSize()
+        if rng.random() < args.loss:
+            continue
+        received += 1
+        result = decode(data)
+        if result is None:
+            continue
+        decoded += 1
+        max_error = max(max_error, abs(result[0] - lon), abs(result[1] - lat))
+    return {
+        "format": name,
+        "points": len(points),
+        "payload_bytes": round(payload_bytes / len(points), 2),
+        "message_bytes": round(message_bytes / len(points), 2),
+        "decoded_ratio": round(decoded / received, 4) if received else 0.0,
+        "max_error_deg": max_error,
+    }
+
+
+def string_format(points, args):
+    def encode(lon, lat):
+        return messages.DeviceMessage(device_id=DEVICE_ID, data=f"{lon}|{lat}")
+
+    def decode(data):
+        message = messages.DeviceMessage.FromString(data)
+        lon, lat = message.data.split("|")
+        return float(lon), float(lat)
+
+    return measure("string", points, encode, decode, args)
+
+
+def typed_format(points, args):
+    def decode(data):
+        message = messages.DeviceMessage.FromString(data)
+        return message.location.lon, message.location.lat
+
+    return measure("typed", points, location_message, decode, args)
+
+
+def compact_format(points, keyframe_interval, args):
+    encoder, decoder = LocationEncoder(keyframe_interval), LocationDecoder()
+
+    def encode(lon, lat):
+        return encoder.encode(location_message(lon, lat))
+
+    def decode(data):
+        message = messages.DeviceMessage.FromString(data)
+        if not decoder.decode(message):
+            return None
+        return message.location.lon, message.location.lat
+
+    return measure(f"compact/keyframe={keyframe_interval}", points, encode, decode, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keyframes", default="1,5,10,30", help="Intervalos entre keyframes a comparar")
+    parser.add_argument("--laps", type=int, default=10, help="Voltas completas (ida e volta) na rota")
+    parser.add_argument("--loss", type=float, default=0.0, help="Fração das leituras descartadas")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    points = route(args)
+    results = [string_format(points, args), typed_format(points, args)]
+    for keyframe_interval in (int(k) for k in args.keyframes.split(",")):
+        results.append(compact_format(points, keyframe_interval, args))
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compara o payload em texto (DeviceMessage.data) com os payloads tipados.
+
+Para cada tipo de dispositivo mede o custo de codificação (leitura do simulador +
+SerializeToString), de decodificação até valores numéricos e os bytes no fio.
+
+    python Benchmarks/bench_payloads.py --repeat 20000
+"""
+import argparse
+
+import benchutil
+from messages import messages_pb2 as messages
+from Payloads import fill_message
+from ACLogic.CarACLogic import CarACLogic
+from CarLocLogic.CarLogic import CarLogic
+from HeadlightLogic.CarHeadlightLogic import CarHeadlightLogic
+
+
+def decode_string(data):
+    # Mesmo parsing que um consumidor do texto precisa fazer (strings.Split no gateway Go)
+    message = messages.DeviceMessage()
+    message.ParseFromString(data)
+    parts = message.data.split("|")
+    if parts[0] == "AC":
+        return int(parts[1]), float(parts[2])
+    if parts[0] == "Headlight":
+        return parts[1] == "on"
+    return float(parts[0]), float(parts[1])
+
+
+def decode_typed(data):
+    message = messages.DeviceMessage()
+    message.ParseFromString(data)
+    kind = message.WhichOneof("payload")
+    if kind == "ac":
+        return message.ac.state, message.ac.temperature
+    if kind == "headlight":
+        return message.headlight.on
+    return message.location.lon, message.location.lat
+
+
+def measure(name, simulator, typed, repeat):
+    def encode():
+        message = messages.DeviceMessage()
+        message.device_id = name
+        fill_message(message, simulator, typed)
+        return message.SerializeToString()
+
+    samples = [encode() for _ in range(256)]
+    decode = decode_typed if typed else decode_string
+    decode_us = benchutil.timeit(lambda: [decode(data) for data in samples], max(1, repeat // len(samples)))
+    return {
+        "device": name,
+        "payload": "typed" if typed else "string",
+        "encode_us": round(benchutil.timeit(encode, repeat), 3),
+        "decode_us": round(decode_us / len(samples), 3),
+        "bytes": round(sum(len(data) for data in samples) / len(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    real_stdout = benchutil.silence_stdout()  # CarACLogic.get_data imprime cada leitura
+    simulators = [
+        ("AC-1", CarACLogic()),
+        ("HL-1", CarHeadlightLogic()),
+        ("CL-1", CarLogic(benchutil.COORDINATES_CSV)),
+    ]
+    results = []
+    for name, simulator in simulators:
+        for typed in (False, True):
+            results.append(measure(name, simulator, typed, args.repeat))
+    benchutil.restore_stdout(real_stdout)
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
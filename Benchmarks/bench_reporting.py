@@ -0,0 +1,68 @@
+"""Leituras enviadas com report-on-change, por tipo de dispositivo, sem rede.
+
+Cada lógica gera --readings leituras, uma por período de 5 s num relógio simulado,
+e o Reporter decide quais sairiam para o broker. Os atuadores recebem um comando a
+cada --command-every leituras, como um cliente que muda o estado de vez em quando.
+
+    python Benchmarks/bench_reporting.py --readings 10000 --report on
+"""
+import argparse
+import random
+
+import benchutil
+from messages import messages_pb2 as messages
+from Payloads import fill_message
+from Reporting import SUPPRESSED, Reporter, parse_policies
+from ACLogic.CarACLogic import CarACLogic
+from CarLocLogic.CarLogic import CarLogic
+from HeadlightLogic.CarHeadlightLogic import CarHeadlightLogic
+
+PERIODICITY = 5.0
+COMMANDS = {
+    "ac": lambda: str(random.choice([1, 2, 3])),
+    "headlight": lambda: random.choice(["on", "off"]),
+}
+
+
+def run(kind, simulator, policies, args):
+    clock = [0.0]
+    reporter = Reporter(policies, clock=lambda: clock[0])
+    decisions = {}
+    for i in range(args.readings):
+        if kind in COMMANDS and args.command_every and i % args.command_every == 0:
+            simulator.set_data(COMMANDS[kind]())
+        message = fill_message(messages.DeviceMessage(device_id=kind), simulator, args.typed_payload)
+        _, decision = reporter.decide("broker", message)
+        decisions[decision] = decisions.get(decision, 0) + 1
+        clock[0] += PERIODICITY
+    suppressed = decisions.get(SUPPRESSED, 0)
+    return dict(
+        {"type": kind, "readings": args.readings, "sent": args.readings - suppressed,
+         "suppressed_ratio": round(suppressed / args.readings, 4)},
+        **decisions,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readings", type=int, default=10000)
+    parser.add_argument("--report", default="on", help='Políticas, como em Fleet/main.py --report')
+    parser.add_argument("--command-every", type=int, default=60, help="Leituras entre comandos aos atuadores (0 = nunca)")
+    parser.add_argument("--typed-payload", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    policies = parse_policies(args.report)
+
+    real_stdout = benchutil.silence_stdout()
+    results = [
+        run("ac", CarACLogic(), policies, args),
+        run("headlight", CarHeadlightLogic(), policies, args),
+        run("location", CarLogic(benchutil.COORDINATES_CSV), policies, args),
+    ]
+    benchutil.restore_stdout(real_stdout)
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
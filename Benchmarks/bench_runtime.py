@@ -0,0 +1,143 @@
+"""Compara o runtime com threads (SimulatedSensor) com o runtime asyncio (AsyncSimulatedSensor).
+
+Simula G gateways no loopback que enviam DISCOVERY_REQUEST periodicamente e mede,
+no processo do dispositivo, threads vivas, memória, CPU e a telemetria entregue.
+
+    python Benchmarks/bench_runtime.py --gateways 200 --duration 10
+"""
+import argparse
+import json
+import selectors
+import socket
+import subprocess
+import sys
+import time
+
+import benchutil
+
+MULTICAST_ADDR = "224.0.0.1"
+
+
+def worker(args):
+    real_stdout = benchutil.silence_stdout()
+    from HeadlightLogic.CarHeadlightLogic import CarHeadlightLogic
+
+    kwargs = dict(
+        device_id="BENCH-1",
+        multicast_addr=MULTICAST_ADDR,
+        multicast_port=args.multicast_port,
+        port=0,
+        simulator=CarHeadlightLogic(),
+        periodicity=args.periodicity,
+    )
+    start_cpu = time.process_time()
+    if args.worker == "thread":
+        import threading
+        import SimulatedSensor
+
+        device = SimulatedSensor.SimulatedSensor(**kwargs)
+        threading.Thread(target=device.listen_multicast, daemon=True).start()
+        peak_threads = 0
+        deadline = time.time() + args.duration
+        while time.time() < deadline:
+            peak_threads = max(peak_threads, benchutil.thread_count())
+            time.sleep(0.1)
+        brokers = len(device.brokers_address)
+    else:
+        import asyncio
+        import AsyncDevice
+
+        device = AsyncDevice.AsyncSimulatedSensor(**kwargs)
+
+        async def main():
+            task = asyncio.ensure_future(device.serve())
+            peak = 0
+            deadline = time.time() + args.duration
+            while time.time() < deadline:
+                peak = max(peak, benchutil.thread_count())
+                await asyncio.sleep(0.1)
+            task.cancel()
+            return peak
+
+        peak_threads = asyncio.run(main())
+        brokers = len(device.brokers_address)
+
+    benchutil.restore_stdout(real_stdout)
+    benchutil.report({
+        "runtime": args.worker,
+        "brokers": brokers,
+        "peak_threads": peak_threads,
+        "rss_kb": benchutil.rss_kb(),
+        "cpu_s": round(time.process_time() - start_cpu, 3),
+    })
+
+
+def run_gateways(args, mode):
+    # Gateways falsos: um socket UDP por gateway recebendo a telemetria
+    selector = selectors.DefaultSelector()
+    sinks = []
+    for _ in range(args.gateways):
+        sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sink.bind(("127.0.0.1", 0))
+        sink.setblocking(False)
+        selector.register(sink, selectors.EVENT_READ)
+        sinks.append(sink)
+
+    from messages import messages_pb2 as messages
+    requests = []
+    for sink in sinks:
+        msg = messages.DiscoverMessage(request="DISCOVERY_REQUEST", ip="127.0.0.1", port=sink.getsockname()[1])
+        requests.append(msg.SerializeToString())
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+
+    proc = subprocess.Popen(
+        [sys.executable, __file__, "--worker", mode, "--duration", str(args.duration),
+         "--multicast-port", str(args.multicast_port), "--periodicity", str(args.periodicity)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    time.sleep(1.0)  # Aguarda o dispositivo entrar no grupo multicast
+
+    received = 0
+    next_discovery = 0.0
+    deadline = time.time() + args.duration - 1.0
+    while time.time() < deadline:
+        if time.time() >= next_discovery:
+            for data in requests:
+                sender.sendto(data, (MULTICAST_ADDR, args.multicast_port))
+            next_discovery = time.time() + args.discovery_interval
+        for key, _ in selector.select(timeout=0.05):
+            try:
+                while True:
+                    key.fileobj.recv(65535)
+                    received += 1
+            except BlockingIOError:
+                pass
+
+    out, _ = proc.communicate()
+    for sink in sinks:
+        sink.close()
+    result = json.loads(out)
+    result["datagrams_received"] = received
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gateways", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--periodicity", type=float, default=0.5)
+    parser.add_argument("--discovery-interval", type=float, default=2.0)
+    parser.add_argument("--multicast-port", type=int, default=19999)
+    parser.add_argument("--worker", choices=["thread", "async"])
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+    results = [run_gateways(args, mode) for mode in ("thread", "async")]
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
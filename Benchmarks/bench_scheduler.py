@@ -0,0 +1,79 @@
+"""Atraso dos envios periódicos: uma thread com sleep por broker contra o Scheduler compartilhado.
+
+Cada "dispositivo" só registra o atraso de cada disparo em relação ao prazo ideal
+(início + k * periodicidade); nada é enviado pela rede.
+
+    python Benchmarks/bench_scheduler.py --devices 500 --periodicity 0.02 --duration 5
+"""
+import argparse
+import threading
+import time
+
+import benchutil
+from Scheduler import Scheduler
+
+
+def sleep_loops(args):
+    # Como o laço antigo: sleep(periodicity) depois de cada envio, uma thread por broker
+    lateness, stop = [], threading.Event()
+
+    def loop():
+        expected = time.monotonic()
+        while not stop.is_set():
+            now = time.monotonic()
+            lateness.append(now - expected)
+            expected = now + args.periodicity
+            time.sleep(args.periodicity)
+
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(args.devices)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    peak_threads = threading.active_count()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return lateness, peak_threads
+
+
+def scheduler(args):
+    lateness, timers = [], []
+    sched = Scheduler("bench-scheduler")
+
+    def tick(index):
+        lateness.append(sched.time() - timers[index].deadline)
+
+    for i in range(args.devices):
+        timers.append(sched.every(args.periodicity, tick, i))
+    time.sleep(args.duration)
+    peak_threads = threading.active_count()
+    for timer in timers:
+        timer.cancel()
+    return lateness, peak_threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--periodicity", type=float, default=0.02)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    expected = args.devices * args.duration / args.periodicity
+    results = []
+    for name, run in (("sleep_per_thread", sleep_loops), ("scheduler", scheduler)):
+        lateness, peak_threads = run(args)
+        results.append({
+            "mode": name,
+            "devices": args.devices,
+            "threads": peak_threads,
+            "ticks": len(lateness),
+            "ticks_ratio": round(len(lateness) / expected, 3),
+            "p50_lateness_ms": round(benchutil.percentile(lateness, 50) * 1e3, 3),
+            "p99_lateness_ms": round(benchutil.percentile(lateness, 99) * 1e3, 3),
+        })
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
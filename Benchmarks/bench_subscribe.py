@@ -0,0 +1,144 @@
+"""Acompanhar dispositivos: GET_DEVICE_STATES periódico contra SUBSCRIBE com push do gateway.
+
+Sobe o gateway em Python neste processo com --devices dispositivos registrados e envia
+--rate mudanças de estado por segundo (DeviceMessage por UDP, cada uma com um número
+de sequência no estado). Mede quantas mudanças o cliente chegou a ver, a latência
+entre o envio e a observação e o número de mensagens recebidas:
+
+- poll: GET_DEVICE_STATES de todos os dispositivos a cada --poll-interval;
+- subscribe: uma assinatura lida o mais rápido possível;
+- subscribe/slow: uma assinatura que leva --slow-delay para processar cada push
+  (gateway e cliente fundem as mudanças pendentes em vez de enfileirá-las).
+
+    python Benchmarks/bench_subscribe.py --devices 500 --rate 2000 --duration 5
+"""
+import argparse
+import asyncio
+import socket
+import time
+
+import benchutil
+from messages import messages_pb2 as messages
+from AsyncGatewayClient import AsyncGatewayClient
+
+
+class Observer:
+    def __init__(self, sent_at):
+        self.sent_at = sent_at
+        self.seen = {}  # device_id -> última sequência vista
+        self.latencies = []
+        self.messages = 0
+
+    def observe(self, device_id, state):
+        seq = int(state.rsplit("|", 1)[1]) if state else -1
+        if seq > self.seen.get(device_id, -1):
+            self.seen[device_id] = seq
+            self.latencies.append(time.perf_counter() - self.sent_at[seq])
+
+
+async def drive(args, port, sent_at, stop):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    interval = 1 / args.rate
+    seq = 0
+    start = time.perf_counter()
+    while not stop.is_set():
+        # Envia as mudanças atrasadas de uma vez e devolve o loop
+        due = int((time.perf_counter() - start) / interval)
+        while seq < due:
+            device_id = f"AC-{seq % args.devices}"
+            sent_at.append(time.perf_counter())
+            sock.sendto(messages.DeviceMessage(device_id=device_id, data=f"AC|1|{seq}").SerializeToString(),
+                        ("127.0.0.1", port))
+            seq += 1
+        await asyncio.sleep(0.001)
+    sock.close()
+    return seq
+
+
+async def poll(args, client, ids, observer, stop):
+    while not stop.is_set():
+        states = await client.get_states_bulk(ids)
+        observer.messages += 1
+        for device_id, state in states.items():
+            observer.observe(device_id, state.state)
+        await asyncio.sleep(args.poll_interval)
+
+
+async def subscribe(args, client, ids, observer, stop, delay):
+    subscription = await client.subscribe(ids)
+    while not stop.is_set():
+        try:
+            changed = await asyncio.wait_for(subscription.next_update(), 0.1)
+        except asyncio.TimeoutError:
+            continue
+        observer.messages += 1
+        for device_id, state in changed.items():
+            observer.observe(device_id, state)
+        if delay:
+            await asyncio.sleep(delay)
+    await subscription.close()
+
+
+async def run(args, mode):
+    from Gateway import Gateway
+
+    gateway = Gateway(multicast_port=args.multicast_port, udp_port=0, tcp_port=0, advertise_ip="127.0.0.1",
+                      discovery_interval=3600)
+    ids = [f"AC-{i}" for i in range(args.devices)]
+    for device_id in ids:
+        gateway.registry.register(device_id, "127.0.0.1", 1, 1)
+    await gateway.start()
+    client = AsyncGatewayClient("127.0.0.1", gateway.tcp_port, framed=True, connections=1)
+    sent_at = []
+    observer = Observer(sent_at)
+    stop, stop_driver = asyncio.Event(), asyncio.Event()
+    if mode == "poll":
+        watcher = asyncio.ensure_future(poll(args, client, ids, observer, stop))
+    else:
+        delay = args.slow_delay if mode == "subscribe/slow" else 0
+        watcher = asyncio.ensure_future(subscribe(args, client, ids, observer, stop, delay))
+    await asyncio.sleep(0.2)
+    driver = asyncio.ensure_future(drive(args, gateway.udp_port, sent_at, stop_driver))
+    await asyncio.sleep(args.duration)
+    stop_driver.set()
+    changes = await driver
+    # Tempo para o cliente ver as últimas mudanças antes de medir o estado final
+    await asyncio.sleep(max(args.poll_interval, args.slow_delay) + 0.2)
+    stop.set()
+    await watcher
+    await client.close()
+    await asyncio.sleep(0.05)  # Deixa o gateway ver o fim das conexões antes de encerrar
+    await gateway.stop()
+    # Só a última mudança de cada dispositivo precisa ser vista; as intermediárias podem se fundir
+    last_seq = {f"AC-{seq % args.devices}": seq for seq in range(max(0, changes - args.devices), changes)}
+    final = sum(1 for device_id, seq in last_seq.items() if observer.seen.get(device_id) == seq)
+    return {
+        "mode": mode,
+        "changes_sent": changes,
+        "changes_seen": len(observer.latencies),
+        "final_states_seen": f"{final}/{len(last_seq)}",
+        "messages_received": observer.messages,
+        "p50_ms": round(benchutil.percentile(observer.latencies, 50) * 1e3, 2),
+        "p99_ms": round(benchutil.percentile(observer.latencies, 99) * 1e3, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=2000, help="Mudanças de estado por segundo")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--slow-delay", type=float, default=0.2, help="Tempo de processamento de cada push no modo slow")
+    parser.add_argument("--multicast-port", type=int, default=19979)
+    args = parser.parse_args()
+
+    real_stdout = benchutil.silence_stdout()
+    results = [asyncio.run(run(args, mode)) for mode in ("poll", "subscribe", "subscribe/slow")]
+    benchutil.restore_stdout(real_stdout)
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Log de tráfego (Traffic/): gravação em blocos, leitura por mmap e reenvio o mais rápido possível.
+
+Grava --records leituras sintéticas (texto, tipadas e em lote) com o TrafficWriter,
+lê o log com o TrafficReader e com TrafficRecord.ParseFromString sobre um read()
+do arquivo, e reenvia tudo com speed=0 para um socket local, com e sem cópias da frota.
+
+    python Benchmarks/bench_traffic.py --records 200000 --copies 1,4
+"""
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import time
+
+import benchutil
+from messages import messages_pb2 as messages
+from Framing import decode_varint
+from TrafficLog import DEVICE_MESSAGE, DISCOVER_RESPONSE, TrafficReader, TrafficWriter
+from Replayer import Replayer
+
+
+def synthetic(args):
+    payloads = []
+    for i in range(args.devices):
+        message = messages.DeviceMessage(device_id=f"DEV-{i}", timestamp=1.7e9)
+        if i % 3 == 0:
+            message.ac.state = 2
+            message.ac.temperature = 24.5
+        elif i % 3 == 1:
+            message.data = "Headlight|on"
+        else:
+            for j in range(4):
+                reading = message.readings.add(device_id=f"DEV-{i}", timestamp=1.7e9 + j)
+                reading.location.lon = -38.5 + j * 1e-5
+                reading.location.lat = -3.7
+        payloads.append(message.SerializeToString())
+    return payloads
+
+
+def write(path, args, payloads):
+    discover = [messages.DiscoverResponse(device_id=f"DEV-{i}", ip="127.0.0.1", port=9000, type=i % 3 != 2)
+                .SerializeToString() for i in range(args.devices)]
+    writer = TrafficWriter(path)
+    start = time.perf_counter()
+    for data in discover:
+        writer.append(1.7e9, DISCOVER_RESPONSE, data)
+    for i in range(args.records):
+        writer.append(1.7e9 + i * 1e-3, DEVICE_MESSAGE, payloads[i % len(payloads)])
+    writer.close()
+    return time.perf_counter() - start
+
+
+def read_mmap(path):
+    count = 0
+    start = time.perf_counter()
+    with TrafficReader(path) as reader:
+        for _ in reader:
+            count += 1
+    return count, time.perf_counter() - start
+
+
+def read_protobuf(path):
+    # Referência: o arquivo inteiro em memória e cada registro pelo protobuf
+    count = 0
+    start = time.perf_counter()
+    with open(path, "rb") as log_file:
+        data = log_file.read()
+    pos = 0
+    while pos < len(data):
+        size, pos = decode_varint(data, pos)
+        record = messages.TrafficRecord()
+        record.ParseFromString(data[pos:pos + size])
+        pos += size
+        count += 1
+    return count, time.perf_counter() - start
+
+
+async def replay(path, copies):
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    replayer = Replayer(path, speed=0, copies=copies, gateways=[sink.getsockname()], multicast_port=0)
+    await replayer.start()
+    elapsed = await replayer.replay()
+    await replayer.stop()
+    sink.close()
+    return replayer.stats(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--devices", type=int, default=300)
+    parser.add_argument("--copies", default="1,4", help="Cópias da frota no reenvio")
+    args = parser.parse_args()
+
+    payloads = synthetic(args)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "traffic.log")
+        elapsed = write(path, args, payloads)
+        size = os.path.getsize(path)
+        results.append({"step": "write", "records_per_s": round(args.records / elapsed),
+                        "mb_per_s": round(size / elapsed / 1e6, 1), "bytes_per_record": round(size / args.records, 1)})
+        for name, read in (("read/mmap", read_mmap), ("read/protobuf", read_protobuf)):
+            count, elapsed = read(path)
+            results.append({"step": name, "records_per_s": round(count / elapsed)})
+        for copies in (int(c) for c in args.copies.split(",")):
+            stats, elapsed = asyncio.run(replay(path, copies))
+            results.append({"step": f"replay/copies={copies}", "records_per_s": round(stats["records_replayed"] / elapsed),
+                            "datagrams_per_s": round(stats["datagrams_sent"] / elapsed),
+                            "send_errors": stats["send_errors"]})
+    benchutil.report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Os benchmarks rodam a partir do repositório, sem os cp feitos pelos launch.sh
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ("DeviceClasses", "Device-AC", "Device-CarLoc", "Device-Headlight", "Client", "Gateway-Python", "Traffic"):
+    sys.path.append(os.path.join(ROOT, path))
+
+COORDINATES_CSV = os.path.join(ROOT, "Device-CarLoc", "CarLocLogic", "coordinates.csv")
+
+
+def rss_kb():
+    """Memória residente do processo atual em KiB (Linux)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def silence_stdout():
+    """Descarta os prints dos dispositivos e devolve o stdout original para o resultado."""
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    return real_stdout
+
+
+def restore_stdout(real_stdout):
+    """Fecha o /dev/null aberto por silence_stdout e volta ao stdout original."""
+    if sys.stdout is not real_stdout:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+
+def thread_count():
+    return threading.active_count()
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def timeit(func, repeat):
+    """Executa func repeat vezes e retorna o tempo médio por chamada em microssegundos."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def report(results, stream=None):
+    print(json.dumps(results, indent=2), file=stream or sys.stdout, flush=True)
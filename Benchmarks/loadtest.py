@@ -0,0 +1,362 @@
+"""Teste de carga ponta a ponta: N dispositivos, gateway em Python no loopback e GatewayClient.
+
+Sobe o gateway em Python (Gateway-Python) neste processo e uma frota de dispositivos
+(AsyncSimulatedSensor/AsyncSimulatedActuator num FleetHost), no mesmo processo ou em
+subprocessos Fleet/main.py. Depois da descoberta, mede durante --duration segundos:
+
+- ingest_readings_per_s: leituras de telemetria recebidas pelo gateway por segundo;
+- loss: fração das leituras enviadas pela frota que não chegaram ao gateway;
+- get: latência de GET_DEVICE_STATE (p50/p99) pelo GatewayClient;
+- set: latência de SET_DEVICE_STATE até o atuador aplicar o novo estado. No modo
+  in-process o estado é lido do próprio atuador; com subprocessos, pela telemetria
+  que chega ao gateway (inclui até um período de envio).
+
+    python Benchmarks/loadtest.py --ac 100 --headlight 100 --carloc 300 --duration 20 --output run.json
+    python Benchmarks/loadtest.py --processes 4 --carloc 2000 --periodicity 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import benchutil
+from messages import messages_pb2 as messages
+
+FLEET_MAIN = os.path.join(benchutil.ROOT, "Fleet", "main.py")
+MULTICAST_ADDR = "224.0.0.1"
+# Próximo valor de cada tipo de atuador, para que todo SET mude o estado
+NEXT_VALUE = {
+    "AC": lambda state: str(int(state) % 3 + 1),
+    "HL": lambda state: "off" if state == "on" else "on",
+}
+
+
+class LoopThread:
+    """Event loop asyncio numa thread própria, para o gateway e a frota in-process."""
+
+    def __init__(self, name):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self.thread.start()
+
+    def call(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+def fleet_ids(args):
+    """IDs dos dispositivos de cada host da frota, na mesma ordem do Fleet/main.py."""
+    hosts = []
+    for p in range(args.processes):
+        offset = p * args.per_host
+        hosts.append([
+            f"{prefix}-{i}"
+            for prefix, count in (("AC", args.ac), ("HL", args.headlight), ("CL", args.carloc))
+            for i in range(offset, offset + per_process(count, args.processes, p))
+        ])
+    return hosts
+
+
+def per_process(count, processes, index):
+    return count // processes + (1 if index < count % processes else 0)
+
+
+class InProcessFleet:
+    """Frota num FleetHost deste processo; o estado aplicado é lido direto dos atuadores."""
+
+    applied_check = "actuator"
+
+    def __init__(self, args):
+        from AsyncDevice import AsyncSimulatedActuator, AsyncSimulatedSensor
+        from FleetHost import FleetHost
+        from Reporting import Reporter, parse_policies
+        from ACLogic.CarACLogic import CarACLogic
+        from CarLocLogic.CarLogic import CarLogic
+        from CarLocLogic.Trajectory import Trajectory
+        from HeadlightLogic.CarHeadlightLogic import CarHeadlightLogic
+
+        trajectory = Trajectory.from_csv(benchutil.COORDINATES_CSV)
+        policies = parse_policies(args.report)
+
+        def car_logic():
+            phase = random.uniform(0, 2 * (trajectory.length - 1))
+            return CarLogic(trajectory=trajectory, speed=1 / args.periodicity, phase=phase)
+
+        self.host = FleetHost(MULTICAST_ADDR, args.multicast_port, args.device_port,
+                              udp_sockets=args.udp_sockets, batch_bytes=args.batch_bytes)
+        for prefix, count, device_class, logic in (
+            ("AC", args.ac, AsyncSimulatedActuator, CarACLogic),
+            ("HL", args.headlight, AsyncSimulatedActuator, CarHeadlightLogic),
+            ("CL", args.carloc, AsyncSimulatedSensor, car_logic),
+        ):
+            for i in range(count):
+                self.host.add_device(device_class(
+                    device_id=f"{prefix}-{i}",
+                    multicast_addr=MULTICAST_ADDR,
+                    multicast_port=args.multicast_port,
+                    port=args.device_port,
+                    simulator=logic(),
+                    periodicity=args.periodicity,
+                    typed_payload=args.typed_payload or args.compact_location,
+                    compact_location=args.compact_location,
+                    reporter=Reporter(policies) if policies else None,
+                ))
+        self.device_ids = [device.device_id for device in self.host.devices]
+        self.loop = LoopThread("fleet")
+        self.done = self.loop.submit(self.host.serve())
+
+    def current_state(self, gateway, device_id):
+        return str(self.host.actuators[device_id].simulator.current_state)
+
+    def stop(self, timeout):
+        """Encerra a frota e devolve as estatísticas do FleetHost (leituras enviadas e suprimidas)."""
+        self.loop.loop.call_soon_threadsafe(self.host.stopping.set)
+        self.done.result(timeout)
+        return self.host.stats()
+
+
+class SubprocessFleet:
+    """Frota em processos Fleet/main.py; o estado aplicado é observado pela telemetria no gateway."""
+
+    applied_check = "telemetry"
+
+    def __init__(self, args):
+        self.stats_dir = tempfile.TemporaryDirectory()
+        self.device_ids = [device_id for host in fleet_ids(args) for device_id in host]
+        self.processes = []
+        for p in range(args.processes):
+            command = [
+                sys.executable, FLEET_MAIN,
+                "--ac", str(per_process(args.ac, args.processes, p)),
+                "--headlight", str(per_process(args.headlight, args.processes, p)),
+                "--carloc", str(per_process(args.carloc, args.processes, p)),
+                "--id-offset", str(p * args.per_host),
+                "--port", str(args.device_port + p),
+                "--multicast-port", str(args.multicast_port),
+                "--udp-sockets", str(args.udp_sockets),
+                "--periodicity", str(args.periodicity),
+                "--batch-bytes", str(args.batch_bytes),
+                "--stats-file", os.path.join(self.stats_dir.name, f"{p}.json"),
+            ]
+            if args.typed_payload:
+                command.append("--typed-payload")
+            if args.compact_location:
+                command.append("--compact-location")
+            if args.report:
+                command.extend(["--report", args.report])
+            self.processes.append(subprocess.Popen(command, stdout=subprocess.DEVNULL))
+
+    def current_state(self, gateway, device_id):
+        # "AC|estado|temperatura" ou "Headlight|on/off"
+        return gateway.registry.get(device_id).last_state.split("|")[1]
+
+    def stop(self, timeout):
+        """Encerra a frota (SIGTERM) e devolve as estatísticas somadas dos hosts."""
+        for process in self.processes:
+            process.terminate()
+        stats = {}
+        for p, process in enumerate(self.processes):
+            process.wait(timeout)
+            with open(os.path.join(self.stats_dir.name, f"{p}.json")) as stats_file:
+                for key, value in json.load(stats_file).items():
+                    stats[key] = stats.get(key, 0) + value
+        self.stats_dir.cleanup()
+        return stats
+
+    def kill(self):
+        for process in self.processes:
+            process.kill()
+
+
+def wait_for_discovery(gateway, device_ids, timeout):
+    """Espera todos os dispositivos registrados e com uma leitura recebida."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if all((device := gateway.registry.get(device_id)) and device.last_state for device_id in device_ids):
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def run_gets(client, device_ids, rate, stop, latencies, errors):
+    interval = 1 / rate if rate > 0 else 0
+    next_send = time.perf_counter()
+    while not stop.is_set():
+        request = messages.ClientMessage(request=f"GET_DEVICE_STATE|{random.choice(device_ids)}")
+        t0 = time.perf_counter()
+        try:
+            response = client.request(request)
+            if "LastState=" not in response.response:
+                errors.append(response.response)
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        latencies.append(time.perf_counter() - t0)
+        next_send += interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            stop.wait(delay)
+        else:
+            next_send = time.perf_counter()
+
+
+def run_sets(client, gateway, fleet, actuator_ids, stop, timeout, latencies, errors):
+    # Um SET por vez: cada amostra mede do envio até o atuador aplicar o valor
+    while actuator_ids and not stop.is_set():
+        device_id = random.choice(actuator_ids)
+        value = NEXT_VALUE[device_id.split("-")[0]](fleet.current_state(gateway, device_id))
+        t0 = time.perf_counter()
+        try:
+            client.request(messages.ClientMessage(request=f"SET_DEVICE_STATE|{device_id}|{value}"))
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        while fleet.current_state(gateway, device_id) != value:
+            if time.perf_counter() - t0 > timeout:
+                errors.append(f"{device_id}: {value} not applied after {timeout}s")
+                break
+            time.sleep(0.002)
+        else:
+            latencies.append(time.perf_counter() - t0)
+
+
+def latency_summary(latencies, errors):
+    return {
+        "samples": len(latencies),
+        "errors": len(errors),
+        "p50_ms": round(benchutil.percentile(latencies, 50) * 1e3, 3),
+        "p99_ms": round(benchutil.percentile(latencies, 99) * 1e3, 3),
+        "max_ms": round(max(latencies, default=0) * 1e3, 3),
+        "first_errors": errors[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ac", type=int, default=50)
+    parser.add_argument("--headlight", type=int, default=50)
+    parser.add_argument("--carloc", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=0, help="Subprocessos Fleet/main.py (0 roda a frota in-process)")
+    parser.add_argument("--periodicity", type=float, default=1.0, help="Intervalo de telemetria de cada dispositivo (s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Janela de medição (s)")
+    parser.add_argument("--warmup", type=float, default=30.0, help="Tempo máximo para a descoberta de toda a frota (s)")
+    parser.add_argument("--get-rate", type=float, default=200.0, help="GET_DEVICE_STATE/s (0 = sem limite)")
+    parser.add_argument("--set-timeout", type=float, default=10.0)
+    parser.add_argument("--udp-sockets", type=int, default=4)
+    parser.add_argument("--batch-bytes", type=int, default=0)
+    parser.add_argument("--typed-payload", action="store_true")
+    parser.add_argument("--compact-location", action="store_true")
+    parser.add_argument("--report", default=None, help='Política de report-on-change da frota (ex. "on")')
+    parser.add_argument("--ingest-workers", type=int, default=0, help="Processos de ingestão no gateway (SO_REUSEPORT)")
+    parser.add_argument("--framed", action="store_true", help="GatewayClient com conexões persistentes")
+    parser.add_argument("--multicast-port", type=int, default=19899)
+    parser.add_argument("--device-port", type=int, default=19900)
+    parser.add_argument("--output", help="Arquivo JSON com o resultado (além do stdout)")
+    args = parser.parse_args()
+    args.processes_requested = args.processes
+    args.per_host = max(args.ac, args.headlight, args.carloc)
+    in_process = args.processes == 0
+    args.processes = max(1, args.processes)
+
+    real_stdout = benchutil.silence_stdout()
+    from Client import GatewayClient
+    from Gateway import Gateway
+
+    gateway = Gateway(multicast_port=args.multicast_port, udp_port=0, tcp_port=0,
+                      advertise_ip="127.0.0.1", discovery_interval=1,
+                      ingest_workers=args.ingest_workers)
+    gateway_loop = LoopThread("gateway")
+    gateway_loop.call(gateway.start())
+
+    fleet = InProcessFleet(args) if in_process else SubprocessFleet(args)
+    try:
+        started = time.time()
+        if not wait_for_discovery(gateway, fleet.device_ids, args.warmup):
+            missing = sum(1 for device_id in fleet.device_ids if not gateway.registry.get(device_id))
+            print(f"loadtest: {missing} dispositivos não descobertos em {args.warmup}s", file=sys.stderr)
+        discovery_s = time.time() - started
+
+        actuator_ids = [device_id for device_id in fleet.device_ids if not device_id.startswith("CL-")]
+        get_client = GatewayClient("127.0.0.1", gateway.tcp_port, framed=args.framed, pool_size=1)
+        set_client = GatewayClient("127.0.0.1", gateway.tcp_port, framed=args.framed, pool_size=1)
+        get_latencies, get_errors, set_latencies, set_errors = [], [], [], []
+        stop = threading.Event()
+        clients = [
+            threading.Thread(target=run_gets, args=(get_client, fleet.device_ids, args.get_rate, stop,
+                                                    get_latencies, get_errors)),
+            threading.Thread(target=run_sets, args=(set_client, gateway, fleet, actuator_ids, stop,
+                                                    args.set_timeout, set_latencies, set_errors)),
+        ]
+
+        readings_before = gateway.readings_received
+        window_start = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        stop.wait(args.duration)
+        stop.set()
+        for thread in clients:
+            thread.join()
+        window = time.perf_counter() - window_start
+        ingested = gateway.readings_received - readings_before
+        get_client.close()
+        set_client.close()
+
+        # Loss: tudo o que a frota enviou contra tudo o que chegou, depois que a frota termina
+        fleet_stats = fleet.stop(30)
+        sent = fleet_stats["readings_sent"]
+        time.sleep(0.5)
+    except BaseException:
+        if not in_process:
+            fleet.kill()
+        raise
+    gateway_loop.call(gateway.stop())
+    received = gateway.readings_received
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "ac": args.ac,
+            "headlight": args.headlight,
+            "carloc": args.carloc,
+            "processes": args.processes_requested,
+            "periodicity": args.periodicity,
+            "duration": args.duration,
+            "get_rate": args.get_rate,
+            "batch_bytes": args.batch_bytes,
+            "typed_payload": args.typed_payload,
+            "compact_location": args.compact_location,
+            "report": args.report,
+            "framed": args.framed,
+            "ingest_workers": args.ingest_workers,
+        },
+        "discovery_s": round(discovery_s, 3),
+        "devices_registered": len(gateway.registry),
+        "expected_readings_per_s": round(len(fleet.device_ids) / args.periodicity, 1),
+        "ingest_readings_per_s": round(ingested / window, 1),
+        "readings_sent": sent,
+        "readings_suppressed": fleet_stats["readings_suppressed"],
+        "readings_received": received,
+        "datagrams_received": gateway.datagrams_received,
+        "unknown_readings": gateway.unknown_readings,
+        "undecodable_readings": gateway.undecodable_readings,
+        "loss": round(1 - received / sent, 5) if sent else 0.0,
+        "get": latency_summary(get_latencies, get_errors),
+        "set": dict(latency_summary(set_latencies, set_errors), applied_check=fleet.applied_check),
+    }
+    benchutil.restore_stdout(real_stdout)
+    benchutil.report(result)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import asyncio
+import collections
+import itertools
+from messages import messages_pb2 as messages
+from Framing import PREFACE, encode_frame, read_frame
+
+
+class AsyncFramedConnection:
+    """Conexão enquadrada com várias requisições em voo; as respostas resolvem os futures em ordem.
+
+    Respostas com update=True são pushes de uma assinatura (SUBSCRIBE) e vão para
+    on_update, sem consumir nenhum future.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = collections.deque()
+        self.on_update = None  # Chamado com cada push, ou com a exceção que fechou a conexão
+        self.reader_task = asyncio.ensure_future(self.read_responses())
+
+    @classmethod
+    async def open(cls, gateway_ip, tcp_port):
+        reader, writer = await asyncio.open_connection(gateway_ip, tcp_port)
+        writer.write(PREFACE)
+        return cls(reader, writer)
+
+    @property
+    def closed(self):
+        return self.reader_task.done()
+
+    def request(self, message):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(future)
+        self.writer.write(encode_frame(message))
+        return future
+
+    async def read_responses(self):
+        error = ConnectionError("Conexão fechada pelo gateway")
+        try:
+            while True:
+                frame = await read_frame(self.reader)
+                if frame is None:
+                    break
+                response = messages.ClientResponse()
+                response.ParseFromString(frame)
+                if response.update:
+                    if self.on_update is not None:
+                        self.on_update(response)
+                    continue
+                future = self.pending.popleft()
+                # Uma requisição que estourou o timeout ainda ocupa sua posição na fila
+                if not future.done():
+                    future.set_result(response)
+        except Exception as e:
+            error = e
+        while self.pending:
+            future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+        if self.on_update is not None:
+            self.on_update(error)
+
+    async def close(self):
+        self.writer.close()
+        self.reader_task.cancel()
+
+
+class Subscription:
+    """Assinatura de estados (SUBSCRIBE) em uma conexão enquadrada própria.
+
+    states começa com o estado de cada dispositivo na hora da assinatura e é atualizado
+    a cada push; next_update() espera uma mudança e devolve {device_id: estado} com
+    tudo o que mudou desde a chamada anterior. Como no gateway, as mudanças ainda não
+    lidas se fundem por dispositivo: quem demora a ler recebe só o último estado.
+    """
+
+    def __init__(self, conn, response, buffered=()):
+        self.conn = conn
+        self.states = {state.device_id: state.state for state in response.states if state.found}
+        self.changed = {}
+        self.ready = asyncio.Event()
+        self.error = None
+        conn.on_update = self.receive
+        # Pushes que chegaram junto com a resposta, antes desta Subscription existir
+        for update in buffered:
+            self.receive(update)
+
+    def receive(self, update):
+        if isinstance(update, Exception):
+            self.error = update
+        else:
+            for state in update.states:
+                self.changed[state.device_id] = state.state
+        self.ready.set()
+
+    async def next_update(self):
+        while not self.changed:
+            if self.error is not None:
+                raise self.error
+            self.ready.clear()
+            await self.ready.wait()
+        changed, self.changed = self.changed, {}
+        self.states.update(changed)
+        return changed
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.next_update()
+        except ConnectionError:
+            raise StopAsyncIteration from None
+
+    async def add(self, device_ids):
+        await self.conn.request(messages.ClientMessage(request="SUBSCRIBE", device_ids=list(device_ids)))
+
+    async def remove(self, device_ids):
+        await self.conn.request(messages.ClientMessage(request="UNSUBSCRIBE", device_ids=list(device_ids)))
+
+    async def close(self):
+        await self.conn.close()
+
+
+class AsyncGatewayClient:
+    """Cliente asyncio do gateway, com fan-out concorrente para muitos dispositivos.
+
+    No modo framed (gateway em Python) usa connections conexões persistentes com
+    pipelining; no modo cru abre uma conexão por requisição, como o gateway Go exige.
+    max_concurrency limita as requisições em voo e timeout vale para cada requisição.
+    """
+
+    def __init__(self, gateway_ip, tcp_port, framed=False, connections=4, max_concurrency=256, timeout=5.0):
+        self.gateway_ip = gateway_ip
+        self.tcp_port = tcp_port
+        self.framed = framed
+        self.timeout = timeout
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.connections = [None] * max(1, connections)
+        self.next_connection = itertools.cycle(range(len(self.connections)))
+        self.connect_lock = asyncio.Lock()
+
+    async def _connection(self):
+        index = next(self.next_connection)
+        conn = self.connections[index]
+        if conn is None or conn.closed:
+            async with self.connect_lock:
+                conn = self.connections[index]
+                if conn is None or conn.closed:
+                    conn = self.connections[index] = await AsyncFramedConnection.open(self.gateway_ip, self.tcp_port)
+        return conn
+
+    async def _request_raw(self, message):
+        reader, writer = await asyncio.open_connection(self.gateway_ip, self.tcp_port)
+        try:
+            writer.write(message.SerializeToString())
+            data = await reader.read(65535)
+        finally:
+            writer.close()
+        response = messages.ClientResponse()
+        response.ParseFromString(data)
+        return response
+
+    async def request(self, message):
+        """Envia uma ClientMessage e devolve a ClientResponse (asyncio.TimeoutError após timeout)."""
+        async with self.slots:
+            if self.framed:
+                conn = await self._connection()
+                return await asyncio.wait_for(conn.request(message), self.timeout)
+            return await asyncio.wait_for(self._request_raw(message), self.timeout)
+
+    async def get_state(self, device_id):
+        response = await self.request(messages.ClientMessage(request=f"GET_DEVICE_STATE|{device_id}"))
+        return response.response
+
+    async def set_state(self, device_id, value):
+        response = await self.request(messages.ClientMessage(request=f"SET_DEVICE_STATE|{device_id}|{value}"))
+        return response.response
+
+    async def get_states(self, device_ids):
+        """Consulta vários dispositivos em paralelo; falhas aparecem como exceções no dicionário."""
+        results = await asyncio.gather(*(self.get_state(device_id) for device_id in device_ids), return_exceptions=True)
+        return dict(zip(device_ids, results))
+
+    async def set_states(self, values):
+        """Aplica {device_id: valor} em paralelo; falhas aparecem como exceções no dicionário."""
+        device_ids = list(values)
+        results = await asyncio.gather(
+            *(self.set_state(device_id, values[device_id]) for device_id in device_ids), return_exceptions=True
+        )
+        return dict(zip(device_ids, results))
+
+    async def get_states_bulk(self, device_ids, chunk_size=1000):
+        """GET_DEVICE_STATES em blocos de chunk_size IDs; devolve {device_id: DeviceState}."""
+        device_ids = list(device_ids)
+        chunks = [device_ids[i:i + chunk_size] for i in range(0, len(device_ids), chunk_size)]
+        responses = await asyncio.gather(*(
+            self.request(messages.ClientMessage(request="GET_DEVICE_STATES", device_ids=chunk)) for chunk in chunks
+        ))
+        return {state.device_id: state for response in responses for state in response.states}
+
+    async def set_states_bulk(self, values, chunk_size=1000):
+        """SET_DEVICE_STATES de {device_id: valor}; devolve {device_id: DeviceState} com error vazio se aplicado."""
+        states = [messages.DeviceState(device_id=device_id, state=str(value)) for device_id, value in values.items()]
+        chunks = [states[i:i + chunk_size] for i in range(0, len(states), chunk_size)]
+        responses = await asyncio.gather(*(
+            self.request(messages.ClientMessage(request="SET_DEVICE_STATES", states=chunk)) for chunk in chunks
+        ))
+        return {state.device_id: state for response in responses for state in response.states}
+
+    async def subscribe(self, device_ids):
+        """SUBSCRIBE (somente no gateway em Python): device_ids ou ["*"] para todos; devolve uma Subscription."""
+        conn = await AsyncFramedConnection.open(self.gateway_ip, self.tcp_port)
+        # O gateway pode mandar pushes logo depois da resposta: guarda-os até a Subscription assumir
+        buffered = []
+        conn.on_update = buffered.append
+        message = messages.ClientMessage(request="SUBSCRIBE", device_ids=list(device_ids))
+        try:
+            response = await asyncio.wait_for(conn.request(message), self.timeout)
+        except BaseException:
+            await conn.close()
+            raise
+        return Subscription(conn, response, buffered)
+
+    async def close(self):
+        for conn in self.connections:
+            if conn is not None:
+                await conn.close()
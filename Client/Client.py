@@ -1,29 +1,124 @@
+import asyncio
+import json
+import os
 import socket
+import sys
 from messages import messages_pb2 as messages
 import threading
 
+# Framing.py vem de DeviceClasses, compartilhado com o gateway em Python
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DeviceClasses"))
+
+from AsyncGatewayClient import AsyncGatewayClient
+from ConnectionPool import ConnectionPool
+
+BULK_REQUESTS = ("GET_DEVICE_STATES", "SET_DEVICE_STATES")
+RAW_SETTLE = 0.05  # Espera por mais segmentos de uma resposta em lote crua que já parseia
+
 
 class GatewayClient:
-    def __init__(self, gateway_ip, tcp_port):
+    def __init__(self, gateway_ip, tcp_port, framed=False, pool_size=4):
         self.gateway_ip = gateway_ip
         self.tcp_port = tcp_port
         self.running = True
+        # Conexões persistentes com frames exigem o gateway em Python; o gateway Go só entende o modo cru
+        self.pool = ConnectionPool(gateway_ip, tcp_port, pool_size) if framed else None
+
+    def request(self, message):
+        """Envia uma ClientMessage e devolve a ClientResponse."""
+        if self.pool is not None:
+            return self.pool.request_many([message])[0]
+        # Modo cru: uma conexão por requisição
+        with socket.create_connection((self.gateway_ip, self.tcp_port)) as tcp_socket:
+            tcp_socket.sendall(message.SerializeToString())
+            return self.read_raw_response(tcp_socket, message.request in BULK_REQUESTS)
+
+    def read_raw_response(self, tcp_socket, bulk):
+        # Sem frames não há tamanho: recebe até a resposta parsear; um lote cortado entre
+        # dois campos também parseia, então espera RAW_SETTLE por mais segmentos
+        data = b""
+        response = None
+        while True:
+            try:
+                chunk = tcp_socket.recv(65535)
+            except socket.timeout:
+                return response
+            if not chunk:
+                if response is None:
+                    raise ConnectionError("gateway fechou a conexão sem responder")
+                return response
+            data += chunk
+            try:
+                response = messages.ClientResponse.FromString(data)
+            except Exception:
+                response = None
+                tcp_socket.settimeout(None)
+                continue
+            if not bulk:
+                return response
+            tcp_socket.settimeout(RAW_SETTLE)
+
+    def request_many(self, client_messages):
+        """Envia várias ClientMessage em pipeline numa conexão do pool (somente no modo com frames)."""
+        if self.pool is None:
+            return [self.request(message) for message in client_messages]
+        return self.pool.request_many(client_messages)
+
+    def get_states_bulk(self, device_ids, chunk_size=1000):
+        """GET_DEVICE_STATES em blocos de chunk_size IDs; devolve {device_id: DeviceState}."""
+        device_ids = list(device_ids)
+        # No modo cru a resposta vem em um único recv: blocos menores cabem nele
+        responses = self.request_many([
+            messages.ClientMessage(request="GET_DEVICE_STATES", device_ids=device_ids[i:i + chunk_size])
+            for i in range(0, len(device_ids), chunk_size)
+        ])
+        return {state.device_id: state for response in responses for state in response.states}
+
+    def set_states_bulk(self, values, chunk_size=1000):
+        """SET_DEVICE_STATES de {device_id: valor} em blocos de chunk_size dispositivos."""
+        states = [messages.DeviceState(device_id=device_id, state=str(value)) for device_id, value in values.items()]
+        responses = self.request_many([
+            messages.ClientMessage(request="SET_DEVICE_STATES", states=states[i:i + chunk_size])
+            for i in range(0, len(states), chunk_size)
+        ])
+        return {state.device_id: state for response in responses for state in response.states}
+
+    def get_history(self, device_id, query, *args):
+        """GET_DEVICE_HISTORY (somente no gateway em Python): ex. get_history("AC-1", "stats", t0, t1)."""
+        request = "|".join(["GET_DEVICE_HISTORY", device_id, query, *(str(arg) for arg in args)])
+        response = self.request(messages.ClientMessage(request=request))
+        try:
+            return json.loads(response.response)
+        except ValueError:
+            raise RuntimeError(response.response) from None
 
     def send_tcp_message(self, message):
         """Serializa e envia mensagem Protobuf via TCP."""
-        tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        tcp_socket.connect((self.gateway_ip, self.tcp_port))
-        data = message.SerializeToString()
-        tcp_socket.sendall(data)
+        response = self.request(message)
         print(f"Mensagem TCP enviada para {self.gateway_ip}:{self.tcp_port}")
-        response_data = tcp_socket.recv(1024)
-        response = messages.ClientResponse()
-        response.ParseFromString(response_data)
         print(f"Resposta TCP do gateway: {response.response}")
-        tcp_socket.close()
+        return response
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
 
     def run(self):
         """Loop principal para enviar mensagens e escutar respostas."""
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            self.running = False
+            print("\nEncerrando cliente...")
+
+    async def run_async(self):
+        """CLI interativa sobre o AsyncGatewayClient."""
+        client = AsyncGatewayClient(self.gateway_ip, self.tcp_port, framed=self.pool is not None)
+        loop = asyncio.get_running_loop()
+
+        async def ask(prompt):
+            # input() bloqueia: roda fora do event loop
+            return await loop.run_in_executor(None, input, prompt)
 
         # Loop para enviar mensagens
         try:
@@ -31,24 +126,35 @@ class GatewayClient:
                 print("\nEscolha:")
                 print("1 - Enviar mensagem TCP")
                 print("2 - Sair")
-                choice = input("Opção: ").strip()
+                print("3 - Consultar o estado de vários dispositivos")
+                choice = (await ask("Opção: ")).strip()
                 if choice == '1':
                     message = messages.ClientMessage()
-                    message.request = input("Digite a mensagem TCP: ")
-                    self.send_tcp_message(message)
+                    message.request = await ask("Digite a mensagem TCP: ")
+                    try:
+                        response = await client.request(message)
+                    except (OSError, asyncio.TimeoutError) as e:
+                        print(f"Erro ao enviar mensagem TCP: {e!r}")
+                        continue
+                    print(f"Mensagem TCP enviada para {self.gateway_ip}:{self.tcp_port}")
+                    print(f"Resposta TCP do gateway: {response.response}")
                 elif choice == '2':
                     self.running = False
                     print("Cliente encerrado.")
+                elif choice == '3':
+                    device_ids = [d.strip() for d in (await ask("IDs separados por vírgula: ")).split(",") if d.strip()]
+                    for device_id, state in (await client.get_states(device_ids)).items():
+                        print(f"{device_id}: {state}")
                 else:
                     print("Opção inválida!")
-        except KeyboardInterrupt:
-            self.running = False
-            print("\nEncerrando cliente...")
+        finally:
+            await client.close()
 
 # Configurações do Gateway
 GATEWAY_IP = "127.0.0.1"  # Substitua pelo IP do gateway
 TCP_PORT = 9991
+FRAMED = False  # True para conexões persistentes com frames (somente com o gateway em Python)
 
 if __name__ == "__main__":
-    client = GatewayClient(GATEWAY_IP, TCP_PORT)
+    client = GatewayClient(GATEWAY_IP, TCP_PORT, framed=FRAMED)
     client.run()
@@ -0,0 +1,81 @@
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+from messages import messages_pb2 as messages
+from Framing import PREFACE, FrameBuffer, encode_frame
+
+
+class FramedConnection:
+    """Conexão TCP persistente com o gateway, com mensagens enquadradas por tamanho."""
+
+    def __init__(self, gateway_ip, tcp_port, timeout=5.0):
+        self.sock = socket.create_connection((gateway_ip, tcp_port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(PREFACE)
+        self.buffer = FrameBuffer()
+        self.ready = []
+
+    def send(self, client_messages):
+        self.sock.sendall(b"".join(encode_frame(message) for message in client_messages))
+
+    def receive(self, count):
+        """Lê count respostas, na mesma ordem em que as requisições foram enviadas."""
+        while len(self.ready) < count:
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("Conexão fechada pelo gateway")
+            self.buffer.feed(data)
+            self.ready.extend(self.buffer.frames())
+        frames, self.ready = self.ready[:count], self.ready[count:]
+        responses = []
+        for frame in frames:
+            response = messages.ClientResponse()
+            response.ParseFromString(frame)
+            responses.append(response)
+        return responses
+
+    def close(self):
+        self.sock.close()
+
+
+class ConnectionPool:
+    """Mantém até size conexões enquadradas abertas e as reutiliza entre requisições."""
+
+    def __init__(self, gateway_ip, tcp_port, size=4, timeout=5.0):
+        self.gateway_ip = gateway_ip
+        self.tcp_port = tcp_port
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        self.slots.acquire()
+        try:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                conn = FramedConnection(self.gateway_ip, self.tcp_port, self.timeout)
+            try:
+                yield conn
+            except BaseException:
+                # Estado da conexão desconhecido (resposta pela metade): descarta
+                conn.close()
+                raise
+            self.idle.put(conn)
+        finally:
+            self.slots.release()
+
+    def request_many(self, client_messages):
+        """Envia todas as mensagens de uma vez (pipelining) em uma conexão e lê as respostas."""
+        with self.connection() as conn:
+            conn.send(client_messages)
+            return conn.receive(len(client_messages))
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
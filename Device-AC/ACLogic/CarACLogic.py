@@ -1,33 +1,119 @@
+import logging
 import random
+import numpy as np
+from DeviceLog import sampled
+
+log = logging.getLogger(__name__)
+reading_log = sampled(log)  # Uma linha por leitura: amostrada
+
+BASE_TEMP = 30  # Temperatura base em graus Celsius
+REDUCTION_PER_STATE = 5  # Redução por nível do estado
+STATES = (1, 2, 3)
+
+
+def noise_generator(rng):
+    # Gerador NumPy semeado a partir do rng: com um random.Random semeado, os lotes
+    # também se repetem bit a bit
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+def parse_state(data):
+    """Estado 1, 2 ou 3 de um comando ("2", " 2", "2.0"); None se o valor for inválido."""
+    try:
+        value = float(data)
+    except (TypeError, ValueError):
+        return None
+    if value.is_integer() and int(value) in STATES:
+        return int(value)
+    return None
+
+
+def state_temperatures(states):
+    """Temperatura sem ruído de cada estado (escalar ou array)."""
+    return BASE_TEMP - (np.asarray(states) - 1) * REDUCTION_PER_STATE
+
 
 class CarACLogic:
-    def __init__(self, step=1):
+    def __init__(self, step=1, rng=None):
         self.step = step
         self.index = 0
-        self.current_state = random.choice([1, 2, 3])  # Estado inicial aleatório
+        self.rng = rng or random  # random.Random semeado para simulações reproduzíveis
+        self.current_state = self.rng.choice([1, 2, 3])  # Estado inicial aleatório
+        self.generator = None  # Ruído dos lotes, criado no primeiro get_batch
 
-    def get_data(self):
+    def get_data(self, message=None):
         self.index += self.step
         temp = self.calculate_temperature()  # Calcula a temperatura baseada no estado atual
-        print(f"AC|{self.current_state}|{temp:.1f}" ,flush=True)
-        return f"AC|{self.current_state}|{temp:.1f}"  # Formata com uma casa decimal
+        if message is not None:
+            # Payload tipado: preenche o AcReading direto na DeviceMessage
+            message.ac.state = self.current_state
+            message.ac.temperature = temp
+            return message
+        data = f"AC|{self.current_state}|{temp:.1f}"  # Formata com uma casa decimal
+        reading_log.debug("%s", data)
+        return data
+
+    def get_batch(self, n):
+        """n leituras de uma vez: (estados, temperaturas) em arrays, com o ruído sorteado em bloco.
+
+        O ruído vem de um gerador NumPy próprio, e não do random de get_data: com o mesmo
+        rng semeado, dois lotes de n são idênticos a um lote de 2n.
+        """
+        if self.generator is None:
+            self.generator = noise_generator(self.rng)
+        self.index += self.step * n
+        states = np.full(n, self.current_state, dtype=np.int8)
+        return states, state_temperatures(self.current_state) + self.generator.uniform(-1.0, 1.0, n)
+
+    def parse_command(self, data):
+        # Valor normalizado do comando, ou None se set_data vai rejeitá-lo
+        return parse_state(data)
 
     def set_data(self, data):
-        try:
-            # Atualiza o estado do ar condicionado se for 1, 2 ou 3
-            data = int(data)
-            if data in [1, 2, 3]:
-                self.current_state = data
-                print(f"CarACLogic: Estado atualizado para {self.current_state}")
-            else:
-                print("CarACLogic: Valor inválido. O estado deve ser 1, 2 ou 3.")
-        except ValueError:
-            print("CarACLogic: Valor inválido recebido. Deve ser um número inteiro.")
+        # Devolve o estado depois do comando: igual ao anterior se o valor for inválido
+        state = parse_state(data)
+        if state is None:
+            log.warning("CarACLogic: Valor inválido %r. O estado deve ser 1, 2 ou 3.", data)
+        else:
+            # Atualiza o estado do ar condicionado
+            self.current_state = state
+            log.info("CarACLogic: Estado atualizado para %s", self.current_state)
+        return self.current_state
 
     def calculate_temperature(self):
         # Define uma faixa de temperatura para cada estado
-        base_temp = 30  # Temperatura base em graus Celsius
-        reduction_per_state = 5  # Redução por nível do estado
-        temp = base_temp - (self.current_state - 1) * reduction_per_state
-        noise = random.uniform(-1.0, 1.0)  # Ruído aleatório entre -1 e 1
+        temp = BASE_TEMP - (self.current_state - 1) * REDUCTION_PER_STATE
+        noise = self.rng.uniform(-1.0, 1.0)  # Ruído aleatório entre -1 e 1
         return temp + noise
+
+
+class CarACFleetLogic:
+    """Lógica de count ares-condicionados em arrays: uma posição por dispositivo.
+
+    get_batch(n) gera n leituras de todos os dispositivos com um único bloco de ruído
+    (n x count). set_data(i, data) aplica um comando ao dispositivo i com a mesma
+    validação do CarACLogic.
+    """
+
+    def __init__(self, count, step=1, rng=None):
+        self.step = step
+        self.index = 0
+        self.generator = noise_generator(rng or random)
+        self.states = self.generator.integers(1, 4, count, dtype=np.int8)  # Estados iniciais aleatórios
+
+    def __len__(self):
+        return len(self.states)
+
+    def get_batch(self, n=1):
+        """(estados, temperaturas) com forma (n, count); os estados não mudam dentro do lote."""
+        self.index += self.step * n
+        noise = self.generator.uniform(-1.0, 1.0, (n, len(self.states)))
+        return np.broadcast_to(self.states, noise.shape), state_temperatures(self.states) + noise
+
+    def set_data(self, index, data):
+        state = parse_state(data)
+        if state is None:
+            log.warning("CarACFleetLogic: Valor inválido %r. O estado deve ser 1, 2 ou 3.", data)
+        else:
+            self.states[index] = state
+        return int(self.states[index])
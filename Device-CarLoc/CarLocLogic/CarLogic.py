@@ -1,25 +1,81 @@
-import xml.etree.ElementTree as ET
-import csv
-import math
-
-
-
-class CarLogic:
-    def __init__(self, csv_file,step = 1):
-        self.coordinates = []
-        self.step = step
-        self.index = 0
-        with open(csv_file, mode="r") as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip the header
-            for row in reader:
-                x, y = map(float, row)
-                self.coordinates.append((x, y))
-
-        for i in range(len(self.coordinates)-1,-1,-1):
-            self.coordinates.append(self.coordinates[i])
-
-    def get_data(self):
-        self.index+=self.step
-        data = self.coordinates[self.index%len(self.coordinates)]
-        return f"{data[0]}|{data[1]}"
\ No newline at end of file
+import numpy as np
+from Clock import REAL_CLOCK
+from .Trajectory import Trajectory
+
+
+
+class CarLogic:
+    def __init__(self, csv_file=None, step=1, trajectory=None, speed=None, phase=0.0, clock=None):
+        # Vários carros podem compartilhar a mesma Trajectory em vez de cada um ler o CSV
+        self.trajectory = trajectory if trajectory is not None else Trajectory.from_csv(csv_file)
+        self.step = step
+        self.index = 0
+        # Com speed (pontos/s) a posição é interpolada pelo tempo; sem, avança step pontos por leitura
+        self.speed = speed
+        self.phase = phase
+        # O mesmo relógio dos dispositivos: acelerado ou virtual, a rota anda junto
+        self.clock = clock or REAL_CLOCK
+        self.start_time = self.clock.time()
+
+    def current_position(self):
+        if self.speed is None:
+            self.index += self.step
+            return self.trajectory.point_at(self.index)
+        x, y = self.trajectory.positions(self.clock.time() - self.start_time, self.speed, self.phase)
+        return float(x), float(y)
+
+    def get_batch(self, n, interval=0.0):
+        """n posições de uma vez, em um array (n, 2) de (x, y).
+
+        Sem speed são os próximos n pontos da rota, os mesmos que n chamadas de
+        get_data dariam. Com speed, as posições em agora, agora + interval, ...
+        """
+        if self.speed is None:
+            indices = self.index + self.step * np.arange(1, n + 1)
+            self.index += self.step * n
+            return self.trajectory.points_at(indices)
+        t = self.clock.time() - self.start_time + interval * np.arange(n)
+        return self.trajectory.positions(t, self.speed, self.phase)
+
+    def get_data(self, message=None):
+        data = self.current_position()
+        if message is not None:
+            # Payload tipado: o CSV guarda (x, y) = (longitude, latitude)
+            message.location.lon = data[0]
+            message.location.lat = data[1]
+            return message
+        return f"{data[0]}|{data[1]}"
+
+
+class CarFleetLogic:
+    """count carros na mesma Trajectory, com o índice (ou a fase) de cada um em um array.
+
+    Sem speed, indices guarda a posição de cada carro na rota e get_batch(n) avança
+    todos n pontos, com uma única indexação do array de pontos. Com speed (um valor
+    ou um por carro), as posições são interpoladas pelo clock, como no CarLogic.
+    """
+
+    def __init__(self, trajectory, count, step=1, speed=None, phases=None, clock=None):
+        self.trajectory = trajectory
+        self.step = step
+        self.speed = speed
+        # Cópias: get_batch avança os índices no próprio array
+        if speed is None:
+            self.indices = np.zeros(count, dtype=np.int64) if phases is None else np.array(phases, dtype=np.int64)
+        else:
+            self.phases = np.zeros(count) if phases is None else np.array(phases, dtype=np.float64)
+        self.count = count
+        self.clock = clock or REAL_CLOCK
+        self.start_time = self.clock.time()
+
+    def __len__(self):
+        return self.count
+
+    def get_batch(self, n=1, interval=0.0):
+        """Posições (x, y) de todos os carros em n leituras: array (n, count, 2)."""
+        if self.speed is None:
+            indices = self.indices + self.step * np.arange(1, n + 1)[:, None]
+            self.indices += self.step * n
+            return self.trajectory.points_at(indices)
+        t = (self.clock.time() - self.start_time + interval * np.arange(n))[:, None]
+        return self.trajectory.positions(t, self.speed, self.phases)
@@ -0,0 +1,57 @@
+import numpy as np
+from . import TrajectoryFile
+
+
+class Trajectory:
+    """Rota (x, y) em um array NumPy, compartilhável entre vários carros.
+
+    O percurso é de ida e volta: ao chegar no fim o carro retorna pelo mesmo caminho.
+    A volta é calculada por aritmética de índices, sem duplicar os pontos.
+    points pode ser um memmap em ponto fixo; scale converte os valores para graus.
+    """
+
+    def __init__(self, points, scale=1.0):
+        if isinstance(points, np.memmap):
+            self.points = points.reshape(-1, 2)
+        else:
+            self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(self.points) == 0:
+            raise ValueError("Trajectory precisa de pelo menos um ponto")
+        self.scale = scale
+        self.length = len(self.points)
+
+    @classmethod
+    def from_csv(cls, csv_file, cache=True):
+        # CSV com cabeçalho "x,y", como coordinates.csv
+        if cache:
+            return cls(TrajectoryFile.load_cached(csv_file), TrajectoryFile.SCALE)
+        return cls(np.loadtxt(csv_file, delimiter=",", skiprows=1, ndmin=2))
+
+    def point_at(self, index):
+        """Ponto de índice inteiro na rota de ida e volta (mesma sequência do antigo coordinates + reversed)."""
+        k = index % (2 * self.length)
+        if k >= self.length:
+            k = 2 * self.length - 1 - k
+        x, y = self.points[k]
+        return float(x) / self.scale, float(y) / self.scale
+
+    def points_at(self, indices):
+        """Versão vetorizada de point_at: um array de índices, uma linha (x, y) por índice."""
+        k = np.mod(indices, 2 * self.length)
+        k = np.where(k >= self.length, 2 * self.length - 1 - k, k)
+        return self.points[k] / self.scale
+
+    def positions(self, t, speed=1.0, phase=0.0):
+        """Posições interpoladas no instante t (s), para uma ou muitas combinações de speed e phase.
+
+        speed é dado em pontos da rota por segundo e phase em pontos; ambos podem ser
+        arrays (um valor por carro), e o resultado tem uma linha (x, y) por carro.
+        """
+        if self.length == 1:
+            return np.broadcast_to(self.points[0] / self.scale, np.broadcast(t, speed, phase).shape + (2,)).copy()
+        last = self.length - 1
+        s = np.mod(np.add(phase, np.multiply(speed, t)), 2 * last)
+        s = np.where(s > last, 2 * last - s, s)  # Trecho de volta
+        i = np.minimum(s.astype(np.intp), last - 1)
+        frac = (s - i)[..., None]
+        return (self.points[i] * (1.0 - frac) + self.points[i + 1] * frac) / self.scale
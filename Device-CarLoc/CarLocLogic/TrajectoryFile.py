@@ -0,0 +1,64 @@
+"""Formato binário compacto para rotas grandes, lido por numpy.memmap.
+
+Layout: MAGIC (8 bytes), quantidade de pontos (uint64 little-endian) e os pontos
+como pares int32 (x, y) em ponto fixo de 1e-7 grau (~1 cm), 8 bytes por ponto.
+"""
+import hashlib
+import itertools
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b"CARTRJ01"
+HEADER = struct.Struct("<8sQ")
+SCALE = 1e7  # Pontos em unidades de 1e-7 grau
+CHUNK_LINES = 1 << 20
+
+
+def cache_path(csv_file):
+    return os.path.splitext(csv_file)[0] + ".trj"
+
+
+def build(csv_file, path):
+    """Converte o CSV (cabeçalho "x,y") em blocos, sem carregar a rota inteira na memória."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    count = 0
+    with open(csv_file, mode="r") as source, open(tmp_path, "wb") as target:
+        next(source)  # Pula o cabeçalho
+        target.write(HEADER.pack(MAGIC, 0))
+        while True:
+            lines = list(itertools.islice(source, CHUNK_LINES))
+            if not lines:
+                break
+            chunk = np.loadtxt(lines, delimiter=",", ndmin=2)
+            fixed = np.rint(chunk * SCALE)
+            if np.abs(fixed).max() > np.iinfo(np.int32).max:
+                raise ValueError(f"{csv_file}: coordenadas fora do intervalo do formato")
+            target.write(fixed.astype("<i4").tobytes())
+            count += len(chunk)
+        target.seek(0)
+        target.write(HEADER.pack(MAGIC, count))
+    os.replace(tmp_path, path)
+
+
+def open_points(path):
+    """Abre o arquivo como memmap (N, 2) de int32; divida por SCALE para obter graus."""
+    with open(path, "rb") as file:
+        magic, count = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path}: não é um arquivo de trajetória")
+    return np.memmap(path, dtype="<i4", mode="r", offset=HEADER.size, shape=(count, 2))
+
+
+def load_cached(csv_file):
+    """Devolve os pontos do CSV via memmap, reconstruindo o cache quando o CSV for mais novo."""
+    path = cache_path(csv_file)
+    if not os.access(os.path.dirname(os.path.abspath(path)), os.W_OK):
+        # Diretório somente leitura: guarda o cache no diretório temporário
+        digest = hashlib.sha1(os.path.abspath(csv_file).encode()).hexdigest()[:16]
+        path = os.path.join(tempfile.gettempdir(), f"trajectory-{digest}.trj")
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(csv_file):
+        build(csv_file, path)
+    return open_points(path)
@@ -2,6 +2,16 @@ DEVICE_ID=${1:-"CL-1"}
 PORT=${2:-9997}
 
 sudo cp ../DeviceClasses/SimulatedSensor.py SimulatedSensor.py
+sudo cp ../DeviceClasses/AsyncDevice.py AsyncDevice.py
+sudo cp ../DeviceClasses/Payloads.py Payloads.py
+sudo cp ../DeviceClasses/Framing.py Framing.py
+sudo cp ../DeviceClasses/Metrics.py Metrics.py
+sudo cp ../DeviceClasses/DeviceLog.py DeviceLog.py
+sudo cp ../DeviceClasses/DiscoveryResponder.py DiscoveryResponder.py
+sudo cp ../DeviceClasses/Scheduler.py Scheduler.py
+sudo cp ../DeviceClasses/Clock.py Clock.py
+sudo cp ../DeviceClasses/Reporting.py Reporting.py
+sudo cp ../DeviceClasses/LocationCodec.py LocationCodec.py
 sudo docker build -t device-carloc .
 #docker run -p 9998:9998 --network my-network device-carloc
-sudo docker run --rm -p "$PORT:$PORT" device-carloc "$DEVICE_ID" "$PORT"
+sudo docker run --rm -e DEVICE_RUNTIME="${DEVICE_RUNTIME:-async}" -e DEVICE_PAYLOAD="${DEVICE_PAYLOAD:-string}" -e DEVICE_REPORT="${DEVICE_REPORT:-}" -e DEVICE_METRICS_PORT="${DEVICE_METRICS_PORT:-}" -e DEVICE_LOG_LEVEL="${DEVICE_LOG_LEVEL:-INFO}" -e DEVICE_LOG_SAMPLE="${DEVICE_LOG_SAMPLE:-100}" -p "$PORT:$PORT" ${DEVICE_METRICS_PORT:+-p "$DEVICE_METRICS_PORT:$DEVICE_METRICS_PORT"} device-carloc "$DEVICE_ID" "$PORT"
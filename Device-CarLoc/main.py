@@ -1,5 +1,5 @@
+import os
 import sys
-import SimulatedSensor
 from CarLocLogic.CarLogic import CarLogic
 
 # Configurações padrão
@@ -30,16 +30,50 @@ else:
 print(f"ID do dispositivo: {device_id}")
 print(f"Porta: {port}")
 
+# Runtime do dispositivo: "async" (um único event loop) ou "thread" (uma thread por broker)
+runtime = os.environ.get("DEVICE_RUNTIME", "async")
+if runtime == "thread":
+    import SimulatedSensor
+    device_class = SimulatedSensor.SimulatedSensor
+else:
+    import AsyncDevice
+    device_class = AsyncDevice.AsyncSimulatedSensor
+print(f"Runtime: {runtime}")
+
+# Logs em uma thread separada; nível e amostragem via DEVICE_LOG_LEVEL e DEVICE_LOG_SAMPLE
+from DeviceLog import setup_logging
+setup_logging()
+
+# Formato da telemetria: "string" (texto em data, compatível com o gateway Go), "typed"
+# ou "compact" (tipado, com a posição em ponto fixo e deltas para o último keyframe)
+payload_format = os.environ.get("DEVICE_PAYLOAD", "string")
+typed_payload = payload_format in ("typed", "compact")
+
+# Report-on-change: "on" usa as deadbands padrão por tipo, "ac=0.5:60" ajusta deadband e
+# silêncio máximo (s); vazio envia toda leitura, como antes
+from Reporting import Reporter, parse_policies
+report_policies = parse_policies(os.environ.get("DEVICE_REPORT"))
+
+# Endpoint HTTP de métricas no formato do Prometheus (desligado por padrão)
+metrics_port = os.environ.get("DEVICE_METRICS_PORT")
+if metrics_port:
+    import Metrics
+    Metrics.start_http_server(int(metrics_port))
+    print(f"Métricas em http://0.0.0.0:{metrics_port}/metrics")
+
 # Instanciação da lógica do carro
 car = CarLogic("CarLocLogic/coordinates.csv")
 
 # Instanciação do SimulatedActuator
-sensor =  SimulatedSensor.SimulatedSensor(
+sensor =  device_class(
     device_id=device_id,
     multicast_addr=multicast_addr,
     multicast_port=multicast_port,
     port=port,
-    simulator=car
+    simulator=car,
+    typed_payload=typed_payload,
+    compact_location=payload_format == "compact",
+    reporter=Reporter(report_policies) if report_policies else None,
 )
 
 # Executa o SimulatedActuator
@@ -1,19 +1,78 @@
+import logging
 import random
-    
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def parse_state(data):
+    """Estado "on" ou "off" de um comando (aceita espaços e maiúsculas); None se for inválido."""
+    if not isinstance(data, str):
+        return None
+    data = data.strip().lower()
+    return data if data in ("on", "off") else None
+
 class CarHeadlightLogic:
-    def __init__(self, step=1):
+    def __init__(self, step=1, rng=None):
         self.step = step
         self.index = 0
-        self.current_state = "on" if random.randint(0, 1) == 1 else "off"  # Default state is random
+        rng = rng or random  # random.Random semeado para simulações reproduzíveis
+        self.current_state = "on" if rng.randint(0, 1) == 1 else "off"  # Default state is random
 
-    def get_data(self):
+    def get_batch(self, n):
+        """n leituras de uma vez: array booleano (True = ligado); o estado só muda por comando."""
+        self.index += self.step * n
+        return np.full(n, self.current_state == "on")
+
+    def get_data(self, message=None):
         self.index += self.step
+        if message is not None:
+            # Payload tipado: preenche o HeadlightReading direto na DeviceMessage
+            message.headlight.on = self.current_state == "on"
+            return message
         # Mantém o estado atual ao retornar
         return f"Headlight|{self.current_state}"
 
+    def parse_command(self, data):
+        # Valor normalizado do comando, ou None se set_data vai rejeitá-lo
+        return parse_state(data)
+
     def set_data(self, data):
-        if data in ["on", "off"]:
-            self.current_state = data
-            print(f"CarHeadlightLogic: Estado atualizado para {self.current_state}")
+        # Devolve o estado depois do comando: igual ao anterior se o valor for inválido
+        state = parse_state(data)
+        if state is None:
+            log.warning("CarHeadlightLogic: Valor inválido %r. O estado deve ser 'on' ou 'off'.", data)
+        else:
+            self.current_state = state
+            log.info("CarHeadlightLogic: Estado atualizado para %s", self.current_state)
+        return self.current_state
+
+
+class CarHeadlightFleetLogic:
+    """Estado de count faróis em um array booleano: uma posição por dispositivo.
+
+    get_batch(n) devolve as n leituras de todos os dispositivos (n x count) sem montar
+    uma string por leitura; set_data(i, data) aplica um comando ao farol i.
+    """
+
+    def __init__(self, count, step=1, rng=None):
+        self.step = step
+        self.index = 0
+        # Estado inicial aleatório de cada farol, reproduzível com um rng semeado
+        generator = np.random.default_rng((rng or random).getrandbits(64))
+        self.on = generator.integers(0, 2, count).astype(bool)
+
+    def __len__(self):
+        return len(self.on)
+
+    def get_batch(self, n=1):
+        self.index += self.step * n
+        return np.broadcast_to(self.on, (n, len(self.on)))
+
+    def set_data(self, index, data):
+        state = parse_state(data)
+        if state is None:
+            log.warning("CarHeadlightFleetLogic: Valor inválido %r. O estado deve ser 'on' ou 'off'.", data)
         else:
-            print("CarHeadlightLogic: Valor inválido. O estado deve ser 'on' ou 'off'.")
\ No newline at end of file
+            self.on[index] = state == "on"
+        return "on" if self.on[index] else "off"
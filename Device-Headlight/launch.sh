@@ -2,6 +2,17 @@ DEVICE_ID=${1:-"HL-1"}
 PORT=${2:-9998}
 
 sudo cp ../DeviceClasses/SimulatedActuator.py SimulatedActuator.py
+sudo cp ../DeviceClasses/AsyncDevice.py AsyncDevice.py
+sudo cp ../DeviceClasses/Payloads.py Payloads.py
+sudo cp ../DeviceClasses/Framing.py Framing.py
+sudo cp ../DeviceClasses/CommandServer.py CommandServer.py
+sudo cp ../DeviceClasses/Metrics.py Metrics.py
+sudo cp ../DeviceClasses/DeviceLog.py DeviceLog.py
+sudo cp ../DeviceClasses/DiscoveryResponder.py DiscoveryResponder.py
+sudo cp ../DeviceClasses/Scheduler.py Scheduler.py
+sudo cp ../DeviceClasses/Clock.py Clock.py
+sudo cp ../DeviceClasses/Reporting.py Reporting.py
+sudo cp ../DeviceClasses/LocationCodec.py LocationCodec.py
 sudo docker build -t device-headlight .
 #docker run -p 9998:9998 --network my-network device-headlight
-sudo docker run --rm -p "$PORT:$PORT" device-headlight "$DEVICE_ID" "$PORT"
+sudo docker run --rm -e DEVICE_RUNTIME="${DEVICE_RUNTIME:-async}" -e DEVICE_PAYLOAD="${DEVICE_PAYLOAD:-string}" -e DEVICE_REPORT="${DEVICE_REPORT:-}" -e DEVICE_METRICS_PORT="${DEVICE_METRICS_PORT:-}" -e DEVICE_LOG_LEVEL="${DEVICE_LOG_LEVEL:-INFO}" -e DEVICE_LOG_SAMPLE="${DEVICE_LOG_SAMPLE:-100}" -p "$PORT:$PORT" ${DEVICE_METRICS_PORT:+-p "$DEVICE_METRICS_PORT:$DEVICE_METRICS_PORT"} device-headlight "$DEVICE_ID" "$PORT"
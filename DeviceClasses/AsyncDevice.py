@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import socket
+import time
+from messages import messages_pb2 as messages
+from DeviceLog import sampled
+from DiscoveryResponder import DiscoveryResponder, discovery_response
+from Framing import PREFACE, encode_frame, read_frame
+from LocationCodec import encode_location
+from Metrics import DeviceMetrics
+from Payloads import apply_command, fill_message
+from Reporting import SUPPRESSED
+from Scheduler import AsyncScheduler
+
+log = logging.getLogger(__name__)
+BROKER_TIMEOUT = 15  # Segundos sem DISCOVERY_REQUEST até o broker ser descartado
+discover_log = sampled(log)  # Um DISCOVERY_REQUEST a cada poucos segundos por broker
+send_log = sampled(log)  # Uma linha por leitura enviada
+
+
+class MulticastProtocol(asyncio.DatagramProtocol):
+    """Recebe os DISCOVERY_REQUEST do grupo multicast e repassa aos dispositivos."""
+
+    def __init__(self, devices):
+        self.devices = devices
+
+    def datagram_received(self, data, addr):
+        # Faz o parsing uma única vez, mesmo com muitos dispositivos no mesmo processo
+        discover_msg = messages.DiscoverMessage()
+        try:
+            discover_msg.ParseFromString(data)
+        except Exception as e:
+            log.warning("Error processing multicast message from %s: %s", addr, e)
+            return
+        for device in self.devices:
+            device.handle_discover_message(discover_msg, addr)
+
+
+def multicast_socket(multicast_addr, multicast_port):
+    # Mesmo socket usado por listen_multicast nas classes com threads
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("", multicast_port))
+
+    mreq = socket.inet_aton(multicast_addr) + socket.inet_aton("0.0.0.0")
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    sock.setblocking(False)
+    return sock
+
+
+async def serve_commands(reader, writer, apply, addr):
+    """Lê os comandos de um gateway e os aplica com apply(device_response, addr).
+
+    Uma conexão que começa com PREFACE é o canal persistente: DeviceResponse enquadradas,
+    e um DeviceAck enquadrado por comando, na ordem de chegada. Sem PREFACE é o gateway
+    Go, que abre uma conexão por comando e não espera confirmação.
+    """
+    first = await reader.read(1)
+    if first == PREFACE[:1]:
+        if await reader.readexactly(len(PREFACE) - 1) != PREFACE[1:]:
+            log.warning("Invalid preface from %s", addr)
+            return
+        while True:
+            frame = await read_frame(reader)
+            if frame is None:
+                return
+            writer.write(encode_frame(apply(messages.DeviceResponse.FromString(frame), addr)))
+            await writer.drain()
+    data = first
+    while data:
+        data += await reader.read(1024)
+        apply(messages.DeviceResponse.FromString(data), addr)
+        data = await reader.read(1)
+
+
+async def open_udp_sender(loop):
+    # Socket UDP unico para telemetria e respostas de descoberta
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+    sock.setblocking(False)
+    transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, sock=sock)
+    return transport
+
+
+class AsyncSimulatedSensor:
+    """Sensor simulado dirigido por um event loop asyncio, sem uma thread por broker."""
+
+    DEVICE_TYPE = 0
+
+    def __init__(self, device_id, multicast_addr, multicast_port, port, simulator, periodicity=5, typed_payload=False,
+                 metrics=None, reporter=None, compact_location=False):
+        self.device_id = str(device_id)
+        self.multicast_addr = multicast_addr
+        self.multicast_port = multicast_port
+        self.simulator = simulator
+        self.port = port
+        self.periodicity = periodicity
+        self.typed_payload = typed_payload  # AcReading/HeadlightReading/Location no lugar do texto
+        # LocationDelta (ponto fixo com deltas) no lugar da Location: um encoder por broker
+        self.location_encoders = {} if compact_location else None
+        self.type = "SENSOR"  # Tipo do dispositivo
+        self.brokers_address = []
+        self.last_received_time = {}
+        self.udp_transport = None
+        self.batcher = None  # TelemetryBatcher opcional: várias leituras por datagrama
+        self.timers = {}  # Envio periódico agendado de cada broker
+        self.reporter = reporter  # Reporter opcional: só envia o que mudou, com heartbeat
+        # Sem métricas explícitas, start() cria séries próprias com o device_id
+        self.metrics = metrics
+        # Um FleetHost compartilha o seu scheduler e responder; senão start() cria os próprios
+        self.scheduler = None
+        self.clock = None  # O do scheduler: timestamps e timeout dos brokers
+        self.responder = None
+        self.discovery_payload = None
+
+    async def start(self, udp_transport=None):
+        # Usa o socket compartilhado quando fornecido, senão cria o próprio
+        if udp_transport is None:
+            udp_transport = await open_udp_sender(asyncio.get_running_loop())
+        self.udp_transport = udp_transport
+        if self.metrics is None:
+            self.metrics = DeviceMetrics(labels={"device_id": self.device_id})
+        self.metrics.brokers.add_source(lambda: len(self.brokers_address))
+        if self.scheduler is None:
+            self.scheduler = AsyncScheduler(asyncio.get_running_loop())
+        self.clock = self.scheduler.clock
+        if self.responder is None:
+            self.responder = DiscoveryResponder(
+                self.multicast_addr, self.multicast_port,
+                sendto=udp_transport.sendto, call_later=self.scheduler.call_later, rng=self.scheduler.rng,
+            )
+
+    def stop(self):
+        # Encerra o envio de telemetria para todos os brokers
+        for timer in self.timers.values():
+            timer.cancel()
+        self.timers.clear()
+
+    def process_message(self, data, addr):
+        try:
+            # Parsing do protobuf
+            discover_msg = messages.DiscoverMessage()
+            discover_msg.ParseFromString(data)
+        except Exception as e:
+            self.metrics.discover_errors.inc()
+            log.warning("%s: error processing multicast message from %s: %s", self.device_id, addr, e)
+            return
+        self.handle_discover_message(discover_msg, addr)
+
+    def handle_discover_message(self, discover_msg, addr):
+        self.metrics.discover_messages.inc()
+        start = time.perf_counter()
+        try:
+            if discover_msg.request == "DISCOVERY_REQUEST":
+                discover_log.debug("%s: received DISCOVERY_REQUEST from %s, Data: %s", self.device_id, addr, discover_msg)
+                address = f"{discover_msg.ip}:{discover_msg.port}"
+                self.last_received_time[address] = self.clock.time()
+                if address not in self.brokers_address:
+                    self.brokers_address.append(address)
+                    self.send_discovery_response()
+                    self.setup_udp_connection(discover_msg.ip, discover_msg.port)
+            else:
+                discover_log.debug("%s: received unknown message from %s, Request: %s", self.device_id, addr, discover_msg.request)
+        except Exception as e:
+            self.metrics.discover_errors.inc()
+            log.warning("%s: error processing multicast message from %s: %s", self.device_id, addr, e)
+        self.metrics.process_message_seconds.observe(time.perf_counter() - start)
+
+    def send_discovery_response(self):
+        # Resposta da descoberta, serializada uma única vez e enviada com atraso aleatório
+        if self.discovery_payload is None:
+            self.discovery_payload = discovery_response(self.device_id, self.port, self.DEVICE_TYPE)
+        self.responder.respond(self.discovery_payload)
+        log.info("%s: scheduled discovery response to %s:%d", self.device_id, self.multicast_addr, self.multicast_port)
+
+    def setup_udp_connection(self, ip, port):
+        address = f"{ip}:{port}"
+        log.info("%s: UDP connection setup with broker at %s", self.device_id, address)
+        # Envio periódico com prazos fixos no scheduler, e não um laço com sleep por broker
+        self.timers[address] = self.scheduler.every(self.periodicity, self.send_reading, ip, port)
+
+    def send_reading(self, ip, port):
+        address = f"{ip}:{port}"
+        # O primeiro disparo pode chegar antes de setup_udp_connection guardar o timer
+        timer = self.timers.get(address)
+        if timer is not None:
+            # No event loop, o atraso em relação ao prazo também mede a carga do loop
+            self.metrics.sleep_lateness_seconds.observe(self.scheduler.time() - timer.deadline)
+        try:
+            if self.clock.time() - self.last_received_time[address] > BROKER_TIMEOUT:
+                log.warning("%s: gateway %s timeout", self.device_id, address)
+                self.brokers_address.remove(address)
+                self.timers.pop(address).cancel()
+                if self.reporter is not None:
+                    self.reporter.forget(address)
+                if self.location_encoders is not None:
+                    self.location_encoders.pop(address, None)
+                return
+            message = messages.DeviceMessage()
+            message.device_id = self.device_id
+            fill_message(message, self.simulator, self.typed_payload)  # Dados simulados
+            if self.reporter is not None:
+                kind, decision = self.reporter.decide(address, message)
+                self.metrics.report(kind, decision).inc()
+                if decision == SUPPRESSED:
+                    return
+            if self.location_encoders is not None:
+                encode_location(self.location_encoders, address, message)
+            if self.batcher is not None:
+                message.timestamp = self.clock.time()
+                self.batcher.add((ip, port), message)
+            else:
+                start = time.perf_counter()
+                data = message.SerializeToString()
+                self.metrics.serialize_seconds.observe(time.perf_counter() - start)
+                self.udp_transport.sendto(data, (ip, port))
+            self.metrics.readings_sent.inc()
+            send_log.debug("%s: sent sensor data to broker at %s", self.device_id, address)
+        except Exception as e:
+            self.metrics.send_errors.inc()
+            log.error("%s: error sending sensor data: %s", self.device_id, e)
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        await self.start()
+        sock = multicast_socket(self.multicast_addr, self.multicast_port)
+        await loop.create_datagram_endpoint(lambda: MulticastProtocol([self]), sock=sock)
+        log.info("%s %s is running...", type(self).__name__, self.device_id)
+        await asyncio.Event().wait()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+
+class AsyncSimulatedActuator(AsyncSimulatedSensor):
+    """Atuador simulado: telemetria como o sensor e servidor TCP único via asyncio streams."""
+
+    DEVICE_TYPE = 1
+
+    def __init__(self, device_id, multicast_addr, multicast_port, port, simulator, periodicity=5, typed_payload=False,
+                 metrics=None, reporter=None, compact_location=False):
+        super().__init__(device_id, multicast_addr, multicast_port, port, simulator, periodicity, typed_payload, metrics,
+                         reporter, compact_location)
+        self.type = "ACTUATOR"  # Tipo do dispositivo
+        self.server = None
+
+    async def start(self, udp_transport=None, tcp_server=True):
+        await super().start(udp_transport)
+        # O listener TCP é aberto uma única vez, e não a cada broker descoberto
+        if tcp_server:
+            self.server = await asyncio.start_server(
+                self.handle_gateway_connection, "0.0.0.0", self.port, reuse_address=True
+            )
+            log.info("%s: actuator listening on 0.0.0.0:%d", self.device_id, self.port)
+
+    async def handle_gateway_connection(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        log.debug("%s: received connection from %s", self.device_id, addr)
+        try:
+            await serve_commands(reader, writer, self.apply_device_response, addr)
+            log.debug("%s: connection closed by %s", self.device_id, addr)
+        except Exception as e:
+            self.metrics.command_errors.inc()
+            log.warning("%s: error handling connection from %s: %s", self.device_id, addr, e)
+        finally:
+            writer.close()
+
+    def apply_device_response(self, device_response, addr):
+        log.info("Received DeviceResponse from %s: Device ID: %s, Response: %s", addr, device_response.device_id, device_response.response)
+        self.metrics.commands.inc()
+        # Altera o dado no simulador e confirma o estado resultante
+        with self.metrics.command_seconds.time():
+            return apply_command(self.simulator, device_response)
@@ -0,0 +1,73 @@
+import time
+
+
+class RealClock:
+    """Relógio do sistema: time() para timestamps e timeouts, monotonic() para prazos."""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def real_delay(self, delay):
+        # Quanto esperar de verdade por delay segundos deste relógio
+        return delay
+
+    def sleep(self, delay):
+        time.sleep(delay)
+
+
+class ScaledClock(RealClock):
+    """Relógio acelerado: speed segundos simulados a cada segundo real, a partir de start.
+
+    Continua dirigido pelo relógio do sistema (sockets, threads e event loop reais),
+    então serve para rodar a frota contra um gateway de verdade em menos tempo.
+    """
+
+    def __init__(self, speed, start=None):
+        self.speed = speed
+        self.origin = time.monotonic()
+        self.start = time.time() if start is None else start
+
+    def time(self):
+        return self.start + self.monotonic()
+
+    def monotonic(self):
+        return (time.monotonic() - self.origin) * self.speed
+
+    def real_delay(self, delay):
+        return delay / self.speed
+
+    def sleep(self, delay):
+        time.sleep(delay / self.speed)
+
+
+class VirtualClock(RealClock):
+    """Tempo simulado que só anda com advance(), sem esperar nada de verdade.
+
+    Usado com o VirtualScheduler, que avança o relógio até o próximo prazo: horas de
+    simulação rodam no tempo que leva para executar os callbacks.
+    """
+
+    def __init__(self, start=0.0):
+        self.start = start  # Época (time()) correspondente a monotonic() == 0
+        self.now = 0.0
+
+    def time(self):
+        return self.start + self.now
+
+    def monotonic(self):
+        return self.now
+
+    def real_delay(self, delay):
+        return 0.0
+
+    def advance(self, delay):
+        self.now += max(delay, 0.0)
+
+    def sleep(self, delay):
+        self.advance(delay)
+
+
+REAL_CLOCK = RealClock()
@@ -0,0 +1,213 @@
+import logging
+import selectors
+import socket
+import threading
+import time
+from messages import messages_pb2 as messages
+from Framing import MAX_FRAME, PREFACE, FrameError, decode_varint, encode_frame
+
+log = logging.getLogger(__name__)
+
+RECV_BUFFER = 64 * 1024
+
+
+class Connection:
+    """Uma conexão de gateway: buffer de recepção pré-alocado e bytes ainda não enviados."""
+
+    __slots__ = ("sock", "addr", "buffer", "view", "size", "framed", "out")
+
+    def __init__(self, sock, addr):
+        self.sock = sock
+        self.addr = addr
+        self.buffer = bytearray(RECV_BUFFER)
+        self.view = memoryview(self.buffer)
+        self.size = 0  # Bytes válidos no início do buffer
+        self.framed = None  # Decidido pelo primeiro byte: canal enquadrado ou gateway Go
+        self.out = bytearray()
+
+    def grow(self, needed):
+        # Só um frame maior que o buffer faz crescer; o buffer volta a ser reaproveitado depois
+        if needed > MAX_FRAME:
+            raise FrameError(f"frame too large: {needed}")
+        self.view.release()
+        self.buffer.extend(bytes(max(needed, 2 * len(self.buffer)) - len(self.buffer)))
+        self.view = memoryview(self.buffer)
+
+
+class CommandServer:
+    """Servidor TCP de comandos de um atuador: um selector (epoll no Linux) e uma thread.
+
+    Atende qualquer quantidade de conexões de gateways sem uma thread por conexão. Cada
+    DeviceResponse vai para apply(device_response, addr), que devolve o DeviceAck
+    enviado no canal enquadrado. Sem o PREFACE (gateway Go) cada leitura é uma
+    mensagem crua e nada é respondido.
+    """
+
+    def __init__(self, port, apply, metrics, host="0.0.0.0", name="commands", retry_delay=1.0):
+        self.address = (host, port)
+        self.apply = apply
+        self.metrics = metrics
+        self.name = name
+        self.retry_delay = retry_delay
+        self.selector = selectors.DefaultSelector()
+        self.listener = None
+        self.thread = None
+        self.running = False
+        # Acorda o select() em stop()
+        self.wakeup_recv, self.wakeup_send = socket.socketpair()
+        self.wakeup_recv.setblocking(False)
+
+    def bind(self):
+        # Porta ocupada: tenta de novo após retry_delay, sem girar em falso
+        while self.running:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                listener.bind(self.address)
+                listener.listen(128)
+                listener.setblocking(False)
+                return listener
+            except OSError as e:
+                listener.close()
+                log.error("%s: error setting up TCP listener on %s:%d: %s", self.name, *self.address, e)
+                time.sleep(self.retry_delay)
+        return None
+
+    def start(self):
+        """Abre a porta e atende em uma thread própria; chamadas repetidas não fazem nada."""
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.serve_forever, name=self.name, daemon=True)
+            self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.running = False
+        self.wakeup_send.send(b"\0")
+        if self.thread is not None:
+            self.thread.join()
+
+    def serve_forever(self):
+        self.running = True
+        self.listener = self.bind()
+        if self.listener is None:
+            return
+        log.info("%s: actuator listening on %s:%d", self.name, *self.listener.getsockname())
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.selector.register(self.wakeup_recv, selectors.EVENT_READ)
+        try:
+            while self.running:
+                for key, events in self.selector.select():
+                    if key.fileobj is self.listener:
+                        self.accept()
+                    elif key.fileobj is self.wakeup_recv:
+                        self.wakeup_recv.recv(64)
+                    else:
+                        if events & selectors.EVENT_WRITE:
+                            self.flush(key.data)
+                        if events & selectors.EVENT_READ and key.data.sock.fileno() != -1:
+                            self.read(key.data)
+        finally:
+            for key in list(self.selector.get_map().values()):
+                if key.data is not None:
+                    key.data.sock.close()
+            self.selector.close()
+            self.listener.close()
+
+    def accept(self):
+        try:
+            sock, addr = self.listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        log.debug("%s: received connection from %s", self.name, addr)
+        self.selector.register(sock, selectors.EVENT_READ, Connection(sock, addr))
+
+    def close(self, conn):
+        self.selector.unregister(conn.sock)
+        conn.sock.close()
+        conn.view.release()
+
+    def read(self, conn):
+        try:
+            if conn.size == len(conn.buffer):
+                conn.grow(len(conn.buffer) + 1)
+            received = conn.sock.recv_into(conn.view[conn.size:])
+        except BlockingIOError:
+            return
+        except OSError as e:
+            log.debug("%s: connection error from %s: %s", self.name, conn.addr, e)
+            self.close(conn)
+            return
+        if not received:
+            log.debug("%s: connection closed by %s", self.name, conn.addr)
+            self.close(conn)
+            return
+        conn.size += received
+        try:
+            if conn.framed is None:
+                if conn.buffer[0] != PREFACE[0]:
+                    conn.framed = False
+                elif conn.size >= len(PREFACE):
+                    if conn.view[:len(PREFACE)] != PREFACE:
+                        raise FrameError("invalid preface")
+                    conn.framed = True
+                    self.consume(conn, len(PREFACE))
+                else:
+                    return
+            if conn.framed:
+                self.read_frames(conn)
+            else:
+                # Gateway Go: a leitura inteira é uma única DeviceResponse
+                self.apply(messages.DeviceResponse.FromString(conn.view[:conn.size]), conn.addr)
+                conn.size = 0
+        except Exception as e:
+            self.metrics.command_errors.inc()
+            log.warning("%s: error handling connection from %s: %s", self.name, conn.addr, e)
+            self.close(conn)
+
+    def read_frames(self, conn):
+        pos = 0
+        acks = []
+        while True:
+            header = decode_varint(conn.view[:conn.size], pos)
+            if header is None:
+                break
+            size, start = header
+            if start + size > conn.size:
+                if start + size > len(conn.buffer):
+                    self.consume(conn, pos)
+                    conn.grow(start - pos + size)
+                    pos = 0
+                break
+            command = messages.DeviceResponse.FromString(conn.view[start:start + size])
+            acks.append(encode_frame(self.apply(command, conn.addr)))
+            pos = start + size
+        self.consume(conn, pos)
+        if acks:
+            # Comandos que chegaram juntos são confirmados com um único send
+            conn.out += b"".join(acks)
+            self.flush(conn)
+
+    def consume(self, conn, count):
+        # Move o frame incompleto que sobrou para o início do buffer
+        if count:
+            rest = conn.size - count
+            conn.buffer[:rest] = bytes(conn.view[count:conn.size])
+            conn.size = rest
+
+    def flush(self, conn):
+        try:
+            sent = conn.sock.send(conn.out)
+        except BlockingIOError:
+            sent = 0
+        except OSError as e:
+            log.debug("%s: connection error from %s: %s", self.name, conn.addr, e)
+            self.close(conn)
+            return
+        del conn.out[:sent]
+        # Só pede EVENT_WRITE enquanto houver acks pendentes
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.out else 0)
+        if self.selector.get_key(conn.sock).events != events:
+            self.selector.modify(conn.sock, events, conn)
@@ -0,0 +1,103 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+DEFAULT_SAMPLE = 100
+
+
+def _sample_from_env():
+    # DEVICE_LOG_SAMPLE inválido ou menor que 1 não pode derrubar o import nem o _sample
+    value = os.environ.get("DEVICE_LOG_SAMPLE", str(DEFAULT_SAMPLE))
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logging.getLogger(__name__).warning("DEVICE_LOG_SAMPLE=%r inválido, usando %d", value, DEFAULT_SAMPLE)
+        return DEFAULT_SAMPLE
+
+
+_listener = None
+_sample_every = _sample_from_env()
+
+
+class SampledLogger:
+    """Logs por mensagem: só 1 a cada DEVICE_LOG_SAMPLE chamadas chega ao logger.
+
+    A amostragem acontece antes de criar o LogRecord, então as chamadas descartadas
+    custam uma checagem de nível e um incremento.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.count = 0
+
+    def _sample(self, level):
+        if not self.logger.isEnabledFor(level):
+            return False
+        sample = self.count % _sample_every == 0
+        self.count += 1
+        return sample
+
+    def debug(self, msg, *args):
+        if self._sample(logging.DEBUG):
+            self.logger.debug(msg, *args)
+
+    def info(self, msg, *args):
+        if self._sample(logging.INFO):
+            self.logger.info(msg, *args)
+
+
+def sampled(logger):
+    return SampledLogger(logger)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que nunca bloqueia: com a fila cheia o registro é descartado e contado."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # A formatação da mensagem fica para a thread de escrita; só a exceção é resolvida aqui
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level=None, sample=None, stream=None, max_queue=10000):
+    """Configura o logging dos dispositivos: nível, amostragem e escrita em uma thread separada.
+
+    Sem argumentos usa DEVICE_LOG_LEVEL (padrão INFO) e DEVICE_LOG_SAMPLE (padrão 100, mínimo 1).
+    Chamadas repetidas só ajustam o nível e a amostragem.
+    """
+    global _listener, _sample_every
+    level = level or os.environ.get("DEVICE_LOG_LEVEL", "INFO")
+    if sample is not None:
+        _sample_every = max(1, int(sample))
+    root = logging.getLogger()
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    if _listener is not None:
+        return _listener
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(logging.Formatter(FORMAT))
+    handler = DroppingQueueHandler(queue.Queue(max_queue))
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(handler.queue, writer)
+    _listener.start()
+    # Escreve o que ainda estiver na fila quando o processo termina normalmente
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,69 @@
+import functools
+import logging
+import random
+import socket
+from messages import messages_pb2 as messages
+from Scheduler import default_scheduler
+
+log = logging.getLogger(__name__)
+
+# O gateway Go só ouve respostas por 2 s depois de cada DISCOVERY_REQUEST
+DISCOVERY_WINDOW = 1.5
+MIN_DELAY = 0.02
+
+
+@functools.lru_cache(maxsize=1)
+def local_ip():
+    # Resolvido uma vez por processo, e não a cada resposta
+    return socket.gethostbyname(socket.gethostname())
+
+
+def discovery_response(device_id, port, device_type, ip=None):
+    """DiscoverResponse já serializada: o conteúdo não muda entre descobertas."""
+    response = messages.DiscoverResponse()
+    response.device_id = device_id
+    response.ip = ip or local_ip()
+    response.port = port
+    response.type = device_type
+    return response.SerializeToString()
+
+
+class DiscoveryResponder:
+    """Envia as respostas de descoberta com um atraso aleatório, como no mDNS.
+
+    Quando um gateway pergunta, todos os dispositivos respondem ao mesmo tempo e o
+    gateway (ou o buffer do socket dele) perde parte das respostas. Cada resposta sai
+    depois de um atraso uniforme entre min_delay e window, sempre pelo mesmo socket.
+    window=0 responde na hora, como antes.
+
+    sendto e call_later permitem usar o transporte e o event loop de um host asyncio;
+    sem eles o responder cria o próprio socket e usa o scheduler compartilhado do processo.
+    rng sorteia os atrasos (o do scheduler, para simulações reproduzíveis).
+    """
+
+    def __init__(self, multicast_addr, multicast_port, window=DISCOVERY_WINDOW, min_delay=MIN_DELAY,
+                 sendto=None, call_later=None, rng=None):
+        self.address = (multicast_addr, multicast_port)
+        self.window = window
+        self.min_delay = min(min_delay, window)
+        if sendto is None:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+            sendto = self.sock.sendto
+        self.sendto = sendto
+        self.call_later = call_later or default_scheduler().call_later
+        self.rng = rng or random
+        self.responses_sent = 0
+
+    def respond(self, payload):
+        if self.window <= 0:
+            self.send(payload)
+            return
+        self.call_later(self.rng.uniform(self.min_delay, self.window), self.send, payload)
+
+    def send(self, payload):
+        try:
+            self.sendto(payload, self.address)
+            self.responses_sent += 1
+        except OSError as e:
+            log.error("Error sending discovery response: %s", e)
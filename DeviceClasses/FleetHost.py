@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import signal
+from messages import messages_pb2 as messages
+from AsyncDevice import AsyncSimulatedActuator, MulticastProtocol, multicast_socket, open_udp_sender, serve_commands
+from DiscoveryResponder import DISCOVERY_WINDOW, DiscoveryResponder
+from Metrics import DeviceMetrics
+from Scheduler import AsyncScheduler
+from TelemetryBatcher import TelemetryBatcher
+
+log = logging.getLogger(__name__)
+
+
+class FleetHost:
+    """Hospeda muitos dispositivos assíncronos em um único processo.
+
+    Todos compartilham um listener multicast, alguns sockets UDP de envio e um único
+    servidor TCP, que encaminha cada DeviceResponse ao atuador pelo device_id.
+    Com batch_bytes > 0, a telemetria de toda a frota é agrupada por broker em lotes
+    de até batch_bytes, enviados no máximo batch_delay segundos após a primeira leitura.
+    As respostas de descoberta saem espalhadas em até discovery_window segundos.
+    Com clock (um ScaledClock) a frota toda roda acelerada, e rng torna fases e atrasos
+    de descoberta reproduzíveis.
+    """
+
+    def __init__(self, multicast_addr, multicast_port, port, udp_sockets=4, batch_bytes=0, batch_delay=0.05,
+                 metrics=None, discovery_window=DISCOVERY_WINDOW, clock=None, rng=None):
+        self.multicast_addr = multicast_addr
+        self.multicast_port = multicast_port
+        self.port = port
+        self.udp_sockets = udp_sockets
+        self.batch_bytes = batch_bytes
+        self.batch_delay = batch_delay
+        self.batcher = None
+        self.devices = []
+        self.actuators = {}
+        self.server = None
+        self.multicast_transport = None
+        self.stopping = None
+        # Uma única série por métrica para a frota inteira, e não uma por dispositivo
+        self.metrics = metrics or DeviceMetrics()
+        self.discovery_window = discovery_window
+        self.clock = clock
+        self.rng = rng
+        self.scheduler = None
+        self.responder = None
+
+    def add_device(self, device):
+        # Os atuadores anunciam a porta do host, e não uma porta própria
+        device.port = self.port
+        if device.metrics is None:
+            device.metrics = self.metrics
+        self.devices.append(device)
+        if isinstance(device, AsyncSimulatedActuator):
+            self.actuators[device.device_id] = device
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        transports = [await open_udp_sender(loop) for _ in range(max(1, self.udp_sockets))]
+        if self.batch_bytes > 0:
+            self.batcher = TelemetryBatcher(transports[0].sendto, self.batch_bytes, self.batch_delay, loop.call_later)
+        self.scheduler = AsyncScheduler(loop, self.clock, self.rng)
+        # As respostas de descoberta de toda a frota saem espalhadas pela janela, por um único socket
+        self.responder = DiscoveryResponder(
+            self.multicast_addr, self.multicast_port, self.discovery_window,
+            sendto=transports[0].sendto, call_later=self.scheduler.call_later, rng=self.scheduler.rng,
+        )
+        for i, device in enumerate(self.devices):
+            transport = transports[i % len(transports)]
+            device.scheduler = self.scheduler
+            device.responder = self.responder
+            if device.device_id in self.actuators:
+                await device.start(transport, tcp_server=False)
+            else:
+                await device.start(transport)
+            device.batcher = self.batcher
+
+        self.server = await asyncio.start_server(
+            self.handle_gateway_connection, "0.0.0.0", self.port, reuse_address=True
+        )
+        sock = multicast_socket(self.multicast_addr, self.multicast_port)
+        self.multicast_transport, _ = await loop.create_datagram_endpoint(lambda: MulticastProtocol(self.devices), sock=sock)
+        log.info("FleetHost running %d devices (%d actuators) on port %d", len(self.devices), len(self.actuators), self.port)
+
+    async def stop(self):
+        if self.multicast_transport is not None:
+            self.multicast_transport.close()
+        for device in self.devices:
+            device.stop()
+        if self.batcher is not None:
+            self.batcher.flush()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def stats(self):
+        return {
+            "devices": len(self.devices),
+            "actuators": len(self.actuators),
+            "readings_sent": self.metrics.readings_sent.value,
+            "readings_suppressed": self.metrics.suppressed(),
+        }
+
+    async def handle_gateway_connection(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        try:
+            # Um gateway usa uma única conexão persistente para todos os atuadores do host
+            await serve_commands(reader, writer, self.apply_device_response, addr)
+        except Exception as e:
+            self.metrics.command_errors.inc()
+            log.warning("Error handling connection from %s: %s", addr, e)
+        finally:
+            writer.close()
+
+    def apply_device_response(self, device_response, addr):
+        actuator = self.actuators.get(device_response.device_id)
+        if actuator is None:
+            self.metrics.command_errors.inc()
+            log.warning("FleetHost: unknown actuator %s from %s", device_response.device_id, addr)
+            return messages.DeviceAck(device_id=device_response.device_id, command_id=device_response.command_id,
+                                      error="unknown actuator")
+        return actuator.apply_device_response(device_response, addr)
+
+    async def serve(self, duration=None):
+        """Roda a frota até duration segundos (do clock), SIGTERM ou stopping.set(); depois encerra os dispositivos."""
+        self.stopping = asyncio.Event()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self.stopping.set)
+        except (RuntimeError, ValueError):
+            pass  # Fora da thread principal não há tratamento de sinais
+        await self.start()
+        if duration is not None:
+            duration = self.scheduler.clock.real_delay(duration)
+        try:
+            await asyncio.wait_for(self.stopping.wait(), duration)
+        except asyncio.TimeoutError:
+            pass
+        await self.stop()
+
+    def run(self, duration=None):
+        asyncio.run(self.serve(duration))
@@ -0,0 +1,88 @@
+"""Enquadramento de mensagens protobuf em TCP: cada mensagem é precedida pelo seu tamanho em varint.
+
+Uma conexão enquadrada começa com PREFACE. O primeiro byte 0x00 nunca inicia uma
+mensagem protobuf válida (campo 0), então o servidor distingue uma conexão enquadrada
+de um cliente antigo, que envia a mensagem crua, olhando só o primeiro byte.
+"""
+
+PREFACE = b"\x00LD1"
+MAX_FRAME = 16 * 1024 * 1024
+
+
+class FrameError(Exception):
+    pass
+
+
+def encode_varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(buffer, pos=0):
+    """Devolve (valor, próxima posição) ou None se o varint ainda não chegou inteiro."""
+    result = 0
+    shift = 0
+    while pos < len(buffer):
+        byte = buffer[pos]
+        result |= (byte & 0x7F) << shift
+        pos += 1
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise FrameError("varint too long")
+    return None
+
+
+def encode_frame(message):
+    data = message.SerializeToString()
+    return encode_varint(len(data)) + data
+
+
+class FrameBuffer:
+    """Acumula bytes recebidos e devolve os frames completos."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+
+    def frames(self):
+        pos = 0
+        while True:
+            header = decode_varint(self.buffer, pos)
+            if header is None:
+                break
+            size, start = header
+            if size > MAX_FRAME:
+                raise FrameError(f"frame too large: {size}")
+            if len(self.buffer) - start < size:
+                break
+            yield bytes(self.buffer[start:start + size])
+            pos = start + size
+        if pos:
+            del self.buffer[:pos]
+
+
+async def read_frame(reader):
+    """Lê um frame de um asyncio.StreamReader; devolve None quando a conexão fecha."""
+    size = 0
+    shift = 0
+    while True:
+        byte = await reader.read(1)
+        if not byte:
+            return None
+        size |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            break
+        shift += 7
+        if shift > 63:
+            raise FrameError("varint too long")
+    if size > MAX_FRAME:
+        raise FrameError(f"frame too large: {size}")
+    return await reader.readexactly(size)
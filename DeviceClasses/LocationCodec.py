@@ -0,0 +1,71 @@
+"""Stream compacto de posições: ponto fixo de 1e-6 grau com deltas para o último keyframe.
+
+A telemetria é UDP e não tem confirmação, então o keyframe de referência é o último
+enviado. Os deltas são sempre em relação ao keyframe, e não à leitura anterior: uma
+leitura perdida não afeta as seguintes, e um keyframe perdido só invalida as leituras
+até o próximo, enviado a cada keyframe_interval leituras.
+"""
+SCALE = 1e6  # Unidades de 1e-6 grau (~11 cm); ±180 graus cabem em um sint32
+KEYFRAME_INTERVAL = 10
+
+
+def to_fixed(value):
+    return int(round(value * SCALE))
+
+
+class LocationEncoder:
+    """Lado do dispositivo: um encoder por broker, já que cada um recebe o próprio stream."""
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.keyframe = 0
+        self.origin = None  # (lon, lat) do keyframe atual, em ponto fixo
+        self.since_keyframe = 0
+
+    def encode(self, message):
+        """Troca a Location do DeviceMessage por um LocationDelta (o oneof descarta a Location)."""
+        lon, lat = to_fixed(message.location.lon), to_fixed(message.location.lat)
+        delta = message.location_delta
+        if self.origin is None or self.since_keyframe >= self.keyframe_interval:
+            self.keyframe += 1
+            self.origin = (lon, lat)
+            self.since_keyframe = 0
+            delta.absolute = True
+            delta.lon, delta.lat = lon, lat
+        else:
+            delta.lon, delta.lat = lon - self.origin[0], lat - self.origin[1]
+        delta.keyframe = self.keyframe
+        self.since_keyframe += 1
+        return message
+
+
+def encode_location(encoders, address, message):
+    """Codifica a posição com o encoder do broker; leituras de outros tipos passam intactas."""
+    if message.WhichOneof("payload") == "location":
+        encoder = encoders.get(address)
+        if encoder is None:
+            encoder = encoders[address] = LocationEncoder()
+        encoder.encode(message)
+    return message
+
+
+class LocationDecoder:
+    """Lado do gateway: guarda o último keyframe recebido de cada dispositivo."""
+
+    def __init__(self):
+        self.keyframes = {}  # device_id -> (número do keyframe, lon, lat)
+
+    def decode(self, message):
+        """Troca o LocationDelta por uma Location em graus; False se o keyframe de referência se perdeu."""
+        delta = message.location_delta
+        if delta.absolute:
+            self.keyframes[message.device_id] = (delta.keyframe, delta.lon, delta.lat)
+            lon, lat = delta.lon, delta.lat
+        else:
+            keyframe = self.keyframes.get(message.device_id)
+            if keyframe is None or keyframe[0] != delta.keyframe:
+                return False
+            lon, lat = keyframe[1] + delta.lon, keyframe[2] + delta.lat
+        message.location.lon = lon / SCALE
+        message.location.lat = lat / SCALE
+        return True
@@ -0,0 +1,218 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites dos histogramas em segundos: de 10 µs (serialização) a 5 s (atraso do sleep)
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def format_labels(labels, extra=None):
+    items = list(labels) + list(extra or ())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monotônico; inc() é seguro entre threads."""
+
+    type = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        yield f"{name}{format_labels(labels)} {format_value(self.value)}"
+
+
+class Gauge:
+    """Valor instantâneo: definido com set() ou somado das funções registradas em add_source()."""
+
+    type = "gauge"
+
+    def __init__(self, func=None):
+        self.value = 0
+        self.sources = [func] if func is not None else []
+
+    def set(self, value):
+        self.value = value
+
+    def add_source(self, func):
+        self.sources.append(func)
+
+    def samples(self, name, labels):
+        value = self.value + sum(source() for source in self.sources)
+        yield f"{name}{format_labels(labels)} {format_value(value)}"
+
+
+class Histogram:
+    """Distribuição em baldes fixos: observe() custa um bisect e um lock."""
+
+    type = "histogram"
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        return Timer(self)
+
+    def samples(self, name, labels):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{format_labels(labels, [('le', le)])} {cumulative}"
+        yield f"{name}_sum{format_labels(labels)} {format_value(total)}"
+        yield f"{name}_count{format_labels(labels)} {cumulative}"
+
+
+class Timer:
+    """Context manager que observa a duração do bloco em um Histogram."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """Conjunto de métricas nomeadas, renderizado no formato texto do Prometheus.
+
+    Pedir duas vezes a mesma métrica (nome e labels) devolve a mesma instância, então
+    vários dispositivos podem compartilhar as séries de um host.
+    """
+
+    def __init__(self):
+        self.metrics = {}  # nome -> (ajuda, {labels: métrica})
+        self.lock = threading.Lock()
+
+    def _get(self, name, help_text, labels, factory):
+        key = tuple(sorted((labels or {}).items()))
+        with self.lock:
+            _, series = self.metrics.setdefault(name, (help_text, {}))
+            if key not in series:
+                series[key] = factory()
+            return series[key]
+
+    def counter(self, name, help_text, labels=None):
+        return self._get(name, help_text, labels, Counter)
+
+    def gauge(self, name, help_text, labels=None, func=None):
+        return self._get(name, help_text, labels, lambda: Gauge(func))
+
+    def histogram(self, name, help_text, labels=None, buckets=DEFAULT_BUCKETS):
+        return self._get(name, help_text, labels, lambda: Histogram(buckets))
+
+    def render(self):
+        with self.lock:
+            metrics = [(name, help_text, list(series.items())) for name, (help_text, series) in self.metrics.items()]
+        lines = []
+        for name, help_text, series in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {series[0][1].type}")
+            for labels, metric in series:
+                lines.extend(metric.samples(name, labels))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.gauge("process_threads", "Threads vivas no processo", func=threading.active_count)
+
+
+class DeviceMetrics:
+    """Métricas de um dispositivo (ou de todos os dispositivos de um host, com as mesmas labels)."""
+
+    def __init__(self, registry=None, labels=None):
+        registry = registry or REGISTRY
+        self.readings_sent = registry.counter(
+            "device_readings_sent_total", "Leituras de telemetria enviadas", labels)
+        self.send_errors = registry.counter(
+            "device_send_errors_total", "Falhas ao montar ou enviar telemetria", labels)
+        self.serialize_seconds = registry.histogram(
+            "device_serialize_seconds", "Tempo de SerializeToString de uma leitura", labels)
+        self.sleep_lateness_seconds = registry.histogram(
+            "device_sleep_lateness_seconds", "Atraso de cada envio periódico em relação ao prazo", labels)
+        self.brokers = registry.gauge(
+            "device_brokers", "Brokers acompanhados pelos dispositivos", labels)
+        self.discover_messages = registry.counter(
+            "device_discover_messages_total", "Mensagens multicast recebidas", labels)
+        self.discover_errors = registry.counter(
+            "device_discover_errors_total", "Mensagens multicast inválidas", labels)
+        self.process_message_seconds = registry.histogram(
+            "device_process_message_seconds", "Tempo de tratamento de uma mensagem multicast", labels)
+        self.commands = registry.counter(
+            "device_commands_total", "DeviceResponse recebidas do gateway", labels)
+        self.command_errors = registry.counter(
+            "device_command_errors_total", "Falhas ao tratar conexões do gateway", labels)
+        self.command_seconds = registry.histogram(
+            "device_command_seconds", "Tempo para aplicar um comando no simulador", labels)
+        self.registry = registry
+        self.labels = labels or {}
+        self.reports = {}
+
+    def report(self, kind, decision):
+        """Contador das decisões do Reporter por tipo de leitura (changed, heartbeat, suppressed)."""
+        counter = self.reports.get((kind, decision))
+        if counter is None:
+            counter = self.reports[(kind, decision)] = self.registry.counter(
+                "device_reports_total", "Decisões de envio da política de report-on-change",
+                {**self.labels, "type": kind, "decision": decision})
+        return counter
+
+    def suppressed(self):
+        return sum(counter.value for (_, decision), counter in self.reports.items() if decision == "suppressed")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Sem uma linha de log por scrape
+
+
+def start_http_server(port, addr="0.0.0.0", registry=None):
+    """Expõe /metrics numa thread daemon; retorna o servidor (server_address tem a porta real)."""
+    handler = type("Handler", (MetricsHandler,), {"registry": registry or REGISTRY})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,40 @@
+from messages import messages_pb2 as messages
+
+
+def payload_to_string(message):
+    """Converte a leitura de um DeviceMessage para o formato texto antigo ("AC|2|25.3", "Headlight|on", "x|y")."""
+    kind = message.WhichOneof("payload")
+    if kind is None:
+        return message.data
+    if kind == "ac":
+        return f"AC|{message.ac.state}|{message.ac.temperature:.1f}"
+    if kind == "headlight":
+        return f"Headlight|{'on' if message.headlight.on else 'off'}"
+    if kind == "location_delta":
+        # Sem o keyframe não há posição: decodificar com LocationDecoder.decode antes
+        raise ValueError(f"location_delta from {message.device_id!r} must be decoded with LocationDecoder first")
+    return f"{message.location.lon}|{message.location.lat}"
+
+
+def fill_message(message, simulator, typed_payload):
+    """Preenche a leitura do simulador no DeviceMessage, tipada ou como texto em data."""
+    if typed_payload:
+        simulator.get_data(message)
+    else:
+        message.data = simulator.get_data()
+    return message
+
+
+def apply_command(simulator, command):
+    """Aplica um DeviceResponse no simulador e monta o DeviceAck com o estado resultante."""
+    state = str(simulator.set_data(command.response))
+    ack = messages.DeviceAck(device_id=command.device_id, command_id=command.command_id, state=state)
+    parse_command = getattr(simulator, "parse_command", None)
+    if parse_command is not None:
+        # Aplicado se o simulador aceitou o valor, mesmo fora da forma canônica (" 2", "2.0")
+        ack.applied = parse_command(command.response) is not None
+    else:
+        ack.applied = state == command.response
+    if not ack.applied:
+        ack.error = f"invalid value {command.response!r}"
+    return ack
@@ -0,0 +1,125 @@
+import time
+from DiscoveryResponder import DISCOVERY_WINDOW
+
+DEFAULT_MAX_SILENCE = 30.0
+# O gateway descarta leituras de quem ainda não registrou, e a resposta de descoberta
+# sai até DISCOVERY_WINDOW depois do pedido
+DEFAULT_WARMUP = 2 * DISCOVERY_WINDOW
+
+# Decisões de Reporter.decide(): só "suppressed" deixa de enviar
+WARMUP = "warmup"
+CHANGED = "changed"
+HEARTBEAT = "heartbeat"
+SUPPRESSED = "suppressed"
+
+
+class ReportPolicy:
+    """Quando uma leitura vale o envio: mudou além da deadband ou passou max_silence sem enviar.
+
+    Estados (AC, farol) são comparados por igualdade; valores numéricos (temperatura,
+    longitude/latitude) só contam como mudança se saírem da deadband em torno do último
+    valor enviado. max_silence é o heartbeat que mostra ao gateway que o dispositivo vive.
+    """
+
+    __slots__ = ("deadband", "max_silence")
+
+    def __init__(self, deadband=0.0, max_silence=DEFAULT_MAX_SILENCE):
+        self.deadband = deadband
+        self.max_silence = max_silence
+
+    def __repr__(self):
+        return f"ReportPolicy(deadband={self.deadband}, max_silence={self.max_silence})"
+
+
+# Padrões por tipo de leitura: duas leituras do mesmo estado do AC diferem no máximo
+# 2 °C (ruído de ±1 °C), e 1e-5 grau (cerca de 1 m) só ignora o carro parado
+DEFAULT_POLICIES = {
+    "ac": ReportPolicy(deadband=2.0),
+    "headlight": ReportPolicy(),
+    "location": ReportPolicy(deadband=0.00001),
+}
+
+
+def parse_policies(spec):
+    """Lê a configuração de DEVICE_REPORT / --report.
+
+    "on" usa DEFAULT_POLICIES; "ac=0.5:60,location=0.0001" sobrescreve deadband e,
+    opcionalmente, max_silence dos tipos citados. Vazio ou "off" desliga (None).
+    """
+    spec = (spec or "").strip()
+    if spec in ("", "off"):
+        return None
+    policies = dict(DEFAULT_POLICIES)
+    if spec == "on":
+        return policies
+    for item in spec.split(","):
+        kind, _, values = item.partition("=")
+        kind = kind.strip().lower()
+        if kind not in policies:
+            raise ValueError(f"Tipo de leitura desconhecido: {kind!r} (use {', '.join(policies)})")
+        deadband, _, max_silence = values.partition(":")
+        policies[kind] = ReportPolicy(
+            float(deadband) if deadband else policies[kind].deadband,
+            float(max_silence) if max_silence else policies[kind].max_silence,
+        )
+    return policies
+
+
+def reading_values(message):
+    """(tipo, estados, valores numéricos) da leitura de um DeviceMessage, tipada ou em texto."""
+    kind = message.WhichOneof("payload")
+    if kind == "ac":
+        return kind, (message.ac.state,), (message.ac.temperature,)
+    if kind == "headlight":
+        return kind, (message.headlight.on,), ()
+    if kind == "location":
+        return kind, (), (message.location.lon, message.location.lat)
+    fields = message.data.split("|")
+    if fields[0] == "AC":
+        return "ac", (fields[1],), (float(fields[2]),)
+    if fields[0] == "Headlight":
+        return "headlight", (fields[1],), ()
+    return "location", (), tuple(float(field) for field in fields)
+
+
+class Reporter:
+    """Filtro de envio por broker entre a lógica do dispositivo e o socket UDP.
+
+    Guarda a última leitura enviada a cada broker. Um broker novo recebe todas as
+    leituras até que uma delas saia warmup segundos depois da primeira: as anteriores
+    podem ter chegado antes do gateway registrar o dispositivo. Tipos sem política em
+    policies são sempre enviados.
+    """
+
+    def __init__(self, policies=None, clock=time.monotonic, warmup=DEFAULT_WARMUP):
+        self.policies = DEFAULT_POLICIES if policies is None else policies
+        self.clock = clock
+        self.warmup = warmup
+        self.first = {}  # endereço do broker -> instante da primeira leitura
+        self.last = {}  # endereço do broker -> (estados, valores, instante do envio)
+
+    def decide(self, address, message):
+        kind, states, values = reading_values(message)
+        policy = self.policies.get(kind)
+        if policy is None:
+            return kind, CHANGED
+        now = self.clock()
+        last = self.last.get(address)
+        if last is None:
+            self.first[address] = now
+            decision = WARMUP
+        elif last[2] - self.first[address] < self.warmup:
+            decision = WARMUP
+        elif states != last[0] or any(
+                abs(value - sent) > policy.deadband for value, sent in zip(values, last[1])):
+            decision = CHANGED
+        elif now - last[2] >= policy.max_silence:
+            decision = HEARTBEAT
+        else:
+            return kind, SUPPRESSED
+        self.last[address] = (states, values, now)
+        return kind, decision
+
+    def forget(self, address):
+        self.first.pop(address, None)
+        self.last.pop(address, None)
@@ -0,0 +1,225 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+from Clock import REAL_CLOCK, VirtualClock
+
+log = logging.getLogger(__name__)
+
+
+class Timer:
+    """Chamada agendada; cancel() impede a execução (e as próximas, se for periódica)."""
+
+    __slots__ = ("deadline", "func", "args", "cancelled")
+
+    def __init__(self, deadline, func, args):
+        self.deadline = deadline
+        self.func = func
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class PeriodicTimer(Timer):
+    """Dispara em start + phase + k * period: o prazo não deriva com o tempo gasto no envio.
+
+    Se a execução atrasar mais de um período, os disparos perdidos são pulados (e
+    contados em missed) em vez de saírem todos de uma vez.
+    """
+
+    __slots__ = ("period", "missed")
+
+    def __init__(self, deadline, period, func, args):
+        super().__init__(deadline, func, args)
+        self.period = period
+        self.missed = 0
+
+    def advance(self, now):
+        self.deadline += self.period
+        if self.deadline < now:
+            skipped = int((now - self.deadline) // self.period) + 1
+            self.deadline += skipped * self.period
+            self.missed += skipped
+
+
+def initial_deadline(now, period, phase, rng=random):
+    # Sem fase explícita, cada timer começa num ponto aleatório do período: a frota
+    # descoberta no mesmo instante não envia em rajadas sincronizadas
+    return now + (rng.uniform(0, period) if phase is None else phase)
+
+
+class Scheduler:
+    """Uma thread com um heap de prazos para todos os envios periódicos do processo.
+
+    Substitui o laço com time.sleep de cada broker: os callbacks rodam na thread do
+    scheduler e devem ser curtos (montar e enviar uma leitura). Os prazos seguem clock
+    (o relógio do sistema, ou um ScaledClock acelerado); rng sorteia as fases iniciais.
+    """
+
+    def __init__(self, name="scheduler", clock=None, rng=None):
+        self.name = name
+        self.clock = clock or REAL_CLOCK
+        self.rng = rng or random
+        self.heap = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def time(self):
+        return self.clock.monotonic()
+
+    def call_at(self, deadline, func, *args):
+        return self._push(Timer(deadline, func, args))
+
+    def call_later(self, delay, func, *args):
+        return self.call_at(self.time() + delay, func, *args)
+
+    def every(self, period, func, *args, phase=None):
+        return self._push(PeriodicTimer(initial_deadline(self.time(), period, phase, self.rng), period, func, args))
+
+    def _push(self, timer):
+        with self.condition:
+            heapq.heappush(self.heap, (timer.deadline, next(self.sequence), timer))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+                self.thread.start()
+            # Só acorda a thread se o novo prazo for o mais próximo
+            if self.heap[0][2] is timer:
+                self.condition.notify()
+        return timer
+
+    def run(self):
+        while True:
+            with self.condition:
+                while True:
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    deadline, _, timer = self.heap[0]
+                    now = self.time()
+                    if deadline <= now:
+                        heapq.heappop(self.heap)
+                        break
+                    self.condition.wait(self.clock.real_delay(deadline - now))
+            if timer.cancelled:
+                continue
+            try:
+                timer.func(*timer.args)
+            except Exception:
+                log.exception("Error in scheduled call %r", timer.func)
+            if isinstance(timer, PeriodicTimer) and not timer.cancelled:
+                timer.advance(self.time())
+                with self.condition:
+                    heapq.heappush(self.heap, (timer.deadline, next(self.sequence), timer))
+
+
+class AsyncScheduler:
+    """Mesma interface do Scheduler sobre o event loop: um call_at por disparo, sem uma task por broker.
+
+    Sem clock os prazos são os do próprio loop; com um ScaledClock, cada prazo vira
+    uma espera real proporcionalmente menor.
+    """
+
+    def __init__(self, loop, clock=None, rng=None):
+        self.loop = loop
+        self.clock = clock or REAL_CLOCK
+        self.rng = rng or random
+        self.scaled = clock is not None
+
+    def time(self):
+        return self.clock.monotonic() if self.scaled else self.loop.time()
+
+    def _schedule(self, timer):
+        if self.scaled:
+            self.loop.call_later(self.clock.real_delay(timer.deadline - self.time()), self._fire, timer)
+        else:
+            self.loop.call_at(timer.deadline, self._fire, timer)
+        return timer
+
+    def call_at(self, deadline, func, *args):
+        return self._schedule(Timer(deadline, func, args))
+
+    def call_later(self, delay, func, *args):
+        return self.call_at(self.time() + delay, func, *args)
+
+    def every(self, period, func, *args, phase=None):
+        return self._schedule(PeriodicTimer(initial_deadline(self.time(), period, phase, self.rng), period, func, args))
+
+    def _fire(self, timer):
+        if timer.cancelled:
+            return
+        try:
+            timer.func(*timer.args)
+        except Exception:
+            log.exception("Error in scheduled call %r", timer.func)
+        if isinstance(timer, PeriodicTimer) and not timer.cancelled:
+            timer.advance(self.time())
+            self._schedule(timer)
+
+
+class VirtualScheduler:
+    """Mesma interface do Scheduler em tempo simulado, sem threads nem espera.
+
+    run_until() executa os timers em ordem de prazo, avançando o VirtualClock até cada
+    um. Prazos iguais saem na ordem de agendamento, então com um rng semeado a mesma
+    simulação produz sempre a mesma sequência de envios.
+    """
+
+    def __init__(self, clock=None, rng=None):
+        self.clock = clock or VirtualClock()
+        self.rng = rng or random.Random(0)
+        self.heap = []
+        self.sequence = itertools.count()
+        self.fired = 0
+
+    def time(self):
+        return self.clock.monotonic()
+
+    def call_at(self, deadline, func, *args):
+        return self._push(Timer(deadline, func, args))
+
+    def call_later(self, delay, func, *args):
+        return self.call_at(self.time() + delay, func, *args)
+
+    def every(self, period, func, *args, phase=None):
+        return self._push(PeriodicTimer(initial_deadline(self.time(), period, phase, self.rng), period, func, args))
+
+    def _push(self, timer):
+        heapq.heappush(self.heap, (timer.deadline, next(self.sequence), timer))
+        return timer
+
+    def run_until(self, end):
+        """Executa tudo o que vence até end (tempo do relógio) e deixa o relógio em end."""
+        while self.heap and self.heap[0][0] <= end:
+            deadline, _, timer = heapq.heappop(self.heap)
+            if timer.cancelled:
+                continue
+            self.clock.advance(deadline - self.clock.now)
+            self.fired += 1
+            try:
+                timer.func(*timer.args)
+            except Exception:
+                log.exception("Error in scheduled call %r", timer.func)
+            if isinstance(timer, PeriodicTimer) and not timer.cancelled:
+                timer.advance(self.time())
+                self._push(timer)
+        self.clock.advance(end - self.clock.now)
+
+    def run_for(self, duration):
+        self.run_until(self.time() + duration)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler():
+    """Scheduler compartilhado pelos dispositivos com threads do processo."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Scheduler()
+        return _default
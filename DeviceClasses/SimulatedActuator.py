@@ -1,10 +1,24 @@
+import logging
 import time
 import socket
 from messages import messages_pb2 as messages
+from DeviceLog import sampled
+from DiscoveryResponder import DiscoveryResponder, discovery_response
+from CommandServer import CommandServer
+from LocationCodec import encode_location
+from Metrics import DeviceMetrics
+from Payloads import apply_command, fill_message
+from Reporting import SUPPRESSED
+from Scheduler import default_scheduler
 from threading import Thread
 
+log = logging.getLogger(__name__)
+BROKER_TIMEOUT = 15  # Segundos sem DISCOVERY_REQUEST até o broker ser descartado
+discover_log = sampled(log)  # Um DISCOVERY_REQUEST a cada poucos segundos por broker
+send_log = sampled(log)  # Uma linha por leitura enviada
+
 class SimulatedActuator:
-    def __init__(self, device_id, multicast_addr, multicast_port, port, simulator, periodicity=5):
+    def __init__(self, device_id, multicast_addr, multicast_port, port, simulator, periodicity=5, batcher=None, typed_payload=False, metrics=None, scheduler=None, reporter=None, compact_location=False):
         self.device_id = str(device_id)
         self.multicast_addr = multicast_addr
         self.multicast_port = multicast_port
@@ -14,6 +28,26 @@ class SimulatedActuator:
         self.type = "ACTUATOR"  # Type of device
         self.brokers_address = []
         self.last_received_time = {}
+        self.batcher = batcher  # TelemetryBatcher opcional: várias leituras por datagrama
+        self.typed_payload = typed_payload  # AcReading/HeadlightReading/Location no lugar do texto
+        # LocationDelta (ponto fixo com deltas) no lugar da Location: um encoder por broker
+        self.location_encoders = {} if compact_location else None
+        # DeviceMetrics compartilhado por um host, ou séries próprias com o device_id
+        self.metrics = metrics or DeviceMetrics(labels={"device_id": self.device_id})
+        self.metrics.brokers.add_source(lambda: len(self.brokers_address))
+        # Envios periódicos de todos os dispositivos do processo em uma única thread
+        self.scheduler = scheduler or default_scheduler()
+        # Timestamps e timeout dos brokers no relógio do scheduler (real ou acelerado)
+        self.clock = self.scheduler.clock
+        self.timers = {}
+        self.reporter = reporter  # Reporter opcional: só envia o que mudou, com heartbeat
+        self.udp_socket = None
+        # Um socket e uma resposta serializada para todas as descobertas
+        self.responder = DiscoveryResponder(multicast_addr, multicast_port, call_later=self.scheduler.call_later,
+                                            rng=self.scheduler.rng)
+        self.discovery_payload = None
+        # Um único servidor de comandos por dispositivo, aberto em run() e não a cada broker
+        self.command_server = CommandServer(port, self.apply_device_response, self.metrics, name=self.device_id)
 
     def listen_multicast(self):
         # Ouve multicast
@@ -25,122 +59,104 @@ class SimulatedActuator:
         sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
 
         while True:
-            data, addr = sock.recvfrom(1024)
-            Thread(target=self.process_message, args=(data, addr)).start()
+            data, addr = sock.recvfrom(65535)
+            # O tratamento não bloqueia (os envios ficam no scheduler): sem uma thread por mensagem
+            self.process_message(data, addr)
 
     def process_message(self, data, addr):
+        self.metrics.discover_messages.inc()
+        start = time.perf_counter()
         try:
             # Parsing protobuf
             discover_msg = messages.DiscoverMessage()
             discover_msg.ParseFromString(data)
 
             if discover_msg.request == "DISCOVERY_REQUEST":
-                print(f"Received DISCOVERY_REQUEST from {addr}, Data: {discover_msg}", flush=True)
+                discover_log.debug("%s: received DISCOVERY_REQUEST from %s, Data: %s", self.device_id, addr, discover_msg)
                 address = f"{discover_msg.ip}:{discover_msg.port}"
                 if address not in self.brokers_address:
                     self.brokers_address.append(address)
                     self.send_discovery_response()
-                    self.last_received_time[address] = time.time()
-                    Thread(target=self.handle_gateway_tcp_communication, 
-                           args=(discover_msg.ip, discover_msg.port), 
-                           daemon=True).start()
+                    self.last_received_time[address] = self.clock.time()
                     self.setup_udp_connection(discover_msg.ip, discover_msg.port)
-                    
             else:
-                print(f"Received unknown message from {addr}, Request: {discover_msg.request}", flush=True)
+                discover_log.debug("%s: received unknown message from %s, Request: %s", self.device_id, addr, discover_msg.request)
+            self.metrics.process_message_seconds.observe(time.perf_counter() - start)
         except Exception as e:
-            print(f"Error processing multicast message from {addr}: {e}", flush=True)
+            self.metrics.discover_errors.inc()
+            log.warning("%s: error processing multicast message from %s: %s", self.device_id, addr, e)
 
     def send_discovery_response(self):
-        # Send a discovery response
-        response = messages.DiscoverResponse()
-        response.device_id = self.device_id
-        response.ip = socket.gethostbyname(socket.gethostname())
-        response.port = self.port
-        response.type = 1
-        data = response.SerializeToString()
-
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
-        sock.sendto(data, (self.multicast_addr, self.multicast_port))
-        print(f"Sent discovery response to {self.multicast_addr}:{self.multicast_port}", flush=True)
-        sock.close()
+        # Resposta da descoberta, serializada uma única vez e enviada com atraso aleatório
+        if self.discovery_payload is None:
+            self.discovery_payload = discovery_response(self.device_id, self.port, 1)
+        self.responder.respond(self.discovery_payload)
+        log.info("%s: scheduled discovery response to %s:%d", self.device_id, self.multicast_addr, self.multicast_port)
 
     def setup_udp_connection(self, ip, port):
-        # Inicializa a conexão com o gateway
-        udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        print(f"UDP connection setup with broker at {ip}:{port}", flush=True)
-        # Envio periodico de mensagens
-        while True:
-            try:
-                if time.time() - self.last_received_time[f"{ip}:{port}"] > 15:
-                    print(f"Gateway {ip}:{port} timeout",flush=True)
-                    self.brokers_address.remove(f"{ip}:{port}")
-                    udp_socket.close()
-                    break
-                message = messages.DeviceMessage()
-                message.device_id = self.device_id
-                message.data = self.simulator.get_data()  # Dados de sensores simulados
-                print(message)
-                data = message.SerializeToString()
-
-                udp_socket.sendto(data, (ip, port))
-                print(f"Sent sensor data to broker at {ip}:{port}", flush=True)
-            except Exception as e:
-                print(f"Error sending sensor data: {e}", flush=True)
-
-            time.sleep(self.periodicity)
-        
-    def handle_gateway_tcp_communication(self,ip,port):
-        while True:
-            try:
-                # Cria um socket TCP para escutar
-                server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                #server_socket.bind((self.broker_ip, self.port))
-                server_socket.bind(("0.0.0.0", self.port))
-                server_socket.listen(5)
-
-                print(f"Actuator listening on {socket.gethostbyname(socket.gethostname())}:{self.port}", flush=True)
-
-                while True:
-                    # Aceita conexões de entrada
-                    client_socket, addr = server_socket.accept()
-                    print(f"Received connection from {addr}", flush=True)
-
-                    # Processa a conexão em uma thread separada
-                    Thread(target=self.handle_gateway_connection, args=(client_socket, addr), daemon=True).start()
-
-            except Exception as e:
-                continue
-                print(f"Error setting up TCP listener: {e}", flush=True)
-
-    def handle_gateway_connection(self, client_socket, addr):
+        # Um socket UDP por dispositivo, compartilhado entre os brokers
+        if self.udp_socket is None:
+            self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        log.info("%s: UDP connection setup with broker at %s:%d", self.device_id, ip, port)
+        # Envio periódico com prazos fixos no scheduler, e não um laço com sleep por broker
+        self.timers[f"{ip}:{port}"] = self.scheduler.every(self.periodicity, self.send_reading, ip, port)
+
+    def send_reading(self, ip, port):
+        address = f"{ip}:{port}"
+        # O primeiro disparo pode chegar antes de setup_udp_connection guardar o timer
+        timer = self.timers.get(address)
+        if timer is not None:
+            self.metrics.sleep_lateness_seconds.observe(self.scheduler.time() - timer.deadline)
         try:
-            while True:
-                # Lida com os dados enviados por um gateway
-                data = client_socket.recv(1024)
-                if not data:
-                    print(f"Connection closed by {addr}", flush=True)
-                    break
-
-                # Parsing do protobuf
-                device_response = messages.DeviceResponse()
-                device_response.ParseFromString(data)
-                print(f"Received DeviceResponse from {addr}: Device ID: {device_response.device_id}, Response: {device_response.response}", flush=True)
-                # Altera o dado no simulador
-                self.simulator.set_data(device_response.response)
-
+            if self.clock.time() - self.last_received_time[address] > BROKER_TIMEOUT:
+                log.warning("%s: gateway %s:%d timeout", self.device_id, ip, port)
+                self.brokers_address.remove(address)
+                self.timers.pop(address).cancel()
+                if self.reporter is not None:
+                    self.reporter.forget(address)
+                if self.location_encoders is not None:
+                    self.location_encoders.pop(address, None)
+                return
+            message = messages.DeviceMessage()
+            message.device_id = self.device_id
+            fill_message(message, self.simulator, self.typed_payload)  # Dados de sensores simulados
+            if self.reporter is not None:
+                kind, decision = self.reporter.decide(address, message)
+                self.metrics.report(kind, decision).inc()
+                if decision == SUPPRESSED:
+                    return
+            if self.location_encoders is not None:
+                encode_location(self.location_encoders, address, message)
+            if self.batcher is not None:
+                message.timestamp = self.clock.time()
+                self.batcher.add((ip, port), message)
+            else:
+                start = time.perf_counter()
+                data = message.SerializeToString()
+                self.metrics.serialize_seconds.observe(time.perf_counter() - start)
+                self.udp_socket.sendto(data, (ip, port))
+            self.metrics.readings_sent.inc()
+            send_log.debug("%s: sent %s to broker at %s:%d", self.device_id, message, ip, port)
         except Exception as e:
-            print(f"Error handling connection from {addr}: {e}", flush=True)
-        finally:
-            client_socket.close()
+            self.metrics.send_errors.inc()
+            log.error("%s: error sending sensor data: %s", self.device_id, e)
+
+    def apply_device_response(self, device_response, addr):
+        start = time.perf_counter()
+        self.metrics.commands.inc()
+        log.info("Received DeviceResponse from %s: Device ID: %s, Response: %s", addr, device_response.device_id, device_response.response)
+        # Altera o dado no simulador e confirma o estado resultante
+        ack = apply_command(self.simulator, device_response)
+        self.metrics.command_seconds.observe(time.perf_counter() - start)
+        return ack
 
 
     def run(self):
          # Inicia a thread principal que ouve o multicast
         Thread(target=self.listen_multicast, daemon=True).start()
+        # Comandos dos gateways: todas as conexões em uma thread com selector
+        self.command_server.start()
         
-        print("SimulatedActuator is running...", flush=True)
+        log.info("SimulatedActuator %s is running...", self.device_id)
         while True:
             time.sleep(1)
@@ -0,0 +1,98 @@
+import logging
+import threading
+from messages import messages_pb2 as messages
+
+log = logging.getLogger(__name__)
+
+
+def varint_size(value):
+    size = 1
+    while value >= 0x80:
+        value >>= 7
+        size += 1
+    return size
+
+
+def unpack_readings(device_message):
+    """Devolve as leituras de um DeviceMessage, seja ele um lote ou uma leitura simples."""
+    if device_message.readings:
+        return device_message.readings
+    return [device_message]
+
+
+class TelemetryBatcher:
+    """Agrupa várias leituras por destino em um único DeviceMessage (campo readings).
+
+    O lote é enviado quando passaria de max_bytes ou quando a leitura mais antiga
+    esperou max_delay segundos. call_later(delay, callback) agenda o envio por
+    latência: loop.call_later no runtime asyncio, threading.Timer por padrão.
+    """
+
+    def __init__(self, sendto, max_bytes=1200, max_delay=0.05, call_later=None):
+        self.sendto = sendto
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.call_later = call_later or self._timer
+        self.batches = {}
+        self.lock = threading.Lock()
+        self.datagrams_sent = 0
+        self.readings_sent = 0
+
+    @staticmethod
+    def _timer(delay, callback):
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+
+    def add(self, address, reading):
+        # Tamanho da leitura dentro do lote: tag (1 byte) + comprimento + mensagem
+        reading_size = reading.ByteSize()
+        encoded_size = 1 + varint_size(reading_size) + reading_size
+        full = None
+        with self.lock:
+            batch = self.batches.get(address)
+            if batch is not None and batch[1] + encoded_size > self.max_bytes:
+                full = self._take(address)
+                batch = None
+            if batch is None:
+                batch = self.batches[address] = [messages.DeviceMessage(), 0, object()]
+                schedule = True
+            else:
+                schedule = False
+            batch[0].readings.append(reading)
+            batch[1] += encoded_size
+            token = batch[2]
+        if full is not None:
+            self._send(address, full[0])
+        if schedule:
+            self.call_later(self.max_delay, lambda: self.flush(address, token))
+
+    def flush(self, address=None, token=None):
+        """Envia o lote do destino (ou de todos); token evita enviar um lote mais novo por engano."""
+        with self.lock:
+            if address is None:
+                pending = [(dest, self._take(dest)) for dest in list(self.batches)]
+            else:
+                batch = self.batches.get(address)
+                if batch is None or (token is not None and batch[2] is not token):
+                    return
+                pending = [(address, self._take(address))]
+        for dest, batch in pending:
+            self._send(dest, batch[0])
+
+    def _take(self, address):
+        # Chamado com o lock: o flush pode rodar ao mesmo tempo na thread do Timer e na do chamador
+        batch = self.batches.pop(address)
+        self.datagrams_sent += 1
+        self.readings_sent += len(batch[0].readings)
+        return batch
+
+    def _send(self, address, batch):
+        try:
+            self.sendto(batch.SerializeToString(), address)
+        except Exception as e:
+            log.error("Error sending telemetry batch to %s: %s", address, e)
+            with self.lock:
+                # O lote foi contado ao sair de batches: desconta o que não foi enviado
+                self.datagrams_sent -= 1
+                self.readings_sent -= len(batch.readings)
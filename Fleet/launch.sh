@@ -0,0 +1,17 @@
+PORT=${PORT:-9995}
+
+sudo cp ../DeviceClasses/AsyncDevice.py AsyncDevice.py
+sudo cp ../DeviceClasses/Payloads.py Payloads.py
+sudo cp ../DeviceClasses/Framing.py Framing.py
+sudo cp ../DeviceClasses/Metrics.py Metrics.py
+sudo cp ../DeviceClasses/DeviceLog.py DeviceLog.py
+sudo cp ../DeviceClasses/DiscoveryResponder.py DiscoveryResponder.py
+sudo cp ../DeviceClasses/Scheduler.py Scheduler.py
+sudo cp ../DeviceClasses/Clock.py Clock.py
+sudo cp ../DeviceClasses/Reporting.py Reporting.py
+sudo cp ../DeviceClasses/LocationCodec.py LocationCodec.py
+sudo cp ../DeviceClasses/FleetHost.py FleetHost.py
+sudo cp ../DeviceClasses/TelemetryBatcher.py TelemetryBatcher.py
+sudo cp -r ../Device-AC/ACLogic ../Device-CarLoc/CarLocLogic ../Device-Headlight/HeadlightLogic .
+sudo docker build -t device-fleet .
+sudo docker run --rm -e DEVICE_LOG_LEVEL="${DEVICE_LOG_LEVEL:-INFO}" -e DEVICE_LOG_SAMPLE="${DEVICE_LOG_SAMPLE:-100}" -p "$PORT:$PORT" ${METRICS_PORT:+-p "$METRICS_PORT:$METRICS_PORT"} device-fleet --port "$PORT" ${METRICS_PORT:+--metrics-port "$METRICS_PORT"} "$@"
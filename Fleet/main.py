@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import random
+import sys
+
+# Ao rodar direto do repositório (sem o launch.sh), usa os módulos originais
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ("DeviceClasses", "Device-AC", "Device-CarLoc", "Device-Headlight"):
+    sys.path.append(os.path.join(ROOT, path))
+
+from AsyncDevice import AsyncSimulatedActuator, AsyncSimulatedSensor
+from Clock import REAL_CLOCK, ScaledClock
+from DeviceLog import setup_logging
+from FleetHost import FleetHost
+from Metrics import start_http_server
+from Reporting import Reporter, parse_policies
+from ACLogic.CarACLogic import CarACLogic
+from CarLocLogic import CarLogic as car_logic_module
+from CarLocLogic.Trajectory import Trajectory
+from HeadlightLogic.CarHeadlightLogic import CarHeadlightLogic
+
+# Configurações padrão
+DEFAULT_PORT = 9995
+multicast_addr = "224.0.0.1"
+multicast_port = 9999
+
+parser = argparse.ArgumentParser(description="Hospeda uma frota de dispositivos simulados em um único processo")
+parser.add_argument("--ac", type=int, default=10, help="Quantidade de atuadores de ar-condicionado")
+parser.add_argument("--headlight", type=int, default=10, help="Quantidade de atuadores de farol")
+parser.add_argument("--carloc", type=int, default=10, help="Quantidade de sensores de localização")
+parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Porta TCP compartilhada pelos atuadores")
+parser.add_argument("--udp-sockets", type=int, default=4, help="Sockets UDP compartilhados para envio")
+parser.add_argument("--periodicity", type=float, default=5, help="Intervalo entre envios de telemetria (s)")
+parser.add_argument("--batch-bytes", type=int, default=0, help="Agrupa a telemetria em datagramas de até N bytes (0 desliga)")
+parser.add_argument("--batch-delay", type=float, default=0.05, help="Espera máxima de uma leitura no lote (s)")
+parser.add_argument("--typed-payload", action="store_true", help="Envia leituras tipadas em vez do texto em data")
+parser.add_argument("--compact-location", action="store_true",
+                    help="Posições em ponto fixo com deltas para o último keyframe (implica --typed-payload)")
+parser.add_argument("--report", default=None,
+                    help='Report-on-change: "on" ou deadband[:silêncio máximo] por tipo, ex. "ac=0.5:60,location=0.0001"')
+parser.add_argument("--log-level", default=None, help="Nível de log (padrão: DEVICE_LOG_LEVEL ou INFO)")
+parser.add_argument("--metrics-port", type=int, default=None, help="Expõe as métricas da frota em HTTP (formato Prometheus)")
+parser.add_argument("--discovery-window", type=float, default=1.5, help="Espalha as respostas de descoberta em até N segundos (0 = na hora)")
+parser.add_argument("--multicast-port", type=int, default=multicast_port, help="Porta do grupo multicast de descoberta")
+parser.add_argument("--duration", type=float, default=None, help="Encerra após N segundos simulados (padrão: roda para sempre)")
+parser.add_argument("--speed", type=float, default=None,
+                    help="Acelera o relógio da frota N vezes (periodicidade, timeout dos brokers e rotas); "
+                         "o --discovery-interval do gateway deve ser reduzido na mesma proporção")
+parser.add_argument("--seed", type=int, default=None, help="Semente do estado inicial, das fases e dos atrasos de descoberta")
+parser.add_argument("--stats-file", default=None, help="Grava as estatísticas da frota em JSON ao encerrar")
+parser.add_argument("--id-offset", type=int, default=0, help="Primeiro índice dos IDs, para vários hosts")
+args = parser.parse_args()
+report_policies = parse_policies(args.report)
+setup_logging(args.log_level)
+multicast_port = args.multicast_port
+clock = ScaledClock(args.speed) if args.speed else REAL_CLOCK
+rng = random.Random(args.seed) if args.seed is not None else random
+
+coordinates_csv = os.path.join(os.path.dirname(car_logic_module.__file__), "coordinates.csv")
+
+# Todos os carros compartilham a mesma rota, cada um em um ponto diferente do percurso,
+# avançando um ponto por período de telemetria
+trajectory = Trajectory.from_csv(coordinates_csv)
+
+
+def car_logic():
+    phase = rng.uniform(0, 2 * (trajectory.length - 1))
+    return car_logic_module.CarLogic(trajectory=trajectory, speed=1 / args.periodicity, phase=phase, clock=clock)
+
+
+host = FleetHost(
+    multicast_addr, multicast_port, args.port,
+    udp_sockets=args.udp_sockets, batch_bytes=args.batch_bytes, batch_delay=args.batch_delay,
+    discovery_window=args.discovery_window, clock=clock if args.speed else None, rng=rng,
+)
+
+# Instanciação dos dispositivos: (prefixo do ID, quantidade, classe, fábrica da lógica)
+fleet = [
+    ("AC", args.ac, AsyncSimulatedActuator, lambda: CarACLogic(rng=rng)),
+    ("HL", args.headlight, AsyncSimulatedActuator, lambda: CarHeadlightLogic(rng=rng)),
+    ("CL", args.carloc, AsyncSimulatedSensor, car_logic),
+]
+for prefix, count, device_class, logic in fleet:
+    for i in range(args.id_offset, args.id_offset + count):
+        host.add_device(device_class(
+            device_id=f"{prefix}-{i}",
+            multicast_addr=multicast_addr,
+            multicast_port=multicast_port,
+            port=args.port,
+            simulator=logic(),
+            periodicity=args.periodicity,
+            typed_payload=args.typed_payload or args.compact_location,
+            compact_location=args.compact_location,
+            # Cada dispositivo guarda as próprias últimas leituras; as políticas são compartilhadas
+            reporter=Reporter(report_policies, clock=clock.monotonic) if report_policies else None,
+        ))
+
+if args.metrics_port is not None:
+    start_http_server(args.metrics_port)
+
+# Executa a frota
+host.run(args.duration)
+
+if args.stats_file:
+    with open(args.stats_file, "w") as stats_file:
+        json.dump(host.stats(), stats_file)
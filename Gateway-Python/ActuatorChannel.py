@@ -0,0 +1,59 @@
+import asyncio
+import itertools
+from messages import messages_pb2 as messages
+from Framing import PREFACE, encode_frame, read_frame
+
+
+class ActuatorChannel:
+    """Conexão persistente e enquadrada com um servidor de atuadores (um dispositivo ou um FleetHost).
+
+    Cada DeviceResponse leva um command_id, e o DeviceAck com o mesmo id resolve o future
+    do comando: vários comandos ficam em voo na mesma conexão, sem reconectar.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.command_ids = itertools.count(1)
+        self.pending = {}  # command_id -> future do DeviceAck
+        self.reader_task = asyncio.ensure_future(self.read_acks())
+
+    @classmethod
+    async def open(cls, ip, port):
+        reader, writer = await asyncio.open_connection(ip, port)
+        writer.write(PREFACE)
+        return cls(reader, writer)
+
+    @property
+    def closed(self):
+        return self.reader_task.done()
+
+    def send(self, device_id, value):
+        command_id = next(self.command_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[command_id] = future
+        # Com timeout o future é cancelado e o comando deixa de ser esperado
+        future.add_done_callback(lambda _: self.pending.pop(command_id, None))
+        self.writer.write(encode_frame(messages.DeviceResponse(device_id=device_id, response=value, command_id=command_id)))
+        return future
+
+    async def read_acks(self):
+        error = ConnectionError("Conexão fechada pelo atuador")
+        try:
+            while True:
+                frame = await read_frame(self.reader)
+                if frame is None:
+                    break
+                ack = messages.DeviceAck.FromString(frame)
+                future = self.pending.pop(ack.command_id, None)
+                if future is not None and not future.done():
+                    future.set_result(ack)
+        except Exception as e:
+            error = e
+        for future in list(self.pending.values()):
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self):
+        self.writer.close()
+        self.reader_task.cancel()
@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import namedtuple
+
+# Registro imutável: uma atualização troca o registro inteiro, então quem lê nunca vê um estado parcial
+Device = namedtuple("Device", ["id", "ip", "port", "type", "last_state", "updated"])
+
+
+class DeviceRegistry:
+    """Dispositivos descobertos, divididos em shards pelo hash do ID.
+
+    Leituras não usam lock (um dict.get é atômico e os registros são imutáveis).
+    Escritas travam apenas o shard do dispositivo, então a ingestão de telemetria
+    não disputa com as leituras dos clientes nem com escritas em outros shards.
+    """
+
+    def __init__(self, shards=16):
+        self.shards = [{} for _ in range(shards)]
+        self.locks = [threading.Lock() for _ in range(shards)]
+
+    def _index(self, device_id):
+        return hash(device_id) % len(self.shards)
+
+    def get(self, device_id):
+        return self.shards[self._index(device_id)].get(device_id)
+
+    def register(self, device_id, ip, port, device_type):
+        index = self._index(device_id)
+        with self.locks[index]:
+            current = self.shards[index].get(device_id)
+            last_state = current.last_state if current is not None else ""
+            updated = current.updated if current is not None else 0.0
+            self.shards[index][device_id] = Device(device_id, ip, port, device_type, last_state, updated)
+
+    def update_state(self, device_id, state, timestamp=None):
+        """Atualiza o último estado; devolve False se o dispositivo ainda não foi descoberto."""
+        index = self._index(device_id)
+        shard = self.shards[index]
+        with self.locks[index]:
+            current = shard.get(device_id)
+            if current is None:
+                return False
+            shard[device_id] = current._replace(last_state=state, updated=timestamp or time.time())
+        return True
+
+    def devices(self):
+        for shard in self.shards:
+            yield from list(shard.values())
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
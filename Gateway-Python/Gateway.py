@@ -0,0 +1,440 @@
+import asyncio
+import json
+import logging
+import socket
+import time
+from messages import messages_pb2 as messages
+from ActuatorChannel import ActuatorChannel
+from DeviceRegistry import DeviceRegistry
+from IngestWorkers import IngestSupervisor
+from Framing import MAX_FRAME, PREFACE, encode_frame, read_frame
+from LocationCodec import LocationDecoder
+from Payloads import payload_to_string
+from Subscriptions import ALL_DEVICES, Subscriber, Subscriptions
+from TelemetryBatcher import unpack_readings
+
+log = logging.getLogger("gateway")
+
+BULK_REQUESTS = ("GET_DEVICE_STATES", "SET_DEVICE_STATES")
+RAW_SETTLE = 0.05  # Espera por mais segmentos de uma requisição em lote crua que já parseia
+
+
+def local_ip():
+    # Mesmo truque do getLocalIP do gateway Go: nenhum pacote é enviado
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect(("8.8.8.8", 80))
+            return sock.getsockname()[0]
+    except OSError:
+        return socket.gethostbyname(socket.gethostname())
+
+
+class DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Recebe os DiscoverResponse dos dispositivos no grupo multicast."""
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+
+    def datagram_received(self, data, addr):
+        response = messages.DiscoverResponse()
+        try:
+            response.ParseFromString(data)
+        except Exception:
+            return
+        # O grupo também recebe os DISCOVERY_REQUEST (deste e de outros gateways)
+        if not response.device_id or response.device_id == "DISCOVERY_REQUEST":
+            return
+        self.gateway.process_device(response)
+
+
+class TelemetryProtocol(asyncio.DatagramProtocol):
+    """Recebe os DeviceMessage (simples ou em lote) na porta UDP de telemetria."""
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+
+    def datagram_received(self, data, addr):
+        self.gateway.handle_device_datagram(data, addr)
+
+
+class Gateway:
+    """Gateway em Python com o mesmo protocolo do gateway Go, para testes locais e de carga.
+
+    Descoberta por multicast (DISCOVERY_REQUEST em multicast_port), telemetria UDP em
+    udp_port e clientes TCP com GET_DEVICE_STATE/SET_DEVICE_STATE em tcp_port.
+    Os comandos vão aos atuadores por uma conexão persistente por endereço e esperam o
+    DeviceAck até command_timeout; framed_actuators=False abre uma conexão por comando,
+    sem confirmação, como o gateway Go.
+    Com ingest_workers > 0 a telemetria é recebida por esse número de processos na mesma
+    porta (SO_REUSEPORT), e este processo só junta as tabelas agregadas no registro.
+    history (um TelemetryStore) guarda o histórico numérico recente de cada dispositivo,
+    consultado com GET_DEVICE_HISTORY; com ingest workers ele recebe só a última
+    leitura de cada dispositivo por intervalo de envio dos workers.
+    Clientes com conexão enquadrada podem enviar SUBSCRIBE (device_ids, ou "*" para
+    todos) e passam a receber ClientResponse com update=True quando o estado muda.
+    """
+
+    def __init__(self, multicast_addr="224.0.0.1", multicast_port=9999, udp_port=9990, tcp_port=9991,
+                 advertise_ip=None, discovery_interval=5, shards=16, framed_actuators=True, command_timeout=5.0,
+                 ingest_workers=0, history=None):
+        self.multicast_addr = multicast_addr
+        self.multicast_port = multicast_port
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.advertise_ip = advertise_ip or local_ip()
+        self.discovery_interval = discovery_interval
+        self.registry = DeviceRegistry(shards)
+        self.datagrams_received = 0
+        self.readings_received = 0
+        self.unknown_readings = 0
+        self.undecodable_readings = 0  # LocationDelta cujo keyframe não chegou
+        self.locations = LocationDecoder()
+        self.framed_actuators = framed_actuators
+        self.command_timeout = command_timeout
+        self.actuator_channels = {}  # (ip, porta) -> ActuatorChannel
+        self.channel_lock = asyncio.Lock()
+        self.ingest_workers = ingest_workers
+        self.ingest = None
+        self.history = history
+        self.subscriptions = Subscriptions()
+        self.loop = None
+        self.server = None
+        self.transports = []
+        self.tasks = []
+
+    async def start(self):
+        loop = self.loop = asyncio.get_running_loop()
+
+        # Os workers sobem antes dos demais sockets: a porta UDP é a deles
+        if self.ingest_workers:
+            self.ingest = IngestSupervisor(self.udp_port, self.merge_ingest, self.ingest_workers)
+            self.ingest.start()
+            self.udp_port = self.ingest.port
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", self.multicast_port))
+        mreq = socket.inet_aton(self.multicast_addr) + socket.inet_aton("0.0.0.0")
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        sock.setblocking(False)
+        discovery, _ = await loop.create_datagram_endpoint(lambda: DiscoveryProtocol(self), sock=sock)
+
+        self.transports = [discovery]
+        if self.ingest is None:
+            telemetry, _ = await loop.create_datagram_endpoint(
+                lambda: TelemetryProtocol(self), local_addr=("0.0.0.0", self.udp_port)
+            )
+            self.udp_port = telemetry.get_extra_info("sockname")[1]
+            self.transports.append(telemetry)
+        log.info("Gateway listening on UDP: 0.0.0.0:%d", self.udp_port)
+
+        self.server = await asyncio.start_server(self.handle_client, "0.0.0.0", self.tcp_port, reuse_address=True)
+        self.tcp_port = self.server.sockets[0].getsockname()[1]
+        log.info("Gateway ouvindo em TCP na porta %d", self.tcp_port)
+
+        self.tasks.append(asyncio.ensure_future(self.discover_devices()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        for channel in self.actuator_channels.values():
+            channel.close()
+        for transport in self.transports:
+            transport.close()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.ingest is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.ingest.stop)
+
+    async def serve(self):
+        await self.start()
+        log.info("Gateway IP = %s", self.advertise_ip)
+        await asyncio.Event().wait()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    # Descoberta
+
+    async def discover_devices(self):
+        loop = asyncio.get_running_loop()
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sender.setblocking(False)
+        transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, sock=sender)
+        self.transports.append(transport)
+        request = messages.DiscoverMessage()
+        request.request = "DISCOVERY_REQUEST"
+        request.ip = self.advertise_ip
+        request.port = self.udp_port
+        data = request.SerializeToString()
+        while True:
+            transport.sendto(data, (self.multicast_addr, self.multicast_port))
+            log.debug("Multicast discover sent")
+            await asyncio.sleep(self.discovery_interval)
+
+    def process_device(self, response):
+        self.registry.register(response.device_id, response.ip, response.port, response.type)
+        log.debug("Discovered device: ID=%s, IP=%s, Port=%d, Type=%d",
+                  response.device_id, response.ip, response.port, response.type)
+
+    # Telemetria
+
+    def handle_device_datagram(self, data, addr):
+        device_msg = messages.DeviceMessage()
+        try:
+            device_msg.ParseFromString(data)
+        except Exception:
+            log.warning("Failed to unmarshal UDP message from %s", addr)
+            return
+        self.datagrams_received += 1
+        now = time.time()
+        for reading in unpack_readings(device_msg):
+            self.readings_received += 1
+            if reading.WhichOneof("payload") == "location_delta" and not self.locations.decode(reading):
+                self.undecodable_readings += 1
+                continue
+            state = payload_to_string(reading)
+            if not self.registry.update_state(reading.device_id, state, reading.timestamp or now):
+                self.unknown_readings += 1
+            else:
+                if self.history is not None:
+                    self.history.add(reading.device_id, reading, reading.timestamp or now)
+                self.subscriptions.publish(reading.device_id, state)
+
+    def merge_ingest(self, states, datagrams, readings, undecodable, invalid):
+        # Chamado pela thread do IngestSupervisor com a tabela agregada de um worker
+        self.datagrams_received += datagrams
+        self.readings_received += readings
+        self.undecodable_readings += undecodable
+        if invalid:
+            log.warning("Failed to unmarshal %d UDP messages", invalid)
+        changed = []
+        for device_id, (state, timestamp, count) in states.items():
+            if not self.registry.update_state(device_id, state, timestamp):
+                self.unknown_readings += count
+                continue
+            if self.history is not None:
+                self.history.add_state(device_id, state, timestamp)
+            changed.append((device_id, state))
+        if changed and self.subscriptions:
+            # As assinaturas pertencem ao event loop
+            self.loop.call_soon_threadsafe(self.subscriptions.publish_many, changed)
+
+    # Clientes
+
+    async def handle_client(self, reader, writer):
+        try:
+            first = await reader.read(1)
+            if not first:
+                return
+            if first == PREFACE[:1]:
+                if await reader.readexactly(len(PREFACE) - 1) != PREFACE[1:]:
+                    log.warning("Preface inválido do cliente")
+                    return
+                await self.handle_framed_client(reader, writer)
+            else:
+                await self.handle_raw_client(first, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_raw_message(self, data, reader):
+        # Sem frames não há tamanho: lê até a mensagem parsear, guardando os segmentos parciais
+        client_msg, timeout = None, None
+        while True:
+            try:
+                chunk = await asyncio.wait_for(reader.read(65535), timeout)
+            except asyncio.TimeoutError:
+                return client_msg  # Nada mais chegou: o lote que já parseou está completo
+            if not chunk:
+                return None
+            data += chunk
+            if len(data) > MAX_FRAME:
+                log.warning("Mensagem crua do cliente passou de %d bytes", MAX_FRAME)
+                return None
+            client_msg = messages.ClientMessage()
+            try:
+                client_msg.ParseFromString(data)
+            except Exception:
+                timeout = None
+                continue
+            if client_msg.request not in BULK_REQUESTS:
+                return client_msg
+            # Um lote cortado entre dois campos também parseia: espera pelos próximos segmentos
+            timeout = RAW_SETTLE
+
+    async def handle_raw_client(self, data, reader, writer):
+        # Clientes antigos: uma mensagem crua por requisição, como no gateway Go
+        while True:
+            client_msg = await self.read_raw_message(data, reader)
+            if client_msg is None:
+                return
+            data = b""
+            response = await self.process_client_message(client_msg)
+            writer.write(response.SerializeToString())
+            await writer.drain()
+
+    async def handle_framed_client(self, reader, writer):
+        # Conexão persistente com frames: várias requisições em voo, respostas na mesma ordem
+        subscriber = None
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    return
+                client_msg = messages.ClientMessage()
+                client_msg.ParseFromString(frame)
+                if client_msg.request in ("SUBSCRIBE", "UNSUBSCRIBE"):
+                    if subscriber is None:
+                        subscriber = Subscriber(writer)
+                    response = self.subscribe(subscriber, client_msg)
+                else:
+                    response = await self.process_client_message(client_msg)
+                writer.write(encode_frame(response))
+                await writer.drain()
+        finally:
+            if subscriber is not None:
+                self.subscriptions.unsubscribe(subscriber)
+                subscriber.close()
+
+    def subscribe(self, subscriber, client_msg):
+        """SUBSCRIBE responde com o estado atual dos dispositivos; as mudanças seguem como pushes."""
+        device_ids = list(client_msg.device_ids)
+        if client_msg.request == "UNSUBSCRIBE":
+            self.subscriptions.unsubscribe(subscriber, device_ids or None)
+            return messages.ClientResponse(response=f"Unsubscribed={len(device_ids) or 'all'}")
+
+        def current_state(device_id):
+            device = self.registry.get(device_id)
+            return device.last_state if device is not None else None
+
+        self.subscriptions.subscribe(subscriber, device_ids, current_state)
+        if ALL_DEVICES in device_ids:
+            response = self.get_device_states([device.id for device in self.registry.devices()])
+        else:
+            response = self.get_device_states(device_ids)
+        response.response = f"Subscribed={len(subscriber.device_ids)}"
+        return response
+
+    async def process_client_message(self, client_msg):
+        if client_msg.request == "GET_DEVICE_STATES":
+            return self.get_device_states(client_msg.device_ids)
+        if client_msg.request == "SET_DEVICE_STATES":
+            return await self.set_device_states(client_msg.states)
+
+        # Mesmas respostas do processClientMessage do gateway Go
+        parts = client_msg.request.split("|")
+        if len(parts) < 2:
+            return messages.ClientResponse(response="invalid request format, expected 'COMMAND|PARAM'")
+        command, device_id = parts[0], parts[1]
+
+        if command == "GET_DEVICE_STATE":
+            device = self.registry.get(device_id)
+            if device is None:
+                return messages.ClientResponse(response=f"Device ID={device_id} not found")
+            return messages.ClientResponse(response=f"Device ID={device_id}, LastState={device.last_state}")
+
+        if command == "SET_DEVICE_STATE":
+            device = self.registry.get(device_id)
+            if device is None:
+                return messages.ClientResponse(response=f"Device ID={device_id} not found")
+            if len(parts) != 3:
+                return messages.ClientResponse(response="Invalid request format COMMAND|PARAM|DATA")
+            if device.type == 0:
+                return messages.ClientResponse(response="Sensors cannot change state")
+            await self.send_message_to_device(device, parts[2])
+            return messages.ClientResponse(response=f"Device ID={device_id}, LastStateChanged={device.last_state} ")
+
+        if command == "GET_DEVICE_HISTORY":
+            return self.get_device_history(device_id, parts[2:])
+
+        return messages.ClientResponse(response=f"Unknown command: {command}")
+
+    def get_device_history(self, device_id, query):
+        # GET_DEVICE_HISTORY|id|consulta|args: resposta em JSON (ver TelemetryStore.query)
+        if self.history is None:
+            return messages.ClientResponse(response="Device history disabled")
+        if not query:
+            return messages.ClientResponse(response="Invalid request format GET_DEVICE_HISTORY|ID|QUERY|ARGS")
+        try:
+            result = self.history.query(device_id, query[0], query[1:])
+        except (ValueError, IndexError) as e:
+            return messages.ClientResponse(response=f"Invalid history query: {e}")
+        return messages.ClientResponse(response=json.dumps(result))
+
+    def get_device_states(self, device_ids):
+        response = messages.ClientResponse()
+        found = 0
+        for device_id in device_ids:
+            device = self.registry.get(device_id)
+            state = response.states.add(device_id=device_id)
+            if device is None:
+                state.error = "not found"
+            else:
+                state.found = True
+                state.state = device.last_state
+                found += 1
+        response.response = f"Devices found={found}/{len(device_ids)}"
+        return response
+
+    async def set_device_states(self, states):
+        response = messages.ClientResponse()
+        sends = []
+        for requested in states:
+            device = self.registry.get(requested.device_id)
+            state = response.states.add(device_id=requested.device_id, state=requested.state)
+            if device is None:
+                state.error = "not found"
+                continue
+            state.found = True
+            if device.type == 0:
+                state.error = "Sensors cannot change state"
+                continue
+            sends.append((state, self.send_message_to_device(device, requested.state)))
+        # Os comandos para os atuadores seguem em paralelo
+        results = await asyncio.gather(*(send for _, send in sends))
+        for (state, _), ack in zip(sends, results):
+            if ack is None:
+                state.error = "failed to send message to actuator"
+            elif not ack.applied:
+                state.error = ack.error or "not applied"
+            else:
+                state.state = ack.state
+        applied = sum(1 for state in response.states if not state.error)
+        response.response = f"Devices changed={applied}/{len(states)}"
+        return response
+
+    async def actuator_channel(self, device):
+        address = (device.ip, device.port)
+        channel = self.actuator_channels.get(address)
+        if channel is None or channel.closed:
+            async with self.channel_lock:
+                channel = self.actuator_channels.get(address)
+                if channel is None or channel.closed:
+                    channel = self.actuator_channels[address] = await ActuatorChannel.open(*address)
+        return channel
+
+    async def send_message_to_device(self, device, value):
+        """Envia o comando e devolve o DeviceAck do atuador, ou None se falhar."""
+        if not device.ip or not device.port:
+            log.warning("actuator ID=%s has invalid address or port", device.id)
+            return None
+        try:
+            if not self.framed_actuators:
+                _, writer = await asyncio.open_connection(device.ip, device.port)
+                writer.write(messages.DeviceResponse(device_id=device.id, response=value).SerializeToString())
+                await writer.drain()
+                writer.close()
+                log.debug("Message sent to actuator: ID=%s, Message=%s", device.id, value)
+                # Sem confirmação: assume que o valor enviado foi aplicado
+                return messages.DeviceAck(device_id=device.id, state=value, applied=True)
+            channel = await self.actuator_channel(device)
+            ack = await asyncio.wait_for(channel.send(device.id, value), self.command_timeout)
+            log.debug("Ack from actuator: ID=%s, State=%s, Applied=%s", device.id, ack.state, ack.applied)
+            return ack
+        except Exception as e:
+            # Conexão recusada ou perdida, timeout do ack ou frame inválido
+            log.warning("failed to send message to actuator ID=%s: %r", device.id, e)
+            return None
@@ -0,0 +1,199 @@
+import logging
+import multiprocessing
+import signal
+import socket
+import threading
+import time
+from messages import messages_pb2 as messages
+from LocationCodec import LocationDecoder
+from Payloads import payload_to_string
+from TelemetryBatcher import unpack_readings
+
+log = logging.getLogger("gateway.ingest")
+
+RECV_BUFFER = 65535
+
+# forkserver e não fork: o gateway já tem threads (event loop, supervisor) quando cria
+# os workers, e um fork herdaria locks possivelmente presos. Os workers importam o
+# __main__ de novo, por isso os scripts que sobem o gateway têm a guarda de __main__
+_context = multiprocessing.get_context("forkserver")
+
+
+def reuseport_socket(port, host="0.0.0.0"):
+    """Socket UDP que divide a porta com os outros workers; o kernel distribui os pacotes por origem."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    sock.bind((host, port))
+    return sock
+
+
+def free_udp_port(host="0.0.0.0"):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class IngestTable:
+    """Tabela agregada de um worker entre dois envios: último estado de cada dispositivo e contadores.
+
+    O processo do gateway recebe um item por dispositivo a cada flush_interval, e não
+    um por pacote, então o merge no DeviceRegistry não depende da taxa de telemetria.
+    """
+
+    def __init__(self):
+        self.states = {}  # device_id -> [estado, timestamp, leituras]
+        self.datagrams = 0
+        self.readings = 0
+        self.undecodable = 0
+        self.invalid = 0
+
+    def add(self, data, locations, now):
+        device_msg = messages.DeviceMessage()
+        try:
+            device_msg.ParseFromString(data)
+        except Exception:
+            self.invalid += 1
+            return
+        self.datagrams += 1
+        for reading in unpack_readings(device_msg):
+            self.readings += 1
+            if reading.WhichOneof("payload") == "location_delta" and not locations.decode(reading):
+                self.undecodable += 1
+                continue
+            entry = self.states.get(reading.device_id)
+            if entry is None:
+                self.states[reading.device_id] = [payload_to_string(reading), reading.timestamp or now, 1]
+            else:
+                entry[0] = payload_to_string(reading)
+                entry[1] = reading.timestamp or now
+                entry[2] += 1
+
+    def __bool__(self):
+        return bool(self.states) or self.datagrams > 0 or self.invalid > 0
+
+
+def run_worker(index, port, updates, stop, flush_interval):
+    """Laço de um worker: recebe, decodifica e agrega a telemetria, enviando a tabela a cada flush_interval."""
+    # Ctrl+C chega ao grupo inteiro; quem encerra os workers é o supervisor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    with reuseport_socket(port) as sock:
+        sock.settimeout(flush_interval)
+        ingest(index, sock, updates, stop, flush_interval)
+
+
+def ingest(index, sock, updates, stop, flush_interval):
+    buffer = bytearray(RECV_BUFFER)
+    view = memoryview(buffer)
+    # O kernel escolhe o socket pelo endereço de origem, então cada dispositivo fica
+    # sempre no mesmo worker e o LocationDecoder local vê todos os seus keyframes
+    locations = LocationDecoder()
+    table = IngestTable()
+    # Se o gateway morrer sem chamar stop() (SIGTERM, SIGKILL), o worker sai sozinho
+    parent = multiprocessing.parent_process()
+    deadline = time.monotonic() + flush_interval
+    while not stop.is_set():
+        try:
+            size = sock.recv_into(buffer)
+            table.add(view[:size], locations, time.time())
+        except socket.timeout:
+            pass
+        if time.monotonic() >= deadline:
+            if table:
+                updates.put((index, table.states, table.datagrams, table.readings, table.undecodable, table.invalid))
+                table = IngestTable()
+            deadline = time.monotonic() + flush_interval
+            if parent is not None and not parent.is_alive():
+                log.warning("Ingest worker %d: gateway process is gone, exiting", index)
+                return
+    if table:
+        updates.put((index, table.states, table.datagrams, table.readings, table.undecodable, table.invalid))
+
+
+class IngestSupervisor:
+    """Processos de ingestão de telemetria na mesma porta UDP (SO_REUSEPORT), um por núcleo.
+
+    Cada worker agrega o que recebe em uma IngestTable e a envia por uma fila;
+    uma thread deste processo entrega cada tabela a merge(states, datagrams, readings,
+    undecodable, invalid). Um worker que morre é reiniciado depois de restart_delay.
+    """
+
+    def __init__(self, port, merge, workers=None, flush_interval=0.1, restart_delay=1.0, check_interval=0.5):
+        self.port = port or free_udp_port()
+        self.merge = merge
+        self.workers = workers or multiprocessing.cpu_count()
+        self.flush_interval = flush_interval
+        self.restart_delay = restart_delay
+        self.check_interval = check_interval
+        self.updates = _context.Queue()
+        self.stop_event = _context.Event()
+        self.processes = [None] * self.workers
+        self.restarts = 0
+        self.running = False
+        self.threads = []
+
+    def spawn(self, index):
+        process = _context.Process(target=run_worker, name=f"ingest-{index}", daemon=True,
+                                   args=(index, self.port, self.updates, self.stop_event, self.flush_interval))
+        process.start()
+        self.processes[index] = process
+
+    def start(self):
+        self.running = True
+        for index in range(self.workers):
+            self.spawn(index)
+        self.threads = [
+            threading.Thread(target=self.drain, name="ingest-merge", daemon=True),
+            threading.Thread(target=self.supervise, name="ingest-supervisor", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        log.info("Ingest: %d workers on UDP port %d", self.workers, self.port)
+
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+        for thread in self.threads[1:]:
+            thread.join()  # O supervisor não reinicia mais ninguém
+        for process in self.processes:
+            if process is None:
+                continue  # Morreu e o supervisor parou antes de reiniciá-lo
+            process.join(self.flush_interval + 1.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            process.close()
+        self.updates.put(None)
+        self.threads[0].join()
+        self.updates.close()
+        self.updates.join_thread()
+
+    def drain(self):
+        while True:
+            update = self.updates.get()
+            if update is None:
+                return
+            try:
+                self.merge(*update[1:])
+            except Exception:
+                log.exception("Ingest: failed to merge update from worker %d", update[0])
+
+    def supervise(self):
+        while self.running:
+            time.sleep(self.check_interval)
+            for index, process in enumerate(self.processes):
+                if not self.running or process.is_alive():
+                    continue
+                log.warning("Ingest worker %d exited with code %s, restarting in %.1fs",
+                            index, process.exitcode, self.restart_delay)
+                # Libera o Process morto antes de criar o substituto
+                process.join()
+                process.close()
+                self.processes[index] = None
+                time.sleep(self.restart_delay)
+                if self.running:
+                    self.spawn(index)
+                    self.restarts += 1
+
+    def alive(self):
+        return sum(1 for process in self.processes if process is not None and process.is_alive())
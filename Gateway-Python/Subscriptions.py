@@ -0,0 +1,109 @@
+import asyncio
+from messages import messages_pb2 as messages
+from Framing import encode_frame
+
+ALL_DEVICES = "*"
+
+
+class Subscriber:
+    """Uma conexão de cliente com assinaturas: as mudanças pendentes, uma por dispositivo.
+
+    Uma mudança nova de um dispositivo que ainda não foi enviado substitui a anterior,
+    então um cliente lento recebe o último estado e a memória fica limitada ao número
+    de dispositivos assinados. Uma única tarefa escreve os pushes e espera o drain().
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.device_ids = set()
+        self.pending = {}  # device_id -> último estado ainda não enviado
+        self.ready = asyncio.Event()
+        self.task = asyncio.ensure_future(self.push_updates())
+        self.updates_sent = 0
+        self.coalesced = 0
+
+    def push(self, device_id, state):
+        if device_id in self.pending:
+            self.coalesced += 1
+        self.pending[device_id] = state
+        self.ready.set()
+
+    async def push_updates(self):
+        try:
+            while True:
+                await self.ready.wait()
+                self.ready.clear()
+                pending, self.pending = self.pending, {}
+                response = messages.ClientResponse(response="UPDATE", update=True)
+                for device_id, state in pending.items():
+                    response.states.add(device_id=device_id, state=state, found=True)
+                self.writer.write(encode_frame(response))
+                self.updates_sent += len(pending)
+                # Enquanto o cliente não lê, as mudanças se acumulam (e se fundem) em pending
+                await self.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    def close(self):
+        self.task.cancel()
+
+
+class Subscriptions:
+    """Assinaturas de todas as conexões, indexadas por dispositivo.
+
+    publish() é chamado a cada leitura ingerida; sem assinantes para o dispositivo
+    custa uma consulta a dict. Um push só sai quando o estado muda em relação ao
+    último publicado. ALL_DEVICES ("*") assina todos os dispositivos.
+    """
+
+    def __init__(self):
+        self.by_device = {}  # device_id -> set de Subscriber
+        self.everything = set()  # Assinantes de ALL_DEVICES
+        self.last = {}  # device_id -> último estado publicado
+
+    def subscribe(self, subscriber, device_ids, current_state):
+        for device_id in device_ids:
+            subscriber.device_ids.add(device_id)
+            if device_id == ALL_DEVICES:
+                self.everything.add(subscriber)
+                continue
+            self.by_device.setdefault(device_id, set()).add(subscriber)
+            state = current_state(device_id)
+            if state is not None:
+                self.last.setdefault(device_id, state)
+
+    def unsubscribe(self, subscriber, device_ids=None):
+        for device_id in list(subscriber.device_ids if device_ids is None else device_ids):
+            subscriber.device_ids.discard(device_id)
+            if device_id == ALL_DEVICES:
+                self.everything.discard(subscriber)
+                if not self.everything:
+                    self.last = {key: state for key, state in self.last.items() if key in self.by_device}
+                continue
+            watchers = self.by_device.get(device_id)
+            if watchers is not None:
+                watchers.discard(subscriber)
+                if not watchers:
+                    del self.by_device[device_id]
+                    if not self.everything:
+                        self.last.pop(device_id, None)
+
+    def publish(self, device_id, state):
+        watchers = self.by_device.get(device_id)
+        if watchers is None and not self.everything:
+            return
+        if self.last.get(device_id) == state:
+            return
+        self.last[device_id] = state
+        for subscriber in watchers or ():
+            subscriber.push(device_id, state)
+        for subscriber in self.everything:
+            if watchers is None or subscriber not in watchers:
+                subscriber.push(device_id, state)
+
+    def publish_many(self, states):
+        for device_id, state in states:
+            self.publish(device_id, state)
+
+    def __len__(self):
+        return len(self.by_device) + len(self.everything)
@@ -0,0 +1,253 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Colunas numéricas guardadas para cada tipo de leitura
+COLUMNS = {
+    "ac": ("state", "temperature"),
+    "headlight": ("on",),
+    "location": ("lon", "lat"),
+}
+
+INITIAL_CAPACITY = 16
+MAX_BUCKETS = 100_000  # Janelas por downsample: bincount aloca uma posição por janela
+
+
+def message_values(message):
+    """(tipo, valores) da leitura de um DeviceMessage tipado ou em texto; None se não for numérica."""
+    kind = message.WhichOneof("payload")
+    if kind == "ac":
+        return kind, (message.ac.state, message.ac.temperature)
+    if kind == "headlight":
+        return kind, (float(message.headlight.on),)
+    if kind == "location":
+        return kind, (message.location.lon, message.location.lat)
+    return state_values(message.data)
+
+
+def state_values(state):
+    """(tipo, valores) do formato texto do gateway ("AC|2|25.3", "Headlight|on", "x|y")."""
+    fields = state.split("|")
+    try:
+        if fields[0] == "AC":
+            return "ac", (float(fields[1]), float(fields[2]))
+        if fields[0] == "Headlight":
+            return "headlight", (1.0 if fields[1] == "on" else 0.0,)
+        if len(fields) == 2:
+            return "location", (float(fields[0]), float(fields[1]))
+    except (IndexError, ValueError):
+        pass
+    return None
+
+
+class DeviceHistory:
+    """Ring buffer de um dispositivo: timestamps (float64) e uma linha contígua por coluna (colunas x amostras).
+
+    Os arrays começam pequenos e dobram até capacity; a partir daí a amostra nova
+    sobrescreve a mais antiga. As consultas trabalham sobre os arrays inteiros, sem
+    criar um objeto Python por amostra, e as agregações percorrem memória contígua.
+    """
+
+    __slots__ = ("kind", "columns", "capacity", "times", "values", "next", "size")
+
+    def __init__(self, kind, capacity):
+        self.kind = kind
+        self.columns = COLUMNS[kind]
+        self.capacity = capacity
+        initial = min(INITIAL_CAPACITY, capacity)
+        self.times = np.empty(initial)
+        self.values = np.empty((len(self.columns), initial))
+        self.next = 0  # Posição da próxima escrita
+        self.size = 0
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes
+
+    def append(self, timestamp, values):
+        """Grava uma amostra; devolve quantos bytes os arrays cresceram (quase sempre 0)."""
+        grown = 0
+        if self.size == len(self.times) < self.capacity:
+            before = self.nbytes
+            length = min(2 * len(self.times), self.capacity)
+            self.times = np.resize(self.times, length)
+            resized = np.empty((len(self.columns), length))
+            resized[:, :self.size] = self.values
+            self.values = resized
+            self.next = self.size  # Antes da capacidade o buffer ainda não deu a volta
+            grown = self.nbytes - before
+        self.times[self.next] = timestamp
+        self.values[:, self.next] = values
+        self.next = (self.next + 1) % len(self.times)
+        if self.size < len(self.times):
+            self.size += 1
+        return grown
+
+    def chronological(self, indices):
+        # Posições do buffer em ordem de chegada: as de next em diante são as mais antigas
+        if self.size < len(self.times):
+            return indices
+        return np.concatenate((indices[indices >= self.next], indices[indices < self.next]))
+
+    def last(self, n):
+        n = min(max(n, 0), self.size)
+        indices = np.arange(self.next - n, self.next) % len(self.times)
+        return self.times.take(indices), self.values.take(indices, axis=1)
+
+    def mask(self, t0, t1):
+        # Máscara e não searchsorted: leituras UDP podem chegar fora de ordem
+        times = self.times[:self.size]
+        return (times >= t0) & (times <= t1)
+
+    def range(self, t0, t1):
+        indices = self.chronological(np.flatnonzero(self.mask(t0, t1)))
+        return self.times.take(indices), self.values.take(indices, axis=1)
+
+    def select(self, t0, t1):
+        """Amostras em [t0, t1] fora de ordem, para agregações que não dependem dela."""
+        # take/compress devolvem colunas contíguas; a indexação booleana em 2D não
+        mask = self.mask(t0, t1)
+        return self.times[:self.size].compress(mask), self.values[:, :self.size].compress(mask, axis=1)
+
+
+def summarize(times, values, columns):
+    if not len(times):
+        return {"count": 0}
+    return {
+        "count": len(times),
+        "first": float(times.min()),
+        "last": float(times.max()),
+        "min": dict(zip(columns, values.min(axis=1).tolist())),
+        "max": dict(zip(columns, values.max(axis=1).tolist())),
+        "mean": dict(zip(columns, values.mean(axis=1).tolist())),
+    }
+
+
+def check_buckets(t0, t1, bucket):
+    # bucket vem do cliente: um valor minúsculo faria o bincount alocar bilhões de posições
+    if not np.isfinite(bucket) or bucket <= 0:
+        raise ValueError(f"bucket must be a positive number of seconds, got {bucket}")
+    if not np.isfinite(t1 - t0) or (t1 - t0) / bucket > MAX_BUCKETS:
+        raise ValueError(f"downsample limited to {MAX_BUCKETS} buckets")
+
+
+def downsample(times, values, t0, bucket):
+    """Média de cada coluna em janelas de bucket segundos a partir de t0; janelas vazias são omitidas."""
+    check_buckets(t0, t0 if not len(times) else float(times.max()), bucket)
+    if not len(times):
+        return np.empty(0), np.empty((len(values), 0))
+    index = ((times - t0) // bucket).astype(np.intp)
+    counts = np.bincount(index)
+    sums = np.stack([np.bincount(index, weights=column, minlength=len(counts)) for column in values])
+    filled = counts > 0
+    return float(t0) + np.flatnonzero(filled) * bucket, sums[:, filled] / counts[filled]
+
+
+class TelemetryStore:
+    """Histórico recente da telemetria de cada dispositivo, em arrays NumPy por dispositivo.
+
+    Cada dispositivo guarda até capacity amostras. Quando a soma dos arrays passa de
+    memory_budget bytes, o histórico inteiro do dispositivo atualizado há mais tempo é
+    descartado (LRU), até voltar ao orçamento. As consultas devolvem arrays NumPy (uma
+    linha por coluna); query() monta a resposta em JSON para GET_DEVICE_HISTORY.
+    """
+
+    def __init__(self, capacity=4096, memory_budget=64 * 1024 * 1024):
+        self.capacity = capacity
+        self.memory_budget = memory_budget
+        self.devices = OrderedDict()  # device_id -> DeviceHistory, do menos para o mais recente
+        self.nbytes = 0
+        self.samples_added = 0
+        self.devices_evicted = 0
+        # A ingestão pode vir do event loop ou da thread do IngestSupervisor
+        self.lock = threading.Lock()
+
+    def add(self, device_id, message, timestamp):
+        values = message_values(message)
+        if values is not None:
+            self.append(device_id, timestamp, *values)
+
+    def add_state(self, device_id, state, timestamp):
+        values = state_values(state)
+        if values is not None:
+            self.append(device_id, timestamp, *values)
+
+    def append(self, device_id, timestamp, kind, values):
+        with self.lock:
+            before = self.nbytes
+            history = self.devices.get(device_id)
+            if history is None or history.kind != kind:
+                if history is not None:
+                    self.nbytes -= history.nbytes
+                history = self.devices[device_id] = DeviceHistory(kind, self.capacity)
+                self.nbytes += history.nbytes
+            self.devices.move_to_end(device_id)  # O mais recente fica no fim
+            self.samples_added += 1
+            self.nbytes += history.append(timestamp, values)
+            # Um dispositivo novo também ocupa memória: confere o orçamento sempre que cresce
+            if self.nbytes <= before:
+                return
+            while self.nbytes > self.memory_budget and len(self.devices) > 1:
+                _, evicted = self.devices.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self.devices_evicted += 1
+
+    def _select(self, device_id, select):
+        with self.lock:
+            history = self.devices.get(device_id)
+            if history is None:
+                return None
+            times, values = select(history)
+            return history.columns, times, values
+
+    def last(self, device_id, n):
+        """As últimas n amostras: (colunas, timestamps, valores por coluna) ou None."""
+        return self._select(device_id, lambda history: history.last(n))
+
+    def range(self, device_id, t0, t1):
+        """As amostras com timestamp em [t0, t1]: (colunas, timestamps, valores por coluna) ou None."""
+        return self._select(device_id, lambda history: history.range(t0, t1))
+
+    def stats(self, device_id, t0=-np.inf, t1=np.inf):
+        """Quantidade, min, max e média de cada coluna em [t0, t1]."""
+        selected = self._select(device_id, lambda history: history.select(t0, t1))
+        if selected is None:
+            return None
+        columns, times, values = selected
+        return summarize(times, values, columns)
+
+    def downsample(self, device_id, t0, t1, bucket):
+        """Médias em janelas de bucket segundos em [t0, t1]: (colunas, inícios das janelas, médias por coluna) ou None."""
+        check_buckets(t0, t1, bucket)
+        selected = self._select(device_id, lambda history: history.select(t0, t1))
+        if selected is None:
+            return None
+        columns, times, values = selected
+        return (columns, *downsample(times, values, t0, bucket))
+
+    def query(self, device_id, query, args):
+        """Consulta em texto de GET_DEVICE_HISTORY|id|consulta|args; devolve um dict serializável em JSON.
+
+        last|n, range|t0|t1, stats[|t0|t1] e downsample|t0|t1|bucket (segundos).
+        """
+        if query == "last":
+            selected = self.last(device_id, int(args[0]))
+        elif query == "range":
+            selected = self.range(device_id, float(args[0]), float(args[1]))
+        elif query == "stats":
+            bounds = [float(arg) for arg in args[:2]]
+            result = self.stats(device_id, *bounds)
+            return {"error": "no history"} if result is None else result
+        elif query == "downsample":
+            selected = self.downsample(device_id, float(args[0]), float(args[1]), float(args[2]))
+        else:
+            raise ValueError(f"unknown history query: {query}")
+        if selected is None:
+            return {"error": "no history"}
+        columns, times, values = selected
+        result = {"timestamps": times.tolist()}
+        result.update(zip(columns, values.tolist()))
+        return result
+
+    def __len__(self):
+        return len(self.devices)
@@ -0,0 +1,6 @@
+sudo cp ../DeviceClasses/Framing.py Framing.py
+sudo cp ../DeviceClasses/Payloads.py Payloads.py
+sudo cp ../DeviceClasses/LocationCodec.py LocationCodec.py
+sudo cp ../DeviceClasses/TelemetryBatcher.py TelemetryBatcher.py
+sudo docker build -t gateway-python .
+sudo docker run --rm -p 9991:9991 gateway-python "$@"
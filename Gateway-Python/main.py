@@ -0,0 +1,55 @@
+import argparse
+import logging
+import os
+import sys
+
+# Ao rodar direto do repositório (sem o launch.sh), usa os módulos de DeviceClasses
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DeviceClasses"))
+
+from Gateway import Gateway
+from TelemetryStore import TelemetryStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway em Python compatível com o gateway Go")
+    parser.add_argument("--multicast-addr", default="224.0.0.1")
+    parser.add_argument("--multicast-port", type=int, default=9999)
+    parser.add_argument("--udp-port", type=int, default=9990, help="Porta UDP de telemetria")
+    parser.add_argument("--tcp-port", type=int, default=9991, help="Porta TCP dos clientes")
+    parser.add_argument("--advertise-ip", default=None, help="IP anunciado no DISCOVERY_REQUEST (padrão: IP local)")
+    parser.add_argument("--discovery-interval", type=float, default=5, help="Intervalo entre descobertas (s)")
+    parser.add_argument("--shards", type=int, default=16, help="Shards do registro de dispositivos")
+    parser.add_argument("--raw-actuators", action="store_true",
+                        help="Uma conexão por comando, sem DeviceAck (atuadores antigos)")
+    parser.add_argument("--command-timeout", type=float, default=5.0, help="Espera máxima pelo DeviceAck (s)")
+    parser.add_argument("--ingest-workers", type=int, default=0,
+                        help="Processos de ingestão de telemetria com SO_REUSEPORT (0 = no próprio event loop)")
+    parser.add_argument("--history-budget", type=float, default=64,
+                        help="Memória do histórico de telemetria em MiB (0 desliga GET_DEVICE_HISTORY)")
+    parser.add_argument("--history-samples", type=int, default=4096, help="Amostras guardadas por dispositivo")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(message)s")
+
+    gateway = Gateway(
+        multicast_addr=args.multicast_addr,
+        multicast_port=args.multicast_port,
+        udp_port=args.udp_port,
+        tcp_port=args.tcp_port,
+        advertise_ip=args.advertise_ip,
+        discovery_interval=args.discovery_interval,
+        shards=args.shards,
+        framed_actuators=not args.raw_actuators,
+        command_timeout=args.command_timeout,
+        ingest_workers=args.ingest_workers,
+        history=TelemetryStore(args.history_samples, int(args.history_budget * 1024 * 1024)) if args.history_budget else None,
+    )
+
+    # Executa o gateway
+    gateway.run()
+
+
+# Os workers de ingestão (forkserver) importam este módulo de novo: só roda como script
+if __name__ == "__main__":
+    main()
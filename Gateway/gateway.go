@@ -3,12 +3,15 @@ package main
 import (
 	"fmt"
 	"log"
+	"math"
 	"net"
+	"strconv"
 	"strings"
 	"sync"
 	"time"
 
 	"github.com/username/gateway/messages"
+	"google.golang.org/protobuf/encoding/protowire"
 	"google.golang.org/protobuf/proto"
 )
 
@@ -20,16 +23,45 @@ type Device struct {
 	LastState string
 }
 
+// Leitura de um DeviceMessage decodificada direto do fio. O messages.pb.go foi gerado
+// antes do lote (readings, campo 4) e do oneof payload (campos 5 a 8): com proto.Unmarshal
+// esses campos virariam campos desconhecidos e a leitura chegaria vazia
+type reading struct {
+	DeviceID    string
+	Data        string         // Texto antigo ("AC|2|25.3", "Headlight|on", "lon|lat")
+	Delta       *locationDelta // LocationDelta, resolvido com o último keyframe do dispositivo
+	Unsupported bool           // Campo que este gateway não conhece: a leitura é descartada
+}
+
+type locationDelta struct {
+	Keyframe uint32
+	Absolute bool
+	Lon, Lat int64 // Ponto fixo de 1e-6 grau
+}
+
+type keyframe struct {
+	Number   uint32
+	Lon, Lat int64
+}
+
+const locationScale = 1e6 // Mesma escala do LocationCodec.py
+
 type Gateway struct {
-	devices map[string]Device
-	clients map[string]net.Conn
-	mutex   sync.RWMutex
+	devices   map[string]Device
+	clients   map[string]net.Conn
+	keyframes map[string]keyframe // Último keyframe de localização de cada dispositivo
+	mutex     sync.RWMutex
+
+	readingsReceived    uint64
+	undecodableReadings uint64 // LocationDelta cujo keyframe não chegou
+	unsupportedReadings uint64
 }
 
 func NewGateway() *Gateway {
 	return &Gateway{
-		devices: make(map[string]Device),
-		clients: make(map[string]net.Conn),
+		devices:   make(map[string]Device),
+		clients:   make(map[string]net.Conn),
+		keyframes: make(map[string]keyframe),
 	}
 }
 
@@ -61,7 +93,7 @@ func (g *Gateway) handleClient(port int) {
 func (g *Gateway) processClient(conn net.Conn) {
 	defer conn.Close()
 
-	buf := make([]byte, 1024) // Buffer para armazenar mensagens
+	buf := make([]byte, 65535) // Buffer para armazenar mensagens
 
 	for {
 		n, err := conn.Read(buf)
@@ -298,7 +330,7 @@ func (g *Gateway) listenForResponses(multicastAddr string) {
 		log.Fatalf("Failed to listen on multicast address: %v", err)
 	}
 	defer conn.Close()
-	buf := make([]byte, 1024)
+	buf := make([]byte, 65535) // Tamanho máximo de um datagrama UDP
 	timeout := time.After(2 * time.Second)
 
 	for {
@@ -348,23 +380,145 @@ func (g *Gateway) processDevice(discoverResp *messages.DiscoverResponse) {
 	log.Printf("Discovered device: ID=%s, IP=%s, Port=%d, Type=%d", device.ID, device.IP, device.Port, device.Type)
 }
 
+// forEachField chama fn para cada campo da mensagem: value nos campos length-delimited,
+// scalar nos varint e fixed32/fixed64 (os bits do float/double)
+func forEachField(b []byte, fn func(num protowire.Number, value []byte, scalar uint64)) error {
+	for len(b) > 0 {
+		num, typ, n := protowire.ConsumeTag(b)
+		if n < 0 {
+			return protowire.ParseError(n)
+		}
+		b = b[n:]
+		var value []byte
+		var scalar uint64
+		switch typ {
+		case protowire.BytesType:
+			value, n = protowire.ConsumeBytes(b)
+		case protowire.VarintType:
+			scalar, n = protowire.ConsumeVarint(b)
+		case protowire.Fixed32Type:
+			var bits uint32
+			bits, n = protowire.ConsumeFixed32(b)
+			scalar = uint64(bits)
+		case protowire.Fixed64Type:
+			scalar, n = protowire.ConsumeFixed64(b)
+		default:
+			n = protowire.ConsumeFieldValue(num, typ, b)
+		}
+		if n < 0 {
+			return protowire.ParseError(n)
+		}
+		b = b[n:]
+		fn(num, value, scalar)
+	}
+	return nil
+}
+
+// decodeDeviceMessage devolve a leitura do datagrama e, se for um lote, as leituras do
+// campo readings. Os payloads tipados viram o texto antigo, como o payload_to_string do
+// gateway Python
+func decodeDeviceMessage(b []byte) (reading, []reading, error) {
+	var msg reading
+	var batch []reading
+	var err error
+	parseErr := forEachField(b, func(num protowire.Number, value []byte, scalar uint64) {
+		if err != nil {
+			return
+		}
+		switch num {
+		case 1:
+			msg.DeviceID = string(value)
+		case 2:
+			msg.Data = string(value)
+		case 3:
+			// timestamp: este gateway só guarda o último estado
+		case 4:
+			var child reading
+			child, _, err = decodeDeviceMessage(value)
+			batch = append(batch, child)
+		case 5:
+			var state int32
+			var temperature float32
+			err = forEachField(value, func(num protowire.Number, _ []byte, scalar uint64) {
+				switch num {
+				case 1:
+					state = int32(scalar)
+				case 2:
+					temperature = math.Float32frombits(uint32(scalar))
+				}
+			})
+			msg.Data = fmt.Sprintf("AC|%d|%.1f", state, temperature)
+		case 6:
+			on := false
+			err = forEachField(value, func(num protowire.Number, _ []byte, scalar uint64) {
+				if num == 1 {
+					on = protowire.DecodeBool(scalar)
+				}
+			})
+			msg.Data = "Headlight|off"
+			if on {
+				msg.Data = "Headlight|on"
+			}
+		case 7:
+			var lat, lon float64
+			err = forEachField(value, func(num protowire.Number, _ []byte, scalar uint64) {
+				switch num {
+				case 1:
+					lat = math.Float64frombits(scalar)
+				case 2:
+					lon = math.Float64frombits(scalar)
+				}
+			})
+			msg.Data = formatLocation(lon, lat)
+		case 8:
+			delta := &locationDelta{}
+			err = forEachField(value, func(num protowire.Number, _ []byte, scalar uint64) {
+				switch num {
+				case 1:
+					delta.Keyframe = uint32(scalar)
+				case 2:
+					delta.Absolute = protowire.DecodeBool(scalar)
+				case 3:
+					delta.Lon = protowire.DecodeZigZag(scalar & math.MaxUint32)
+				case 4:
+					delta.Lat = protowire.DecodeZigZag(scalar & math.MaxUint32)
+				}
+			})
+			msg.Delta = delta
+		default:
+			msg.Unsupported = true
+		}
+	})
+	if parseErr != nil {
+		return msg, nil, parseErr
+	}
+	return msg, batch, err
+}
+
+func formatLocation(lon, lat float64) string {
+	return strconv.FormatFloat(lon, 'f', -1, 64) + "|" + strconv.FormatFloat(lat, 'f', -1, 64)
+}
+
 func (g *Gateway) handleDeviceConnection(buf []byte, n int, addr *net.UDPAddr) {
-	var deviceMsg messages.DeviceMessage
-	err := proto.Unmarshal(buf[:n], &deviceMsg)
+	deviceMsg, batch, err := decodeDeviceMessage(buf[:n])
 	if err != nil {
-		log.Printf("Failed to unmarshal UDP message")
+		log.Printf("Failed to unmarshal UDP message: %v", err)
 		return
 	}
+	if len(batch) == 0 {
+		// Leitura simples: o próprio datagrama
+		batch = []reading{deviceMsg}
+	}
 
-	log.Printf("Received UDP message from %s: ID=%s, Data=%s",
-		addr.String(), deviceMsg.DeviceId, deviceMsg.Data)
-	g.processDeviceMessage(&deviceMsg)
+	log.Printf("Received UDP message from %s: ID=%s, Data=%s, Readings=%d",
+		addr.String(), deviceMsg.DeviceID, deviceMsg.Data, len(batch))
+	g.processDeviceMessage(batch)
 }
 
 func (g *Gateway) handleUDPConnection(conn *net.UDPConn) {
 	defer conn.Close()
 
-	buf := make([]byte, 1024)
+	buf := make([]byte, 65535) // Tamanho máximo de um datagrama UDP (lotes de leituras)
 	localAddr := conn.LocalAddr().String()
 	log.Printf("Gateway listening on UDP: %s", localAddr)
 	for {
@@ -375,23 +529,62 @@ func (g *Gateway) handleUDPConnection(conn *net.UDPConn) {
 			return
 		}
 
-		go g.handleDeviceConnection(buf, n, addr)
+		// Copia o datagrama: buf é reutilizado na próxima leitura enquanto a goroutine processa
+		datagram := make([]byte, n)
+		copy(datagram, buf[:n])
+		go g.handleDeviceConnection(datagram, n, addr)
+	}
+}
+
+// resolveLocation troca o LocationDelta pelo texto "lon|lat"; false se o keyframe de
+// referência se perdeu (mesma regra do LocationDecoder do gateway Python)
+func (g *Gateway) resolveLocation(deviceID string, delta *locationDelta) (string, bool) {
+	lon, lat := delta.Lon, delta.Lat
+	if delta.Absolute {
+		g.keyframes[deviceID] = keyframe{Number: delta.Keyframe, Lon: lon, Lat: lat}
+	} else {
+		origin, exists := g.keyframes[deviceID]
+		if !exists || origin.Number != delta.Keyframe {
+			return "", false
+		}
+		lon, lat = origin.Lon+lon, origin.Lat+lat
 	}
+	return formatLocation(float64(lon)/locationScale, float64(lat)/locationScale), true
 }
 
-func (g *Gateway) processDeviceMessage(deviceMsg *messages.DeviceMessage) {
+func (g *Gateway) processDeviceMessage(readings []reading) {
 	g.mutex.Lock()
 	defer g.mutex.Unlock()
 
-	log.Printf("Processing DeviceMessage: ID=%s, Data=%s", deviceMsg.DeviceId, deviceMsg.Data)
+	for _, deviceMsg := range readings {
+		g.readingsReceived++
+		if deviceMsg.Unsupported {
+			g.unsupportedReadings++
+			log.Printf("Device ID=%s sent an unsupported payload. Dropped %d of %d readings so far.",
+				deviceMsg.DeviceID, g.unsupportedReadings, g.readingsReceived)
+			continue
+		}
+		if deviceMsg.Delta != nil {
+			data, ok := g.resolveLocation(deviceMsg.DeviceID, deviceMsg.Delta)
+			if !ok {
+				g.undecodableReadings++
+				log.Printf("Device ID=%s sent a location delta for a missing keyframe. Dropped %d of %d readings so far.",
+					deviceMsg.DeviceID, g.undecodableReadings, g.readingsReceived)
+				continue
+			}
+			deviceMsg.Data = data
+		}
 
-	device, exists := g.devices[deviceMsg.DeviceId]
-	if exists {
-		device.LastState = deviceMsg.Data
-		g.devices[deviceMsg.DeviceId] = device
-		log.Printf("Device ID=%s already discovered. Updated LastState to: %s", deviceMsg.DeviceId, deviceMsg.Data)
-	} else {
-		log.Printf("Device ID=%s not discovered. Ignoring message or add it if required.", deviceMsg.DeviceId)
+		log.Printf("Processing DeviceMessage: ID=%s, Data=%s", deviceMsg.DeviceID, deviceMsg.Data)
+
+		device, exists := g.devices[deviceMsg.DeviceID]
+		if exists {
+			device.LastState = deviceMsg.Data
+			g.devices[deviceMsg.DeviceID] = device
+			log.Printf("Device ID=%s already discovered. Updated LastState to: %s", deviceMsg.DeviceID, deviceMsg.Data)
+		} else {
+			log.Printf("Device ID=%s not discovered. Ignoring message or add it if required.", deviceMsg.DeviceID)
+		}
 	}
 }
 
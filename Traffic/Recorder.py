@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import socket
+import time
+from messages import messages_pb2 as messages
+from DiscoveryResponder import local_ip
+from TrafficLog import DEVICE_MESSAGE, DISCOVER_RESPONSE, TrafficWriter
+
+log = logging.getLogger("recorder")
+
+
+def multicast_socket(multicast_addr, multicast_port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("", multicast_port))
+    mreq = socket.inet_aton(multicast_addr) + socket.inet_aton("0.0.0.0")
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    sock.setblocking(False)
+    return sock
+
+
+class RecordingProtocol(asyncio.DatagramProtocol):
+    """Grava no log os datagramas de um socket que passam por accept(data)."""
+
+    def __init__(self, recorder, field, accept):
+        self.recorder = recorder
+        self.field = field
+        self.accept = accept
+
+    def datagram_received(self, data, addr):
+        if self.accept(data):
+            self.recorder.writer.append(time.time(), self.field, data)
+
+
+def is_discover_response(data):
+    response = messages.DiscoverResponse()
+    try:
+        response.ParseFromString(data)
+    except Exception:
+        return False
+    # O grupo também recebe os DISCOVERY_REQUEST dos gateways
+    return bool(response.device_id) and response.device_id != "DISCOVERY_REQUEST"
+
+
+def is_device_message(data):
+    try:
+        messages.DeviceMessage.FromString(data)
+    except Exception:
+        return False
+    return True
+
+
+class Recorder:
+    """Grava o tráfego dos dispositivos: as respostas de descoberta do grupo multicast e a telemetria.
+
+    Para os dispositivos o gravador é só mais um gateway: ele envia DISCOVERY_REQUEST
+    com o próprio endereço e passa a receber a telemetria de todos, sem tirar nada
+    do gateway de produção. Os datagramas vão para o log exatamente como chegaram.
+    """
+
+    def __init__(self, path, multicast_addr="224.0.0.1", multicast_port=9999, udp_port=9992,
+                 advertise_ip=None, discovery_interval=5, flush_interval=1.0):
+        self.writer = TrafficWriter(path)
+        self.multicast_addr = multicast_addr
+        self.multicast_port = multicast_port
+        self.udp_port = udp_port
+        self.advertise_ip = advertise_ip or local_ip()  # Como os dispositivos: alcançável de outras máquinas
+        self.discovery_interval = discovery_interval
+        self.flush_interval = flush_interval
+        self.transports = []
+        self.tasks = []
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        discovery, _ = await loop.create_datagram_endpoint(
+            lambda: RecordingProtocol(self, DISCOVER_RESPONSE, is_discover_response),
+            sock=multicast_socket(self.multicast_addr, self.multicast_port),
+        )
+        telemetry, _ = await loop.create_datagram_endpoint(
+            lambda: RecordingProtocol(self, DEVICE_MESSAGE, is_device_message),
+            local_addr=("0.0.0.0", self.udp_port),
+        )
+        self.udp_port = telemetry.get_extra_info("sockname")[1]
+        self.transports = [discovery, telemetry]
+        log.info("Recording to %s, telemetry on UDP port %d", self.writer.path, self.udp_port)
+        self.tasks = [asyncio.ensure_future(self.discover_devices()), asyncio.ensure_future(self.flush())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        for transport in self.transports:
+            transport.close()
+        self.writer.close()
+        log.info("Recorded %d records (%d bytes)", self.writer.records, self.writer.bytes_written)
+
+    async def discover_devices(self):
+        loop = asyncio.get_running_loop()
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sender.setblocking(False)
+        transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, sock=sender)
+        self.transports.append(transport)
+        data = messages.DiscoverMessage(request="DISCOVERY_REQUEST", ip=self.advertise_ip,
+                                        port=self.udp_port).SerializeToString()
+        while True:
+            transport.sendto(data, (self.multicast_addr, self.multicast_port))
+            await asyncio.sleep(self.discovery_interval)
+
+    async def flush(self):
+        # O writer grava por tamanho; isto limita o que se perde se o processo morrer
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.writer.flush()
+
+    async def record(self, duration=None):
+        await self.start()
+        try:
+            if duration is None:
+                await asyncio.Event().wait()
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            await self.stop()
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import socket
+import time
+from messages import messages_pb2 as messages
+from DiscoveryResponder import DISCOVERY_WINDOW, DiscoveryResponder
+from Recorder import multicast_socket
+from TrafficLog import DISCOVER_RESPONSE, TrafficReader
+
+log = logging.getLogger("replayer")
+
+
+def copy_id(device_id, copy):
+    """ID do dispositivo na cópia copy da frota; a cópia 0 mantém o ID gravado."""
+    return device_id if copy == 0 else f"{device_id}-R{copy}"
+
+
+class DiscoveryListener(asyncio.DatagramProtocol):
+    """Responde aos DISCOVERY_REQUEST em nome de todos os dispositivos do log, como eles fariam."""
+
+    def __init__(self, replayer):
+        self.replayer = replayer
+
+    def datagram_received(self, data, addr):
+        request = messages.DiscoverMessage()
+        try:
+            request.ParseFromString(data)
+        except Exception:
+            return
+        if request.request == "DISCOVERY_REQUEST":
+            self.replayer.add_gateway(request.ip, request.port)
+
+
+class Replayer:
+    """Reenvia um log do Recorder por UDP, para um gateway que não sabe que os dispositivos não existem.
+
+    speed=1 mantém os intervalos gravados, speed=10 os divide por 10 e speed=0 envia
+    o mais rápido possível. Com copies > 1 cada registro sai copies vezes, com IDs
+    reescritos (copy_id), para multiplicar a frota. Os gateways são descobertos como
+    os dispositivos descobrem: pelo DISCOVERY_REQUEST no grupo multicast, respondido
+    com um DiscoverResponse de cada dispositivo (e cópia) visto no log, espalhados por
+    discovery_window segundos pelo DiscoveryResponder. Os timestamps das leituras são
+    deslocados para o momento do reenvio, a menos que retime=False.
+    """
+
+    def __init__(self, path, multicast_addr="224.0.0.1", multicast_port=9999, speed=1.0, copies=1,
+                 gateways=(), retime=True, advertise_ip=None, settle=0.5, discovery_window=DISCOVERY_WINDOW):
+        self.path = path
+        self.multicast_addr = multicast_addr
+        self.multicast_port = multicast_port
+        self.speed = speed
+        self.copies = copies
+        self.gateways = list(gateways)
+        self.gateway_found = asyncio.Event()
+        self.retime = retime
+        self.advertise_ip = advertise_ip
+        self.settle = settle
+        self.discovery_window = discovery_window
+        self.responder = None
+        self.devices = {}  # device_id -> DiscoverResponse gravado (o último)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+        self.transport = None
+        self.records_replayed = 0
+        self.datagrams_sent = 0
+        self.send_errors = 0
+        self.late = 0  # Registros que saíram depois do horário previsto
+
+    def load_devices(self):
+        with TrafficReader(self.path) as reader:
+            for _, field, data in reader:
+                if field == DISCOVER_RESPONSE:
+                    response = messages.DiscoverResponse.FromString(data)
+                    self.devices[response.device_id] = response
+
+    def discovery_responses(self):
+        for response in self.devices.values():
+            for copy in range(self.copies):
+                copied = messages.DiscoverResponse()
+                copied.CopyFrom(response)
+                copied.device_id = copy_id(response.device_id, copy)
+                if self.advertise_ip:
+                    copied.ip = self.advertise_ip
+                yield copied.SerializeToString()
+
+    def add_gateway(self, ip, port):
+        if (ip, port) not in self.gateways:
+            log.info("Gateway discovered: %s:%d", ip, port)
+            self.gateways.append((ip, port))
+        # Frota inteira respondendo de uma vez estouraria o buffer UDP do gateway
+        for data in self.discovery_responses():
+            self.responder.respond(data)
+        self.gateway_found.set()
+
+    def send(self, data, address):
+        try:
+            self.sock.sendto(data, address)
+            self.datagrams_sent += 1
+        except OSError as e:
+            self.send_errors += 1
+            log.debug("Error sending to %s: %s", address, e)
+
+    def rewrite(self, data, copy, shift):
+        # Sem cópia nem deslocamento, os bytes gravados saem como estão
+        if copy == 0 and not shift:
+            return data
+        message = messages.DeviceMessage.FromString(data)
+        for reading in [message, *message.readings]:
+            if reading.device_id:
+                reading.device_id = copy_id(reading.device_id, copy)
+            if shift and reading.timestamp:
+                reading.timestamp += shift
+        return message.SerializeToString()
+
+    def emit(self, field, data, shift):
+        self.records_replayed += 1
+        if field == DISCOVER_RESPONSE:
+            response = messages.DiscoverResponse.FromString(data)
+            self.devices[response.device_id] = response
+            return
+        for copy in range(self.copies):
+            payload = self.rewrite(data, copy, shift)
+            for gateway in self.gateways:
+                self.send(payload, gateway)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.load_devices()
+        self.responder = DiscoveryResponder(self.multicast_addr, self.multicast_port, self.discovery_window,
+                                            sendto=self.send, call_later=loop.call_later)
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: DiscoveryListener(self), sock=multicast_socket(self.multicast_addr, self.multicast_port)
+        )
+        log.info("Replaying %s: %d devices x %d copies, speed=%s", self.path, len(self.devices), self.copies,
+                 self.speed or "max")
+        if self.gateways:
+            self.gateway_found.set()
+
+    async def replay(self):
+        """Reenvia o log uma vez e devolve a duração do reenvio em segundos."""
+        if not self.gateway_found.is_set():
+            await self.gateway_found.wait()
+            # As respostas de descoberta saem ao longo da janela e chegam ao gateway por outro
+            # socket: sem esta espera as primeiras leituras seriam de dispositivos desconhecidos
+            await asyncio.sleep(self.discovery_window + self.settle)
+        started = time.time()
+        first = None
+        with TrafficReader(self.path) as reader:
+            for timestamp, field, data in reader:
+                if first is None:
+                    first = timestamp
+                if self.speed:
+                    due = started + (timestamp - first) / self.speed
+                    delay = due - time.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    elif delay < -0.01:
+                        self.late += 1
+                else:
+                    due = time.time()
+                    if self.records_replayed % 256 == 0:
+                        await asyncio.sleep(0)  # Deixa o loop atender a descoberta
+                self.emit(field, data, due - timestamp if self.retime else 0.0)
+        return time.time() - started
+
+    async def stop(self):
+        if self.transport is not None:
+            self.transport.close()
+        self.sock.close()
+
+    def stats(self):
+        return {
+            "records_replayed": self.records_replayed,
+            "datagrams_sent": self.datagrams_sent,
+            "send_errors": self.send_errors,
+            "late_records": self.late,
+        }
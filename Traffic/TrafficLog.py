@@ -0,0 +1,131 @@
+"""Log de tráfego: TrafficRecord precedidos pelo tamanho em varint, como os frames de Framing.py.
+
+O gravador não reserializa nada: o datagrama recebido já é o DeviceMessage ou o
+DiscoverResponse serializado, então o registro é montado com os bytes originais e
+acumulado em memória até flush_bytes. O leitor mapeia o arquivo com mmap e só copia
+cada mensagem, não o log inteiro, para a memória do processo.
+"""
+import logging
+import mmap
+import os
+import struct
+from Framing import FrameError, decode_varint, encode_varint
+
+log = logging.getLogger(__name__)
+
+# Campos do TrafficRecord
+TIMESTAMP = 1
+DEVICE_MESSAGE = 2
+DISCOVER_RESPONSE = 3
+
+_TIMESTAMP_TAG = bytes([TIMESTAMP << 3 | 1])  # fixed64 (double)
+_MESSAGE_TAGS = {field: bytes([field << 3 | 2]) for field in (DEVICE_MESSAGE, DISCOVER_RESPONSE)}
+_FIELDS = {tag[0]: field for field, tag in _MESSAGE_TAGS.items()}
+_unpack_timestamp = struct.Struct("<d").unpack_from
+
+
+def encode_record(timestamp, field, data):
+    """TrafficRecord serializado e precedido pelo tamanho, a partir da mensagem já serializada."""
+    body = _TIMESTAMP_TAG + struct.pack("<d", timestamp) + _MESSAGE_TAGS[field] + encode_varint(len(data)) + data
+    return encode_varint(len(body)) + body
+
+
+def decode_record(record):
+    """Devolve (timestamp, campo, mensagem serializada) de um TrafficRecord, sem o protobuf.
+
+    Campos desconhecidos (de uma versão futura do log) são ignorados, como no protobuf.
+    """
+    timestamp = 0.0
+    field = data = None
+    pos = 0
+    while pos < len(record):
+        key, pos = decode_varint(record, pos)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 1:
+            if number == TIMESTAMP:
+                timestamp = _unpack_timestamp(record, pos)[0]
+            pos += 8
+        elif wire_type == 2:
+            size, pos = decode_varint(record, pos)
+            if number in _MESSAGE_TAGS:
+                field, data = number, record[pos:pos + size]
+            pos += size
+        elif wire_type == 0:
+            _, pos = decode_varint(record, pos)
+        elif wire_type == 5:
+            pos += 4
+        else:
+            raise FrameError(f"unsupported wire type {wire_type}")
+    return timestamp, field, data
+
+
+class TrafficWriter:
+    """Acrescenta registros ao log em blocos de até flush_bytes (uma escrita por bloco)."""
+
+    def __init__(self, path, flush_bytes=256 * 1024):
+        self.path = path
+        self.file = open(path, "ab")
+        self.flush_bytes = flush_bytes
+        self.buffer = bytearray()
+        self.records = 0
+        self.bytes_written = 0
+
+    def append(self, timestamp, field, data):
+        self.buffer += encode_record(timestamp, field, data)
+        self.records += 1
+        if len(self.buffer) >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.bytes_written += len(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class TrafficReader:
+    """Percorre um log gravado pelo TrafficWriter através de um mmap do arquivo."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __iter__(self):
+        """Gera (timestamp, campo, mensagem serializada em bytes)."""
+        data = self.map
+        end = len(data)
+        pos = 0
+        while pos < end:
+            header = decode_varint(data, pos)
+            if header is None or header[1] + header[0] > end:
+                # Gravação interrompida no meio de um bloco: o resto do registro não existe
+                log.warning("%s: truncated record at byte %d", self.path, pos)
+                return
+            size, start = header
+            pos = start + size
+            # Caminho rápido para o layout do encode_record: timestamp, tag e tamanho em 1 byte
+            if size > 11 and data[start] == 0x09 and data[start + 9] in _FIELDS and data[start + 10] == size - 11:
+                yield _unpack_timestamp(data, start + 1)[0], _FIELDS[data[start + 9]], data[start + 11:pos]
+                continue
+            # Fatiar o mmap devolve bytes: nada do mapeamento sobrevive ao registro
+            timestamp, field, message = decode_record(data[start:pos])
+            if field is not None:
+                yield timestamp, field, message
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+# Ao rodar direto do repositório, usa os módulos de DeviceClasses
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DeviceClasses"))
+
+from Recorder import Recorder
+from Replayer import Replayer
+
+
+def gateway_address(value):
+    ip, port = value.rsplit(":", 1)
+    return ip, int(port)
+
+
+parser = argparse.ArgumentParser(description="Grava e reenvia o tráfego dos dispositivos (DeviceMessage e DiscoverResponse)")
+parser.add_argument("--multicast-addr", default="224.0.0.1")
+parser.add_argument("--multicast-port", type=int, default=9999)
+parser.add_argument("--log-level", default="INFO")
+commands = parser.add_subparsers(dest="command", required=True)
+
+record = commands.add_parser("record", help="Grava o tráfego como mais um gateway")
+record.add_argument("log", help="Arquivo do log (os registros são acrescentados)")
+record.add_argument("--udp-port", type=int, default=9992, help="Porta UDP anunciada para a telemetria")
+record.add_argument("--advertise-ip", default=None, help="IP anunciado no DISCOVERY_REQUEST (padrão: IP local)")
+record.add_argument("--discovery-interval", type=float, default=5)
+record.add_argument("--duration", type=float, default=None, help="Tempo de gravação (s); sem ele, até Ctrl+C")
+
+replay = commands.add_parser("replay", help="Reenvia um log gravado")
+replay.add_argument("log")
+replay.add_argument("--speed", type=float, default=1.0, help="1 = tempo real, 10 = 10x, 0 = o mais rápido possível")
+replay.add_argument("--copies", type=int, default=1, help="Cópias da frota, com IDs reescritos (ID-R1, ID-R2, ...)")
+replay.add_argument("--gateway", type=gateway_address, action="append", default=[],
+                    help="ip:porta UDP de um gateway, sem esperar pelo DISCOVERY_REQUEST")
+replay.add_argument("--advertise-ip", default=None, help="IP anunciado nos DiscoverResponse (padrão: o gravado)")
+replay.add_argument("--keep-timestamps", action="store_true", help="Não desloca os timestamps para o momento do reenvio")
+replay.add_argument("--loop", action="store_true", help="Reenvia o log indefinidamente")
+args = parser.parse_args()
+
+logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(message)s")
+
+
+async def run_replay():
+    replayer = Replayer(args.log, args.multicast_addr, args.multicast_port, speed=args.speed, copies=args.copies,
+                        gateways=args.gateway, retime=not args.keep_timestamps, advertise_ip=args.advertise_ip)
+    await replayer.start()
+    try:
+        while True:
+            elapsed = await replayer.replay()
+            logging.info("Replay finished in %.2fs: %s", elapsed, json.dumps(replayer.stats()))
+            if not args.loop:
+                break
+    finally:
+        await replayer.stop()
+
+
+try:
+    if args.command == "record":
+        recorder = Recorder(args.log, args.multicast_addr, args.multicast_port, args.udp_port,
+                            args.advertise_ip, args.discovery_interval)
+        asyncio.run(recorder.record(args.duration))
+    else:
+        asyncio.run(run_replay())
+except KeyboardInterrupt:
+    pass
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: messages.proto
+# Protobuf Python Version: 5.28.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    5,
+    28,
+    1,
+    '',
+    'messages.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0emessages.proto\x12\x08messages\"M\n\x0b\x44\x65viceState\x12\x11\n\tdevice_id\x18\x01 \x01(\t\x12\r\n\x05state\x18\x02 \x01(\t\x12\r\n\x05\x66ound\x18\x03 \x01(\x08\x12\r\n\x05\x65rror\x18\x04 \x01(\t\"[\n\rClientMessage\x12\x0f\n\x07request\x18\x01 \x01(\t\x12\x12\n\ndevice_ids\x18\x02 \x03(\t\x12%\n\x06states\x18\x03 \x03(\x0b\x32\x15.messages.DeviceState\"Y\n\x0e\x43lientResponse\x12\x10\n\x08response\x18\x01 \x01(\t\x12%\n\x06states\x18\x02 \x03(\x0b\x32\x15.messages.DeviceState\x12\x0e\n\x06update\x18\x03 \x01(\x08\"/\n\tAcReading\x12\r\n\x05state\x18\x01 \x01(\x05\x12\x13\n\x0btemperature\x18\x02 \x01(\x02\"\x1e\n\x10HeadlightReading\x12\n\n\x02on\x18\x01 \x01(\x08\"$\n\x08Location\x12\x0b\n\x03lat\x18\x01 \x01(\x01\x12\x0b\n\x03lon\x18\x02 \x01(\x01\"M\n\rLocationDelta\x12\x10\n\x08keyframe\x18\x01 \x01(\r\x12\x10\n\x08\x61\x62solute\x18\x02 \x01(\x08\x12\x0b\n\x03lon\x18\x03 \x01(\x11\x12\x0b\n\x03lat\x18\x04 \x01(\x11\"\xa8\x02\n\rDeviceMessage\x12\x11\n\tdevice_id\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x01\x12)\n\x08readings\x18\x04 \x03(\x0b\x32\x17.messages.DeviceMessage\x12!\n\x02\x61\x63\x18\x05 \x01(\x0b\x32\x13.messages.AcReadingH\x00\x12/\n\theadlight\x18\x06 \x01(\x0b\x32\x1a.messages.HeadlightReadingH\x00\x12&\n\x08location\x18\x07 \x01(\x0b\x32\x12.messages.LocationH\x00\x12\x31\n\x0elocation_delta\x18\x08 \x01(\x0b\x32\x17.messages.LocationDeltaH\x00\x42\t\n\x07payload\"I\n\x0e\x44\x65viceResponse\x12\x11\n\tdevice_id\x18\x01 \x01(\t\x12\x10\n\x08response\x18\x02 \x01(\t\x12\x12\n\ncommand_id\x18\x03 \x01(\x04\"a\n\tDeviceAck\x12\x11\n\tdevice_id\x18\x01 \x01(\t\x12\x12\n\ncommand_id\x18\x02 \x01(\x04\x12\r\n\x05state\x18\x03 \x01(\t\x12\x0f\n\x07\x61pplied\x18\x04 \x01(\x08\x12\r\n\x05\x65rror\x18\x05 \x01(\t\"<\n\x0f\x44iscoverMessage\x12\x0f\n\x07request\x18\x01 \x01(\t\x12\n\n\x02ip\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\"M\n\x10\x44iscoverResponse\x12\x11\n\tdevice_id\x18\x01 \x01(\t\x12\n\n\x02ip\x18\x02 \x01(\t\x12\x0c\n\x04port\x18\x03 \x01(\x05\x12\x0c\n\x04type\x18\x04 \x01(\x05\"\x99\x01\n\rTrafficRecord\x12\x11\n\ttimestamp\x18\x01 \x01(\x01\x12\x31\n\x0e\x64\x65vice_message\x18\x02 \x01(\x0b\x32\x17.messages.DeviceMessageH\x00\x12\x37\n\x11\x64iscover_response\x18\x03 \x01(\x0b\x32\x1a.messages.DiscoverResponseH\x00\x42\t\n\x07messageB&Z$github.com/username/gateway/messagesb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'messages_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  _globals['DESCRIPTOR']._loaded_options = None
+  _globals['DESCRIPTOR']._serialized_options = b'Z$github.com/username/gateway/messages'
+  _globals['_DEVICESTATE']._serialized_start=28
+  _globals['_DEVICESTATE']._serialized_end=105
+  _globals['_CLIENTMESSAGE']._serialized_start=107
+  _globals['_CLIENTMESSAGE']._serialized_end=198
+  _globals['_CLIENTRESPONSE']._serialized_start=200
+  _globals['_CLIENTRESPONSE']._serialized_end=289
+  _globals['_ACREADING']._serialized_start=291
+  _globals['_ACREADING']._serialized_end=338
+  _globals['_HEADLIGHTREADING']._serialized_start=340
+  _globals['_HEADLIGHTREADING']._serialized_end=370
+  _globals['_LOCATION']._serialized_start=372
+  _globals['_LOCATION']._serialized_end=408
+  _globals['_LOCATIONDELTA']._serialized_start=410
+  _globals['_LOCATIONDELTA']._serialized_end=487
+  _globals['_DEVICEMESSAGE']._serialized_start=490
+  _globals['_DEVICEMESSAGE']._serialized_end=786
+  _globals['_DEVICERESPONSE']._serialized_start=788
+  _globals['_DEVICERESPONSE']._serialized_end=861
+  _globals['_DEVICEACK']._serialized_start=863
+  _globals['_DEVICEACK']._serialized_end=960
+  _globals['_DISCOVERMESSAGE']._serialized_start=962
+  _globals['_DISCOVERMESSAGE']._serialized_end=1022
+  _globals['_DISCOVERRESPONSE']._serialized_start=1024
+  _globals['_DISCOVERRESPONSE']._serialized_end=1101
+  _globals['_TRAFFICRECORD']._serialized_start=1104
+  _globals['_TRAFFICRECORD']._serialized_end=1257
+# @@protoc_insertion_point(module_scope)